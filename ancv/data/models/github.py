@@ -17,6 +17,28 @@ class File(BaseModel):
     language: t.Optional[str] = None
     raw_url: t.Optional[HttpUrl] = None
     size: t.Optional[int] = None
+    # Only present when fetching a single gist, not when listing them:
+    # https://docs.github.com/en/rest/gists/gists?apiVersion=2022-11-28#truncation
+    content: t.Optional[str] = None
+    truncated: t.Optional[bool] = None
+
+    @property
+    def revision(self) -> t.Optional[str]:
+        """The revision SHA this file's `raw_url` is pinned to, if any.
+
+        Raw URLs look like
+        `https://gist.githubusercontent.com/<user>/<id>/raw/<revision>/<filename>`, so
+        the content behind a given URL never changes.
+        """
+
+        if self.raw_url is None or self.raw_url.path is None:
+            return None
+
+        match self.raw_url.path.strip("/").split("/"):
+            case [*_, "raw", revision, _]:
+                return revision
+            case _:
+                return None
 
 
 class GistUser(BaseModel):
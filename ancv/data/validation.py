@@ -1,6 +1,11 @@
 import re
 from functools import cache
 from string import ascii_letters, digits
+from typing import Union
+
+from pydantic import ValidationError
+
+from ancv.data.models.resume import ResumeSchema
 
 
 @cache
@@ -35,3 +40,24 @@ def is_valid_github_username(name: str) -> bool:
         return False
 
     return True
+
+
+def parse_resume(raw: Union[bytes, str]) -> ResumeSchema:
+    """Parses and validates a JSON resume in one go.
+
+    Validating the raw JSON directly (instead of `json.loads` first) skips decoding to
+    `str` and building an intermediate tree of Python objects.
+
+    Raises:
+        ValidationError: If `raw` is malformed JSON (see `is_malformed_json`) or
+            doesn't match the schema.
+    """
+
+    return ResumeSchema.model_validate_json(raw)
+
+
+def is_malformed_json(error: ValidationError) -> bool:
+    """Checks whether a `ValidationError` from `parse_resume` is due to invalid JSON,
+    as opposed to legal JSON not matching the schema."""
+
+    return any(e["type"] == "json_invalid" for e in error.errors())
@@ -4,6 +4,15 @@ class ResumeLookupError(LookupError):
     pass
 
 
+class RateLimitError(ResumeLookupError):
+    """Raised when a resume cannot be looked up as the rate limit is exhausted.
+
+    Unlike other lookup errors, this one says nothing about the resume itself.
+    """
+
+    pass
+
+
 class ResumeConfigError(ValueError):
     """Raised when a resume config is invalid, e.g. missing required fields."""
 
@@ -1,11 +1,9 @@
-import json
 from abc import ABC, abstractmethod
-from contextlib import redirect_stdout
 from datetime import date
 from functools import lru_cache, singledispatchmethod
+from io import BytesIO, TextIOWrapper
 from pathlib import Path
-from tempfile import SpooledTemporaryFile
-from typing import Iterable, Literal, MutableSequence, NamedTuple, Optional
+from typing import Iterable, Iterator, Literal, MutableSequence, NamedTuple, Optional
 
 from babel.core import Locale
 from babel.dates import format_date
@@ -13,11 +11,11 @@ from rich.align import Align
 from rich.console import Console, ConsoleOptions, Group, NewLine, RenderableType, group
 from rich.padding import Padding
 from rich.rule import Rule
+from rich.segment import Segments
 from rich.style import Style
 from rich.table import Column, Table
 from rich.text import Text
 
-from ancv import SIPrefix
 from ancv.data.models.resume import (
     Award,
     Basics,
@@ -37,6 +35,7 @@ from ancv.data.models.resume import (
     VolunteerItem,
     WorkItem,
 )
+from ancv.data.validation import parse_resume
 from ancv.exceptions import ResumeConfigError
 from ancv.visualization import OUTPUT_COLUMN_WIDTH, RenderableGenerator
 from ancv.visualization.themes import THEMES, Theme
@@ -100,32 +99,64 @@ class Template(ABC):
             A console-printable string representation of the template.
         """
 
+        return "".join(self.render_sections())
+
+    def render_sections(self) -> Iterator[str]:
+        """Renders the template like `render`, but one section at a time.
+
+        Sections are whatever `__rich_console__` yields at the top level. Joined, they
+        are exactly what `render` returns, so the first ones can already be sent while
+        later ones are still being rendered.
+
+        Yields:
+            The rendered sections, in order. Whitespace trailing a section is held back
+            until the next one, such that none trails the last.
+        """
+
         encoding = "ascii" if self.ascii_only else "utf-8"
-        f = SpooledTemporaryFile(max_size=SIPrefix.MEGA, mode="w", encoding=encoding)
-
-        with redirect_stdout(f):
-            # `Console` ultimately checks `f.encoding` for its encoding, if no file is
-            # passed explicitly:
-            # https://github.com/Textualize/rich/blob/b89d0362e8ebcb18902f0f0a206879f1829b5c0b/rich/console.py#L933
-            #
-            # If we don't specify `file` aka `f`, it will default to `sys.stdout`.
-            # Redirecting all of that to a fake, in-memory file with an
-            # artificial/controlled encoding will fool `rich` into using its ASCII-only
-            # rendering.
-            console = Console(
-                width=OUTPUT_COLUMN_WIDTH,
-                color_system="256",
-                force_terminal=False,
-                force_jupyter=False,
-                force_interactive=False,
-                no_color=False,
-                tab_size=4,
-                legacy_windows=False,
-            )
 
+        # `Console` ultimately checks `file.encoding` for its encoding, defaulting to
+        # `sys.stdout` if no file is given:
+        # https://github.com/Textualize/rich/blob/b89d0362e8ebcb18902f0f0a206879f1829b5c0b/rich/console.py#L933
+        #
+        # Passing a fake, in-memory file with an artificial/controlled encoding will
+        # fool `rich` into using its ASCII-only rendering. As the file is explicit and
+        # local, no interpreter globals (like `sys.stdout`) are touched, so concurrent
+        # renders in multiple threads cannot interfere with one another. Nothing is
+        # written to the file either, as all output is captured.
+        file = TextIOWrapper(BytesIO(), encoding=encoding)
+
+        console = Console(
+            file=file,
+            width=OUTPUT_COLUMN_WIDTH,
+            color_system="256",
+            force_terminal=False,
+            force_jupyter=False,
+            force_interactive=False,
+            no_color=False,
+            tab_size=4,
+            legacy_windows=False,
+        )
+
+        leading = True
+        held_back = ""
+        for renderable in self.__rich_console__(console, console.options):
+            # Rendering to segments first is what printing `self` would do for each
+            # renderable, too. Printing renderables directly would handle them slightly
+            # differently, e.g. newlines after `Text`.
+            segments = console.render(renderable, console.options)
             with console.capture() as capture:
-                console.print(self)
-        return capture.get().strip()
+                console.print(Segments(segments), end="")
+
+            section = held_back + capture.get()
+            if leading:
+                section = section.lstrip()
+                leading = not section
+
+            rendered = section.rstrip()
+            held_back = section[len(rendered) :]
+            if rendered:
+                yield rendered
 
     @lru_cache(maxsize=1_000)
     def _format_date(self, date: date) -> str:
@@ -275,10 +306,7 @@ class Template(ABC):
             A template instance.
         """
 
-        with open(file, "r", encoding="utf8") as f:
-            contents = json.loads(f.read())
-
-        return cls.from_model_config(ResumeSchema(**contents))
+        return cls.from_model_config(parse_resume(file.read_bytes()))
 
 
 class PaddingLevels(NamedTuple):
@@ -835,9 +863,10 @@ class Sequential(Template):
         # While all other parts of the resume are sequential and trivially rendered and
         # composed, the basics section has some special, center-aligned formatting
         # logic. As such, it is treated as a special case and rendered separately, not
-        # in the main loop below.
+        # in the main loop below. It's yielded as a single group, the first section of
+        # `render_sections`.
         if basics := self.model.basics:
-            yield from self.format(basics)
+            header: list[RenderableType] = [*self.format(basics)]
 
             if profiles := basics.profiles:
                 table = Table.grid(
@@ -849,13 +878,14 @@ class Sequential(Template):
                 for profile in profiles:
                     formatted = self.format(profile)
                     table.add_row(*formatted)
-                yield Align.center(table)
+                header.append(Align.center(table))
 
             if location := basics.location:
-                yield NewLine()
-                yield from self.format(location)
+                header.append(NewLine())
+                header.extend(self.format(location))
 
-            yield NewLine()
+            header.append(NewLine())
+            yield Group(*header)
 
         # Shortcut names
         m = self.model
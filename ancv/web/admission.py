@@ -0,0 +1,136 @@
+import asyncio
+import math
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import timedelta
+from http import HTTPStatus
+
+from aiohttp import web
+from structlog import get_logger
+
+LOGGER = get_logger()
+
+
+@dataclass
+class AdmissionStats:
+    """Counters of an `Admission`."""
+
+    admitted: int = 0
+    queued: int = 0  # Admitted or not, had to wait for a slot
+    rejected: int = 0  # Queue full, or timed out waiting
+    bypassed: int = 0
+
+
+class Admission:
+    """Limits the number of requests handled at once, shedding load beyond that.
+
+    Up to `max_concurrent` requests are handled at once. Further ones wait for a slot in
+    a queue, first come first served, for up to `queue_timeout`. Once `max_queued` are
+    waiting, further ones are rejected right away with `503 Service Unavailable`, as are
+    those that time out. That way, a burst costs bounded memory and GitHub calls, and
+    latency stays bounded for those requests that do get through.
+
+    Requests for which `bypass` returns `True` (e.g. those served from cache, which are
+    cheap) are handled right away, neither taking up nor waiting for a slot.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 64,
+        max_queued: int = 256,
+        queue_timeout: timedelta = timedelta(seconds=5),
+        bypass: Callable[[web.Request], bool] = lambda request: False,
+    ) -> None:
+        """Initializes admission control.
+
+        Args:
+            max_concurrent: How many requests may be handled at once.
+            max_queued: How many requests may wait for a slot, beyond which they're
+                rejected.
+            queue_timeout: How long requests may wait for a slot before being rejected.
+            bypass: Returns whether a request may skip admission control.
+        """
+
+        if max_concurrent < 1:
+            raise ValueError(
+                f"Concurrency limit must be positive, got {max_concurrent}."
+            )
+
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.bypass = bypass
+        self.stats = AdmissionStats()
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._active = 0
+        self._waiting = 0
+
+    @property
+    def active(self) -> int:
+        """The number of admitted requests currently being handled."""
+
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        """The number of requests currently waiting for a slot."""
+
+        return self._waiting
+
+    @property
+    def retry_after(self) -> int:
+        """Seconds rejected clients are asked to wait before retrying, at least one."""
+
+        return max(1, math.ceil(self.queue_timeout.total_seconds()))
+
+    @web.middleware
+    async def middleware(
+        self,
+        request: web.Request,
+        handler: Callable[[web.Request], Awaitable[web.StreamResponse]],
+    ) -> web.StreamResponse:
+        """Admits, queues or rejects requests as described for the class."""
+
+        if self.bypass(request):
+            self.stats.bypassed += 1
+            return await handler(request)
+
+        if self._slots.locked():
+            if self._waiting >= self.max_queued:
+                return self._reject(request, "Too many requests queued")
+
+            self.stats.queued += 1
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(
+                    self._slots.acquire(), self.queue_timeout.total_seconds()
+                )
+            except TimeoutError:
+                return self._reject(request, "Timed out waiting in queue")
+            finally:
+                self._waiting -= 1
+        else:
+            await self._slots.acquire()  # Doesn't block
+
+        self.stats.admitted += 1
+        self._active += 1
+        try:
+            return await handler(request)
+        finally:
+            self._active -= 1
+            self._slots.release()
+
+    def _reject(self, request: web.Request, reason: str) -> web.Response:
+        self.stats.rejected += 1
+        LOGGER.warning(
+            "Shedding load.",
+            path=request.path,
+            reason=reason,
+            active=self._active,
+            waiting=self._waiting,
+        )
+        return web.Response(
+            text=f"{reason}, the server is overloaded. Please try again later.\n",
+            status=HTTPStatus.SERVICE_UNAVAILABLE,
+            headers={"Retry-After": str(self.retry_after)},
+        )
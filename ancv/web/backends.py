@@ -0,0 +1,511 @@
+"""Byte stores that caches can be shared through, e.g. across server replicas."""
+
+import asyncio
+import hashlib
+import os
+import secrets
+import struct
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Optional, Union
+from urllib.parse import unquote, urlsplit
+
+from cachetools import LRUCache
+from structlog import get_logger
+
+from ancv import SIPrefix
+from ancv.web.cache import CacheStats
+
+LOGGER = get_logger()
+
+
+class BackendError(Exception):
+    """Raised when a cache backend cannot be reached or fails to carry out a request."""
+
+
+@dataclass
+class BackendStats(CacheStats):
+    """Counters of a `CacheBackend`. Failed lookups count as misses, too."""
+
+    errors: int = 0
+
+
+class CacheBackend(ABC):
+    """Stores bytes under string keys, with optional expiry.
+
+    Stores are caches: they may drop entries at any time, so callers must cope with
+    misses. Failures to reach the store surface as `BackendError`s, which callers should
+    also treat as misses (or skipped writes) rather than failing requests over.
+    """
+
+    def __init__(self) -> None:
+        self.stats = BackendStats()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Returns the value stored under `key`, or `None` if there is none.
+
+        Raises:
+            BackendError: If the store failed.
+        """
+
+        try:
+            value = await self._get(key)
+        except BackendError:
+            self.stats.errors += 1
+            self.stats.misses += 1
+            raise
+
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    async def set(
+        self, key: str, value: bytes, ttl: Optional[timedelta] = None
+    ) -> None:
+        """Stores `value` under `key`, replacing any previous value.
+
+        Args:
+            key: The key to store the value under.
+            value: The value to store.
+            ttl: How long to keep the value for at most. Forever if not given, or until
+                evicted.
+
+        Raises:
+            BackendError: If the store failed.
+        """
+
+        try:
+            await self._set(key, value, ttl)
+        except BackendError:
+            self.stats.errors += 1
+            raise
+
+    async def delete(self, key: str) -> None:
+        """Removes the value stored under `key`, if any.
+
+        Raises:
+            BackendError: If the store failed.
+        """
+
+        try:
+            await self._delete(key)
+        except BackendError:
+            self.stats.errors += 1
+            raise
+
+    async def close(self) -> None:
+        """Releases any resources held, such as connections."""
+
+    @abstractmethod
+    async def _get(self, key: str) -> Optional[bytes]: ...
+
+    @abstractmethod
+    async def _set(self, key: str, value: bytes, ttl: Optional[timedelta]) -> None: ...
+
+    @abstractmethod
+    async def _delete(self, key: str) -> None: ...
+
+
+def _expiry(ttl: Optional[timedelta]) -> float:
+    """The wall-clock time at which an entry stored now for `ttl` expires, `0` for
+    never."""
+
+    return 0.0 if ttl is None else time.time() + ttl.total_seconds()
+
+
+def _expired(expiry: float) -> bool:
+    return expiry != 0.0 and expiry <= time.time()
+
+
+class MemoryBackend(CacheBackend):
+    """Stores values in memory, evicting the least recently used ones once `maxsize`
+    bytes are exceeded.
+
+    Only shared within the process, so mostly useful for development and tests.
+    """
+
+    def __init__(self, maxsize: int = 32 * SIPrefix.MEGA) -> None:
+        """Initializes an empty store.
+
+        Args:
+            maxsize: The maximum total size of stored values, in bytes.
+        """
+
+        super().__init__()
+        self._entries: LRUCache[str, tuple[bytes, float]] = LRUCache(
+            maxsize=maxsize, getsizeof=lambda entry: len(entry[0])
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def _get(self, key: str) -> Optional[bytes]:
+        try:
+            value, expiry = self._entries[key]
+        except KeyError:
+            return None
+
+        if _expired(expiry):
+            del self._entries[key]
+            return None
+        return value
+
+    async def _set(self, key: str, value: bytes, ttl: Optional[timedelta]) -> None:
+        try:
+            self._entries[key] = (value, _expiry(ttl))
+        except ValueError:  # Raised by `cachetools` if the value exceeds `maxsize`
+            LOGGER.warning("Value too large to cache.", key=key, size=len(value))
+
+    async def _delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+# Each file starts with the entry's expiry, see `_expiry`:
+_HEADER = struct.Struct(">d")
+
+
+class DiskBackend(CacheBackend):
+    """Stores values as files in a directory, evicting the least recently used ones
+    once `maxsize` bytes are exceeded.
+
+    Entries survive restarts, and are shared by all processes using the same directory
+    (e.g. replicas mounting the same volume). The size bound is kept per process, from
+    the files found at startup plus those it writes itself. Files are read and written
+    off the event loop.
+    """
+
+    def __init__(self, directory: Path, maxsize: int = 256 * SIPrefix.MEGA) -> None:
+        """Initializes the store, picking up files already in `directory`.
+
+        Args:
+            directory: The directory to store values in. Created if missing.
+            maxsize: The maximum total size of stored files, in bytes.
+        """
+
+        super().__init__()
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+        self._files = _DiskIndex(maxsize=maxsize)
+
+        # Oldest first, such that those are evicted first:
+        existing = sorted(
+            (stat.st_mtime, entry.name, stat.st_size)
+            for entry in os.scandir(directory)
+            if entry.is_file()
+            and entry.name.endswith(".bin")
+            and (stat := entry.stat())
+        )
+        for _, name, size in existing:
+            self._store(name, size)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def path(self, key: str) -> Path:
+        """The file holding the value of `key`."""
+
+        return self.directory / self._name(key)
+
+    @staticmethod
+    def _name(key: str) -> str:
+        return f"{hashlib.sha256(key.encode()).hexdigest()}.bin"
+
+    def _store(self, name: str, size: int) -> None:
+        try:
+            self._files[name] = size
+        except ValueError:  # Larger than `maxsize` on its own
+            (self.directory / name).unlink(missing_ok=True)
+        for evicted in self._files.evicted:
+            (self.directory / evicted).unlink(missing_ok=True)
+        self._files.evicted.clear()
+
+    async def _get(self, key: str) -> Optional[bytes]:
+        path = self.path(key)
+        try:
+            data = await asyncio.to_thread(path.read_bytes)
+        except FileNotFoundError:
+            self._files.pop(path.name, None)
+            return None
+        except OSError as e:
+            raise BackendError(f"Failed to read {path}: {e}") from e
+
+        if len(data) < _HEADER.size:  # Truncated, e.g. by a full disk
+            return None
+        (expiry,) = _HEADER.unpack_from(data)
+        if _expired(expiry):
+            await self._delete(key)
+            return None
+
+        self._files.get(path.name)  # Marks as recently used
+        return data[_HEADER.size :]
+
+    async def _set(self, key: str, value: bytes, ttl: Optional[timedelta]) -> None:
+        path = self.path(key)
+        data = _HEADER.pack(_expiry(ttl)) + value
+
+        def write() -> None:
+            # Atomically, such that concurrent readers never see partial files:
+            temporary = path.with_suffix(f".{secrets.token_hex(8)}.tmp")
+            temporary.write_bytes(data)
+            temporary.replace(path)
+
+        try:
+            await asyncio.to_thread(write)
+        except OSError as e:
+            raise BackendError(f"Failed to write {path}: {e}") from e
+        self._store(path.name, len(data))
+
+    async def _delete(self, key: str) -> None:
+        path = self.path(key)
+        self._files.pop(path.name, None)
+        try:
+            await asyncio.to_thread(path.unlink, missing_ok=True)
+        except OSError as e:
+            raise BackendError(f"Failed to delete {path}: {e}") from e
+
+
+class _DiskIndex(LRUCache[str, int]):
+    """Tracks stored files by size, collecting evicted ones to be deleted."""
+
+    def __init__(self, maxsize: int) -> None:
+        super().__init__(maxsize=maxsize, getsizeof=lambda size: size)
+        self.evicted: list[str] = []
+
+    def popitem(self) -> tuple[str, int]:
+        name, size = super().popitem()
+        self.evicted.append(name)
+        return name, size
+
+
+RESPValue = Union[None, int, bytes, list["RESPValue"]]
+
+
+class RedisError(BackendError):
+    """An error reply from a Redis server."""
+
+
+def encode_command(*args: Union[str, bytes]) -> bytes:
+    """Encodes a command in the Redis serialization protocol (RESP), as an array of
+    bulk strings."""
+
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg.encode() if isinstance(arg, str) else arg
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> RESPValue:
+    """Reads a single RESP (version 2) reply.
+
+    Simple strings are returned as bytes, just like bulk strings.
+
+    Raises:
+        RedisError: If the reply is an error.
+        BackendError: If the reply is malformed.
+        asyncio.IncompleteReadError: If the connection closed mid-reply.
+    """
+
+    line = (await reader.readuntil(b"\r\n"))[:-2]
+    kind, rest = line[:1], line[1:]
+
+    if kind == b"+":
+        return rest
+    if kind == b"-":
+        raise RedisError(rest.decode(errors="replace"))
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        if (length := int(rest)) < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        if (length := int(rest)) < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise BackendError(f"Malformed reply: {line!r}")
+
+
+class _Connection:
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    async def close(self) -> None:
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except OSError:
+            pass
+
+
+class RedisBackend(CacheBackend):
+    """Stores values in a server speaking the Redis protocol (Redis, Valkey, ...),
+    shared by all replicas pointed at it.
+
+    Connections are pooled, and opened lazily. Any failure (including timeouts) closes
+    the connection it happened on and raises a `BackendError`, such that a struggling
+    server only ever costs a request up to `timeout`.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        password: Optional[str] = None,
+        username: Optional[str] = None,
+        timeout: timedelta = timedelta(milliseconds=500),
+        max_connections: int = 8,
+    ) -> None:
+        """Initializes the client, without connecting yet.
+
+        Args:
+            host: The server's hostname.
+            port: The server's port.
+            db: The database to select.
+            password: The password to authenticate with, if any.
+            username: The user to authenticate as, for servers with ACLs.
+            timeout: How long to wait for connecting, or for a reply.
+            max_connections: The maximum number of connections to open at once.
+        """
+
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.username = username
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(max_connections)
+        self._idle: list[_Connection] = []
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        """Creates a client from a URL like `redis://[[user]:password@]host[:port][/db]`."""
+
+        parts = urlsplit(url)
+        if parts.scheme != "redis":
+            raise ValueError(f"Not a Redis URL: {url}")
+        return cls(
+            host=parts.hostname or "localhost",
+            port=parts.port or 6379,
+            db=int(parts.path.lstrip("/") or 0),
+            password=None if parts.password is None else unquote(parts.password),
+            username=unquote(parts.username) if parts.username else None,
+        )
+
+    async def execute(self, *args: Union[str, bytes]) -> RESPValue:
+        """Sends a command, returning its reply.
+
+        Raises:
+            RedisError: If the server replied with an error.
+            BackendError: If the server couldn't be reached, or didn't reply in time.
+        """
+
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            try:
+                async with asyncio.timeout(self.timeout.total_seconds()):
+                    if connection is None:
+                        connection = await self._connect()
+                    reply = await self._roundtrip(connection, encode_command(*args))
+            except RedisError:
+                if connection is not None:  # Still in a clean state
+                    self._idle.append(connection)
+                raise
+            except (
+                OSError,
+                TimeoutError,
+                asyncio.IncompleteReadError,
+                asyncio.LimitOverrunError,
+                ValueError,  # Malformed lengths
+            ) as e:
+                if connection is not None:
+                    await connection.close()
+                raise BackendError(
+                    f"Redis at {self.host}:{self.port} failed: {e!r}"
+                ) from e
+            except BaseException:  # E.g. cancelled mid-reply: unknown state
+                if connection is not None:
+                    await connection.close()
+                raise
+
+            self._idle.append(connection)
+            return reply
+
+    async def _connect(self) -> _Connection:
+        connection = _Connection(*await asyncio.open_connection(self.host, self.port))
+        try:
+            setup: list[Sequence[str]] = []
+            if self.password is not None:
+                auth = ["AUTH", self.password]
+                if self.username is not None:
+                    auth.insert(1, self.username)
+                setup.append(auth)
+            if self.db:
+                setup.append(["SELECT", str(self.db)])
+            for command in setup:
+                await self._roundtrip(connection, encode_command(*command))
+        except BaseException:
+            await connection.close()
+            raise
+        return connection
+
+    @staticmethod
+    async def _roundtrip(connection: _Connection, command: bytes) -> RESPValue:
+        connection.writer.write(command)
+        await connection.writer.drain()
+        return await read_reply(connection.reader)
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(connection.close() for connection in idle))
+
+    async def _get(self, key: str) -> Optional[bytes]:
+        value = await self.execute("GET", key)
+        if value is not None and not isinstance(value, bytes):
+            raise BackendError(f"Unexpected reply to GET: {value!r}")
+        return value
+
+    async def _set(self, key: str, value: bytes, ttl: Optional[timedelta]) -> None:
+        if ttl is None:
+            await self.execute("SET", key, value)
+        else:
+            milliseconds = max(1, int(ttl.total_seconds() * 1000))
+            await self.execute("SET", key, value, "PX", str(milliseconds))
+
+    async def _delete(self, key: str) -> None:
+        await self.execute("DEL", key)
+
+
+def backend_from_url(url: str) -> CacheBackend:
+    """Creates a backend from a URL.
+
+    Supported are `memory://`, `file:///path/to/directory` and
+    `redis://[[user]:password@]host[:port][/db]`.
+
+    Raises:
+        ValueError: If the URL isn't supported.
+    """
+
+    parts = urlsplit(url)
+    if parts.scheme == "memory":
+        return MemoryBackend()
+    if parts.scheme == "file":
+        if not parts.path:
+            raise ValueError(f"No directory given: {url}")
+        return DiskBackend(Path(unquote(parts.path)))
+    if parts.scheme == "redis":
+        return RedisBackend.from_url(url)
+    raise ValueError(
+        f"Unsupported cache backend: {url} (expected memory://, file:// or redis://)"
+    )
@@ -0,0 +1,522 @@
+"""Caches used by the web server, along with their instrumentation."""
+
+import asyncio
+import hashlib
+import json
+import os
+from collections.abc import Iterator, MutableMapping
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+from cachetools import LRUCache, TTLCache
+from pydantic import ValidationError
+from structlog import get_logger
+
+from ancv import SIPrefix
+from ancv.data.models.resume import ResumeSchema
+from ancv.data.validation import parse_resume
+from ancv.reflection import METADATA
+from ancv.web.compression import Variants
+
+LOGGER = get_logger()
+
+
+@dataclass
+class CacheStats:
+    """Hit and miss counters of a cache."""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def ratio(self) -> float:
+        """The share of lookups that were hits, `0` if there were no lookups yet."""
+
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class ValidatorStats(CacheStats):
+    """Counters of a cache whose entries are revalidated with the origin on every use.
+
+    A *miss* is a request sent without validators, a *revalidation* one sent with them.
+    A *hit* is a revalidation the origin answered with `304 Not Modified`.
+    """
+
+    revalidations: int = 0
+
+
+class RenderKey(NamedTuple):
+    """Identifies a rendered resume.
+
+    The effective template config is derived from the resume's `meta` section, so it is
+    pinned by the gist file's revision just like the rest of the resume. This is what
+    allows looking up a render without validating the resume first.
+    """
+
+    user: str
+    revision: str
+
+    @property
+    def tag(self) -> str:
+        """Identifies the render for `ETag`s, without needing the render itself.
+
+        Includes the package version, as a new version might render differently.
+        """
+
+        key = f"{METADATA.version}:{self.user}:{self.revision}"
+        return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+class Snapshot(NamedTuple):
+    """The most recent successful lookup of a user's resume."""
+
+    key: RenderKey
+    timestamp: float  # As returned by `time.monotonic()`
+
+
+class RenderCache:
+    """An LRU cache of rendered resumes, bounded by their total size in bytes.
+
+    Rendering is the most CPU-intensive part of serving a resume, and most traffic goes
+    to comparatively few users, so keeping their final output around pays off. Renders
+    are kept along with their compressed variants, ready to be served.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        """Initializes the cache.
+
+        Args:
+            maxsize: The maximum total size of all cached renders, in bytes.
+        """
+
+        self._cache: LRUCache[RenderKey, Variants] = LRUCache(
+            maxsize=maxsize, getsizeof=lambda variants: variants.size
+        )
+        self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __contains__(self, key: RenderKey) -> bool:
+        return key in self._cache  # Neither a hit nor a miss, nor touches recency
+
+    @property
+    def currsize(self) -> int:
+        """The current total size of all cached renders, in bytes."""
+
+        return int(self._cache.currsize)
+
+    def get(self, key: RenderKey) -> Optional[Variants]:
+        """Returns the render for `key`, or `None` if it isn't cached."""
+
+        try:
+            rendered = self._cache[key]
+        except KeyError:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        return rendered
+
+    def put(self, key: RenderKey, rendered: Variants) -> None:
+        """Caches `rendered` under `key`, evicting least recently used renders."""
+
+        try:
+            self._cache[key] = rendered
+        except ValueError:  # Raised by `cachetools` if the value exceeds `maxsize`
+            LOGGER.warning("Render too large to cache.", key=key)
+
+
+class NegativeEntry(NamedTuple):
+    """A failed lookup of a user's resume."""
+
+    revision: Optional[str]  # Of the resume file, `None` if none was found
+    message: str
+
+
+class NegativeCache:
+    """A short-lived cache of failed resume lookups, keyed by user.
+
+    Failures come in two kinds:
+
+    - No resume file was found (the user doesn't exist or has no such gist). Finding
+      that out is the slowest path, scanning all of a user's gists, and typos, scanners
+      and bots ask for it over and over. These are cached without a revision, and
+      looked up before asking GitHub anything.
+    - A resume file was found, but is unusable (too large or invalid). These are cached
+      along with the file's revision, and only apply to that revision: a fixed resume
+      is picked up right away, while a broken one is neither downloaded nor validated
+      again.
+
+    Entries expire after `ttl`, the least recently used ones are evicted beyond
+    `maxsize` entries.
+    """
+
+    def __init__(
+        self, maxsize: int = 10_000, ttl: timedelta = timedelta(minutes=1)
+    ) -> None:
+        """Initializes the cache.
+
+        Args:
+            maxsize: The maximum number of users to remember failures of.
+            ttl: How long to remember a failure for.
+        """
+
+        self._cache: TTLCache[str, NegativeEntry] = TTLCache(
+            maxsize=maxsize, ttl=ttl.total_seconds()
+        )
+        self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, user: str, revision: Optional[str] = None) -> Optional[str]:
+        """Returns the message of the failure cached for `user` at `revision`, if any.
+
+        Args:
+            user: The user whose lookup failed.
+            revision: The revision of their resume file, `None` if there isn't one.
+
+        Returns:
+            The message of the failure, or `None` if no failure is cached.
+        """
+
+        entry = self._cache.get(user)
+        if entry is None or entry.revision != revision:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        return entry.message
+
+    def put(self, user: str, revision: Optional[str], message: str) -> None:
+        """Caches a failed lookup of `user`, replacing any previous one."""
+
+        self._cache[user] = NegativeEntry(revision, message)
+
+    def discard(self, user: str) -> None:
+        """Forgets any failure cached for `user`."""
+
+        self._cache.pop(user, None)
+
+
+# Mirrors `gidgethub.abc.CACHE_TYPE`: ETag, Last-Modified, decoded body and next page.
+ValidatorEntry = tuple[Optional[str], Optional[str], Any, Optional[str]]
+
+
+def _validator_entry_size(entry: ValidatorEntry) -> int:
+    """Approximates the size of a cached response in bytes.
+
+    The body is stored decoded, so its original size is gone. Re-encoding it is only
+    done on (comparatively rare) changed responses, as unchanged ones aren't stored
+    again.
+    """
+
+    etag, last_modified, data, more = entry
+    body = data if isinstance(data, str) else json.dumps(data, default=str)
+    return sum(len(part or "") for part in (etag, last_modified, body, more))
+
+
+class ValidatorCache(MutableMapping[str, ValidatorEntry]):
+    """A cache of HTTP validators (ETag, Last-Modified) and bodies, keyed by URL.
+
+    Meant to be handed to `gidgethub` as its `cache`, which will then send
+    `If-None-Match`/`If-Modified-Since` for every URL it has an entry for, reusing the
+    stored, already decoded body on a `304 Not Modified`. GitHub doesn't count those
+    against the rate limit, so entries are worth keeping around for long.
+
+    Entries are evicted least recently used first once `maxsize` bytes are exceeded, or
+    once they're older than `ttl`.
+    """
+
+    def __init__(self, maxsize: int, ttl: timedelta = timedelta(days=1)) -> None:
+        """Initializes the cache.
+
+        Args:
+            maxsize: The maximum total (approximate) size of all entries, in bytes.
+            ttl: How long to keep an entry around at most.
+        """
+
+        self._cache: TTLCache[str, ValidatorEntry] = TTLCache(
+            maxsize=maxsize,
+            ttl=ttl.total_seconds(),
+            getsizeof=_validator_entry_size,
+        )
+        self.stats = ValidatorStats()
+
+    def __getitem__(self, url: str) -> ValidatorEntry:
+        return self._cache[url]
+
+    def __setitem__(self, url: str, entry: ValidatorEntry) -> None:
+        try:
+            self._cache[url] = entry
+        except ValueError:  # Raised by `cachetools` if the value exceeds `maxsize`
+            LOGGER.warning("Response too large to cache.", url=url)
+            self._cache.pop(url, None)  # Don't keep validators for a stale body
+
+    def __delitem__(self, url: str) -> None:
+        del self._cache[url]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._cache)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @property
+    def currsize(self) -> int:
+        """The current total (approximate) size of all entries, in bytes."""
+
+        return int(self._cache.currsize)
+
+
+class GistIndex(MutableMapping[str, str]):
+    """Maps usernames to the ID of the gist their resume was last found in.
+
+    Looking up that gist directly is a single request, while finding it in the first
+    place can take many (one per page of the user's gists). Least recently used entries
+    are evicted once `maxsize` users are indexed.
+
+    The index can be saved to and loaded from a JSON file, surviving restarts.
+    """
+
+    def __init__(self, maxsize: int = 100_000) -> None:
+        """Initializes an empty index.
+
+        Args:
+            maxsize: The maximum number of users to index.
+        """
+
+        self._index: LRUCache[str, str] = LRUCache(maxsize=maxsize)
+
+    def __getitem__(self, user: str) -> str:
+        return self._index[user]
+
+    def __setitem__(self, user: str, gist_id: str) -> None:
+        self._index[user] = gist_id
+
+    def __delitem__(self, user: str) -> None:
+        del self._index[user]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @classmethod
+    def load(cls, path: Path, maxsize: int = 100_000) -> "GistIndex":
+        """Loads an index previously written by `save`.
+
+        A missing or unreadable file results in an empty index, as the index is only
+        ever an optimization.
+
+        Args:
+            path: The JSON file to load from.
+            maxsize: The maximum number of users to index.
+
+        Returns:
+            The loaded index.
+        """
+
+        index = cls(maxsize=maxsize)
+
+        try:
+            with open(path, encoding="utf8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            LOGGER.info("No gist index found, starting empty.", path=str(path))
+            return index
+        except (OSError, json.JSONDecodeError) as e:
+            LOGGER.warning("Unreadable gist index, starting empty.", error=str(e))
+            return index
+
+        if not isinstance(entries, dict):
+            LOGGER.warning("Malformed gist index, starting empty.", path=str(path))
+            return index
+
+        for user, gist_id in entries.items():
+            index[user] = gist_id
+
+        LOGGER.info("Loaded gist index.", path=str(path), entries=len(index))
+        return index
+
+    def save(self, path: Path) -> None:
+        """Saves the index as JSON, atomically replacing any existing file.
+
+        Args:
+            path: The JSON file to save to.
+        """
+
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf8") as f:
+            json.dump(dict(self._index.items()), f)
+        os.replace(tmp, path)
+
+        LOGGER.info("Saved gist index.", path=str(path), entries=len(self))
+
+
+class ContentEntry(NamedTuple):
+    """The raw contents of a resume file along with its validated model."""
+
+    raw: bytes
+    resume: ResumeSchema
+
+
+class _SpillingLRUCache(LRUCache[str, ContentEntry]):
+    """An `LRUCache` collecting evicted entries to be spilled instead of dropping
+    them."""
+
+    def __init__(self, maxsize: int) -> None:
+        super().__init__(maxsize=maxsize, getsizeof=self._sizeof)
+        self.evicted: list[tuple[str, ContentEntry]] = []
+
+    @staticmethod
+    def _sizeof(entry: ContentEntry) -> int:
+        # The model is about as large as the raw contents it came from, give or take.
+        return 2 * len(entry.raw)
+
+    def popitem(self) -> tuple[str, ContentEntry]:
+        url, entry = super().popitem()
+        self.evicted.append((url, entry))
+        return url, entry
+
+
+class _DiskLRU(LRUCache[str, int]):
+    """Tracks spilled files by size, collecting evicted ones to be deleted."""
+
+    def __init__(self, maxsize: int, directory: Path) -> None:
+        super().__init__(maxsize=maxsize, getsizeof=lambda size: size)
+        self.directory = directory
+        self.evicted: list[Path] = []
+
+    def path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+    def popitem(self) -> tuple[str, int]:
+        url, size = super().popitem()
+        self.evicted.append(self.path(url))
+        return url, size
+
+
+def _unlink(paths: list[Path]) -> None:
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+
+class ContentCache:
+    """A cache of resume file contents and their validated models, keyed by raw URL.
+
+    Raw gist URLs are pinned to a revision, so the contents behind one never change and
+    entries never need revalidation: a cached URL is neither downloaded nor validated
+    again. Least recently used entries are evicted once `maxsize` bytes are exceeded.
+
+    Optionally, evicted entries spill to a directory on disk (itself bounded by
+    `spill_maxsize` bytes). A hit there spares the download, but not the validation,
+    as only the raw contents are written. Files are read and written off the event
+    loop.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        spill: Optional[Path] = None,
+        spill_maxsize: int = 256 * SIPrefix.MEGA,
+    ) -> None:
+        """Initializes the cache.
+
+        Args:
+            maxsize: The maximum total (approximate) in-memory size, in bytes.
+            spill: The directory to spill evicted entries to. Off if not given.
+            spill_maxsize: The maximum total size of spilled files, in bytes.
+        """
+
+        self._memory = _SpillingLRUCache(maxsize=maxsize)
+        self._disk: Optional[_DiskLRU] = None
+        if spill is not None:
+            spill.mkdir(parents=True, exist_ok=True)
+            self._disk = _DiskLRU(maxsize=spill_maxsize, directory=spill)
+        self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    async def get(self, url: str) -> Optional[ResumeSchema]:
+        """Returns the validated resume behind `url`, or `None` if it isn't cached."""
+
+        entry: Optional[ContentEntry]
+        try:
+            entry = self._memory[url]
+        except KeyError:
+            entry = await self._unspill(url)
+
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        return entry.resume
+
+    async def put(self, url: str, raw: bytes, resume: ResumeSchema) -> None:
+        """Caches the raw contents behind `url` along with their validated model."""
+
+        try:
+            self._memory[url] = ContentEntry(raw, resume)
+        except ValueError:  # Raised by `cachetools` if the value exceeds `maxsize`
+            LOGGER.warning("Resume too large to cache.", url=url)
+
+        await self._spill()
+
+    async def _spill(self) -> None:
+        evicted, self._memory.evicted = self._memory.evicted, []
+        if self._disk is None:
+            return
+
+        for url, entry in evicted:
+            path = self._disk.path(url)
+            try:
+                await asyncio.to_thread(path.write_bytes, entry.raw)
+            except OSError as e:
+                LOGGER.warning("Failed to spill resume to disk.", url=url, error=str(e))
+                continue
+
+            try:
+                self._disk[url] = len(entry.raw)
+            except ValueError:  # Larger than `spill_maxsize` on its own
+                self._disk.evicted.append(path)
+
+        await self._delete_evicted()
+
+    async def _delete_evicted(self) -> None:
+        if self._disk is None or not self._disk.evicted:
+            return
+
+        paths, self._disk.evicted = self._disk.evicted, []
+        try:
+            await asyncio.to_thread(_unlink, paths)
+        except OSError as e:
+            LOGGER.warning("Failed to delete spilled resumes.", error=str(e))
+
+    async def _unspill(self, url: str) -> Optional[ContentEntry]:
+        if self._disk is None or url not in self._disk:
+            return None
+
+        path = self._disk.path(url)
+        del self._disk[url]  # Moves back into memory
+        self._disk.evicted.append(path)
+
+        try:
+            raw = await asyncio.to_thread(path.read_bytes)
+            resume = parse_resume(raw)
+        except (OSError, ValidationError) as e:
+            LOGGER.warning("Failed to read spilled resume.", url=url, error=str(e))
+            return None
+        finally:
+            await self._delete_evicted()
+
+        await self.put(url, raw, resume)
+        return ContentEntry(raw, resume)
@@ -1,21 +1,179 @@
-import json
+import asyncio
+import re
+from collections.abc import AsyncGenerator, AsyncIterator, Mapping
+from contextlib import aclosing
 from http import HTTPStatus
-from types import SimpleNamespace
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
+from typing import Any, Optional
 
 import gidgethub
+from aiohttp import ClientSession
+from cachetools import LRUCache
+from gidgethub import sansio
 from gidgethub.aiohttp import GitHubAPI
 from humanize import naturalsize
 from pydantic import ValidationError
 from structlog import get_logger
 
 from ancv import SIPrefix
-from ancv.data.models.github import Gist
+from ancv.data.models.github import File, Gist
 from ancv.data.models.resume import ResumeSchema
-from ancv.exceptions import ResumeLookupError
+from ancv.data.validation import is_malformed_json, parse_resume
+from ancv.exceptions import RateLimitError, ResumeLookupError
 from ancv.timing import Stopwatch
+from ancv.web.cache import ContentCache, GistIndex, ValidatorCache
+from ancv.web.tokens import TokenPool
 
 LOGGER = get_logger()
 
+GISTS_PER_PAGE = 100  # The maximum GitHub allows
+
+LINK = re.compile(r'<(?P<url>[^>]+)>;\s*rel="(?P<rel>\w+)"')
+
+
+class GitHubClient(GitHubAPI):
+    """A `GitHubAPI` keeping track of how its requests fare against its cache.
+
+    `gidgethub` already revalidates cached entries using their ETag and Last-Modified
+    values, but doesn't tell whether that worked out.
+
+    Optionally, requests are spread across a pool of tokens, multiplying the rate limit.
+    """
+
+    def __init__(
+        self,
+        session: ClientSession,
+        requester: str,
+        *,
+        oauth_token: Optional[str] = None,
+        cache: Optional[ValidatorCache] = None,
+        tokens: Optional[TokenPool] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Initializes the client.
+
+        Args:
+            session: The session to send requests with.
+            requester: The user agent to use for requests.
+            oauth_token: The token to authenticate requests with.
+            cache: The cache of validators and bodies to revalidate requests against.
+            tokens: If given and not empty, each request is authenticated with a token
+                picked from this pool instead of `oauth_token`.
+            kwargs: Passed on to `GitHubAPI`.
+        """
+
+        super().__init__(
+            session, requester, oauth_token=oauth_token, cache=cache, **kwargs
+        )
+        self.validator_cache = cache
+        self.tokens = tokens
+        # Only the `next` page is kept by `gidgethub`, including in its cache. Entries
+        # can be evicted while the page is still cached, so are only ever a shortcut.
+        self._last_pages: LRUCache[str, Optional[str]] = LRUCache(maxsize=10_000)
+
+    async def _request(
+        self, method: str, url: str, headers: Mapping[str, str], body: bytes = b""
+    ) -> tuple[int, Mapping[str, str], bytes]:
+        token = None if self.tokens is None else self.tokens.pick()
+        if token is not None:
+            headers = {**headers, "authorization": f"token {token}"}
+
+        status, response_headers, response_body = await super()._request(
+            method, url, headers, body
+        )
+
+        if token is not None and self.tokens is not None:
+            self.tokens.update(token, response_headers)
+
+        if (cache := self.validator_cache) is not None and method == "GET":
+            if "if-none-match" in headers or "if-modified-since" in headers:
+                cache.stats.revalidations += 1
+                if status == HTTPStatus.NOT_MODIFIED:
+                    cache.stats.hits += 1
+            else:
+                cache.stats.misses += 1
+
+        if method == "GET" and status != HTTPStatus.NOT_MODIFIED:
+            # A `304` keeps whatever the cached response said.
+            self._last_pages[url] = parse_link_header(response_headers.get("link")).get(
+                "last"
+            )
+
+        return status, response_headers, response_body
+
+    async def getpages(
+        self, url: str, max_concurrency: int = 4
+    ) -> AsyncGenerator[list[Any], None]:
+        """Yields all pages of items at a paginated endpoint, in order.
+
+        Unlike `getiter`, which walks pages one at a time, this fetches the first page
+        and, once its `Link` header tells the last one, all remaining pages
+        concurrently. Pages still in flight once the caller stops iterating are
+        cancelled.
+
+        A revalidated (`304 Not Modified`) first page only tells the last one if it was
+        remembered from before. Otherwise, pages are walked one at a time after all,
+        following their `next` links.
+
+        Args:
+            url: The URL of the first page.
+            max_concurrency: How many pages to fetch at once at most.
+        """
+
+        first, following, last = await self._getpage(url)
+        yield first
+        if last is None:
+            while following is not None:
+                items, following, _ = await self._getpage(following)
+                yield items
+            return
+
+        parts = urlsplit(last)
+        query = parse_qs(parts.query)
+        urls = [
+            urlunsplit(parts._replace(query=urlencode({**query, "page": page}, True)))
+            for page in range(2, int(query.get("page", ["1"])[0]) + 1)
+        ]
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def fetch(url: str) -> list[Any]:
+            async with semaphore:
+                items, _, _ = await self._getpage(url)
+            return items
+
+        tasks = [asyncio.create_task(fetch(url)) for url in urls]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _getpage(
+        self, url: str
+    ) -> tuple[list[Any], Optional[str], Optional[str]]:
+        """Fetches a single page of items, along with the URLs of the next page and,
+        if known, the last page."""
+
+        items: Any  # Decoded JSON, despite the annotation
+        items, following, _ = await self._make_request(
+            "GET", url, {}, b"", sansio.accept_format()
+        )
+        filled_url = sansio.format_url(url, {}, base_url=self.base_url)
+        return items, following, self._last_pages.get(filled_url)
+
+
+def parse_link_header(header: Optional[str]) -> dict[str, str]:
+    """Parses a `Link` header into a mapping of relation types to URLs.
+
+    See also: https://docs.github.com/en/rest/using-the-rest-api/using-pagination-in-the-rest-api
+    """
+
+    if header is None:
+        return {}
+    return {match["rel"]: match["url"] for match in LINK.finditer(header)}
+
 
 async def get_resume(
     user: str,
@@ -23,6 +181,7 @@ async def get_resume(
     stopwatch: Stopwatch,
     filename: str = "resume.json",
     size_limit: int = 1 * SIPrefix.MEGA,
+    session: Optional[ClientSession] = None,
 ) -> ResumeSchema:
     """Fetch a user's resume from their GitHub gists.
 
@@ -48,68 +207,303 @@ async def get_resume(
         stopwatch: The `Stopwatch` to use for timing.
         filename: The name of the file to look for in the user's gists.
         size_limit: The maximum size of the file to look for in the user's gists.
+        session: The session to download the file's contents with, if needed. A
+            short-lived one is used if not given.
 
     Returns:
         The parsed resume.
     """
 
-    log = LOGGER.bind(user=user)
+    file = await get_resume_file(
+        user=user,
+        github=github,
+        stopwatch=stopwatch,
+        filename=filename,
+        size_limit=size_limit,
+    )
+    if session is not None:
+        return await fetch_resume(
+            file=file, session=session, stopwatch=stopwatch, size_limit=size_limit
+        )
+    async with ClientSession() as session:
+        return await fetch_resume(
+            file=file, session=session, stopwatch=stopwatch, size_limit=size_limit
+        )
+
+
+async def get_resume_file(
+    user: str,
+    github: GitHubAPI,
+    stopwatch: Stopwatch,
+    filename: str = "resume.json",
+    size_limit: int = 1 * SIPrefix.MEGA,
+    index: Optional[GistIndex] = None,
+) -> File:
+    """Find the gist file holding a user's resume, without fetching its contents.
+
+    This is the first half of `get_resume`. Splitting it off allows callers to inspect
+    the file (e.g. its `revision`) and skip downloading and validating contents they
+    already know.
+
+    Args:
+        user: The GitHub username to fetch the resume from.
+        github: The API object to use for the request.
+        stopwatch: The `Stopwatch` to use for timing.
+        filename: The name of the file to look for in the user's gists.
+        size_limit: The maximum size of the file to look for in the user's gists.
+        index: If given, the gist remembered for `user` is tried first, sparing a scan
+            of all their gists. The index is updated with the outcome.
+
+    Returns:
+        The gist file containing the resume.
+    """
+
+    file = await find_resume_file(
+        user=user, github=github, stopwatch=stopwatch, filename=filename, index=index
+    )
+    check_size(file, size_limit=size_limit)
+    return file
+
+
+async def find_resume_file(
+    user: str,
+    github: GitHubAPI,
+    stopwatch: Stopwatch,
+    filename: str = "resume.json",
+    index: Optional[GistIndex] = None,
+) -> File:
+    """Like `get_resume_file`, but without checking the file's size."""
 
     stopwatch("Fetching Gists")
-    gists = github.getiter(f"/users/{user}/gists")
-    while True:
-        try:
-            raw_gist = await anext(gists)
-        except StopAsyncIteration:
-            raise ResumeLookupError(
-                f"No '{filename}' file found in any gist of '{user}'."
-            )
-        except gidgethub.BadRequest as e:
-            # `except `RateLimitExceeded` didn't work, it seems it's not correctly
-            # raised inside `gidgethub`.
-            if e.status_code == HTTPStatus.FORBIDDEN:
-                raise ResumeLookupError(
-                    "Server exhausted its GitHub API rate limit, terribly sorry!"
-                    + " Please try again later."
-                )
-            if e.status_code == HTTPStatus.NOT_FOUND:
-                raise ResumeLookupError(f"User {user} not found.")
-            raise e
-
-        log.info("Got raw gist of user.")
-        gist = Gist(**raw_gist)
-        log = log.bind(gist_url=gist.url)
-        log.info("Parsed gist of user.")
-
-        # https://peps.python.org/pep-0636/#matching-against-constants-and-enums :
-        obj = SimpleNamespace()  # Direct kwargs passing isn't mypy-friendly.
-        obj.filename = filename
-
-        match gist:  # noqa: E999
-            case Gist(files={obj.filename: file}):
-                log.info("Gist matched.")
-                break
-            case _:
-                log.info("Gist unsuitable, trying next.")
+
+    file = None
+    if index is not None and (gist_id := index.get(user)) is not None:
+        file = await get_indexed_file(
+            user=user, gist_id=gist_id, github=github, filename=filename
+        )
+        if file is None:
+            # Possibly evicted meanwhile already:
+            index.pop(user, None)
+
+    if file is None:
+        gist, file = await scan_gists(user=user, github=github, filename=filename)
+        if index is not None:
+            index[user] = gist.id
+
+    return file
+
+
+def check_size(file: File, size_limit: int = 1 * SIPrefix.MEGA) -> None:
+    """Raises a `ResumeLookupError` if `file` is larger than `size_limit` bytes."""
 
     if file.size is None or file.size > size_limit:
         size = "unknown" if file.size is None else str(naturalsize(file.size))
         raise ResumeLookupError(
             f"Resume file too large (limit: {naturalsize(size_limit)}, got {size})."
         )
-    log.info("Fetching resume contents of user.")
-    raw_resume: str = await github.getitem(str(file.raw_url))
-    log.info("Got raw resume of user.")
+
+
+async def scan_gists(user: str, github: GitHubAPI, filename: str) -> tuple[Gist, File]:
+    """Walks all of a user's gists until one contains a file of the given name.
+
+    Args:
+        user: The GitHub username whose gists to scan.
+        github: The API object to use for the request.
+        filename: The name of the file to look for.
+
+    Returns:
+        The first matching gist and the file of the given name in it.
+    """
+
+    log = LOGGER.bind(user=user)
+
+    url = f"/users/{user}/gists?per_page={GISTS_PER_PAGE}"
+    pages: AsyncGenerator[list[Any], None]
+    if isinstance(github, GitHubClient):
+        pages = github.getpages(url)
+    else:
+        pages = _singletons(github.getiter(url))
+
+    async with aclosing(pages):
+        while True:
+            try:
+                page = await anext(pages)
+            except StopAsyncIteration:
+                raise ResumeLookupError(
+                    f"No '{filename}' file found in any gist of '{user}'."
+                )
+            except gidgethub.BadRequest as e:
+                if e.status_code == HTTPStatus.NOT_FOUND:
+                    raise ResumeLookupError(f"User {user} not found.")
+                raise_for_rate_limit(e)
+                raise e
+
+            for raw_gist in page:
+                # Validating a whole gist is expensive (lots of URLs to parse), so only
+                # the matching one is.
+                if filename not in (raw_gist.get("files") or {}):
+                    log.info("Gist unsuitable, trying next.")
+                    continue
+
+                gist = Gist(**raw_gist)
+                log.info("Gist matched.", gist_url=gist.url)
+                return gist, gist.files[filename]
+
+
+async def _singletons(items: AsyncIterator[Any]) -> AsyncGenerator[list[Any], None]:
+    async for item in items:
+        yield [item]
+
+
+async def get_indexed_file(
+    user: str, gist_id: str, github: GitHubAPI, filename: str
+) -> Optional[File]:
+    """Fetches a single, previously remembered gist of a user directly.
+
+    Args:
+        user: The GitHub username the gist is expected to belong to.
+        gist_id: The ID of the gist.
+        github: The API object to use for the request.
+        filename: The name of the file expected in the gist.
+
+    Returns:
+        The file of the given name, or `None` if the gist no longer matches, i.e. it is
+        gone, changed owners or no longer contains such a file.
+    """
+
+    log = LOGGER.bind(user=user, gist_id=gist_id)
+
+    try:
+        raw_gist = await github.getitem(f"/gists/{gist_id}")
+    except gidgethub.BadRequest as e:
+        if e.status_code == HTTPStatus.NOT_FOUND:
+            log.info("Indexed gist is gone.")
+            return None
+        raise_for_rate_limit(e)
+        raise e
+
+    gist = Gist(**raw_gist)
+    owner = gist.owner.login if gist.owner is not None else None
+
+    if owner is None or owner.lower() != user.lower() or filename not in gist.files:
+        log.info("Indexed gist no longer matches.")
+        return None
+
+    log.info("Indexed gist matched.")
+    return gist.files[filename]
+
+
+def raise_for_rate_limit(e: gidgethub.BadRequest) -> None:
+    """Raises a `RateLimitError` if `e` is due to an exhausted rate limit."""
+
+    # `except `RateLimitExceeded` didn't work, it seems it's not correctly raised inside
+    # `gidgethub`.
+    if e.status_code == HTTPStatus.FORBIDDEN:
+        raise RateLimitError(
+            "Server exhausted its GitHub API rate limit, terribly sorry!"
+            + " Please try again later."
+        )
+
+
+async def fetch_resume(
+    file: File,
+    session: ClientSession,
+    stopwatch: Stopwatch,
+    cache: Optional[ContentCache] = None,
+    size_limit: int = 1 * SIPrefix.MEGA,
+) -> ResumeSchema:
+    """Fetch and validate the contents of a gist file as a resume.
+
+    This is the second half of `get_resume`.
+
+    If the file came with its contents inline (as it does from the single gist
+    endpoint) and they're complete, no request is made at all. Otherwise, they're
+    downloaded, aborting once more than `size_limit` bytes arrived: the file's
+    reported size isn't necessarily accurate.
+
+    Args:
+        file: The gist file to fetch, as found by `get_resume_file`.
+        session: The session to download the file's contents with. Raw gist URLs
+            aren't part of the API, so need no GitHub client.
+        stopwatch: The `Stopwatch` to use for timing.
+        cache: If given, files pinned to a revision are looked up in and added to it,
+            such that they are downloaded and validated only once.
+        size_limit: The maximum size of the file to download, in bytes.
+
+    Returns:
+        The parsed resume.
+    """
+
+    log = LOGGER.bind(raw_url=file.raw_url)
+
+    url = str(file.raw_url)
+    if file.revision is None:  # Contents behind the URL might change
+        cache = None
+
+    if cache is not None and (resume := await cache.get(url)) is not None:
+        log.info("Content cache hit.")
+        return resume
+
+    if file.content is not None and not file.truncated:
+        log.info("Using inline resume contents of user.")
+        raw_resume = file.content.encode("utf8")
+    else:
+        log.info("Fetching resume contents of user.")
+        # Raw gist URLs aren't part of the API, so neither need authentication nor
+        # count against the rate limit.
+        raw_resume = await download(session, url, size_limit=size_limit)
+        log.info("Got raw resume of user.")
 
     stopwatch("Validation")
     try:
-        resume = ResumeSchema(**json.loads(raw_resume))
-    except json.decoder.JSONDecodeError:
-        raise ResumeLookupError("Got malformed JSON.")
-    except ValidationError:
+        resume = parse_resume(raw_resume)
+    except ValidationError as e:
+        if is_malformed_json(e):
+            raise ResumeLookupError("Got malformed JSON.")
         raise ResumeLookupError(
             "Got legal JSON but wrong schema (cf. https://jsonresume.org/schema/)"
         )
 
+    if cache is not None:
+        await cache.put(url, raw_resume, resume)
+
     log.info("Successfully parsed raw resume of user, returning.")
     return resume
+
+
+async def download(session: ClientSession, url: str, size_limit: int) -> bytes:
+    """Downloads the body at `url`, streaming it up to a maximum size.
+
+    Args:
+        session: The session to download with.
+        url: The URL to download.
+        size_limit: The maximum size of the body, in bytes. The transfer is aborted
+            once more arrived, or right away if the response announces more.
+
+    Returns:
+        The body.
+
+    Raises:
+        ResumeLookupError: If the body is too large, or gone.
+    """
+
+    def too_large(size: str) -> ResumeLookupError:
+        return ResumeLookupError(
+            f"Resume file too large (limit: {naturalsize(size_limit)}, got {size})."
+        )
+
+    async with session.get(url) as response:
+        if response.status == HTTPStatus.NOT_FOUND:
+            raise ResumeLookupError("Resume file not found.")
+        response.raise_for_status()
+
+        if response.content_length is not None and response.content_length > size_limit:
+            raise too_large(str(naturalsize(response.content_length)))
+
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(64 * SIPrefix.KILO):
+            body += chunk
+            if len(body) > size_limit:
+                raise too_large("more")
+
+    return bytes(body)
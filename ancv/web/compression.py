@@ -0,0 +1,174 @@
+import gzip
+import hashlib
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Optional
+
+from aiohttp import web
+
+# Preferred first, for when a client accepts several equally.
+ENCODINGS: tuple[str, ...] = ("gzip",)
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """Parses an `Accept-Encoding` header into a mapping of codings to their q-values.
+
+    See also: https://developer.mozilla.org/en-US/docs/Web/HTTP/Headers/Accept-Encoding
+    """
+
+    accepted: dict[str, float] = {}
+    for item in header.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        if not coding:
+            continue
+
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.lower()] = q
+    return accepted
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Picks the available content coding best matching an `Accept-Encoding` header.
+
+    Returns:
+        The chosen content coding, or `None` for identity.
+    """
+
+    accepted = parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+
+    best: Optional[str] = None
+    best_q = 0.0
+    for encoding in ENCODINGS:
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def etag(tag: str, encoding: Optional[str]) -> str:
+    """Formats a strong `ETag` for the representation of `tag` in `encoding`.
+
+    Strong validators must differ between content codings, as the bytes do.
+    """
+
+    return f'"{tag}-{encoding}"' if encoding is not None else f'"{tag}"'
+
+
+def not_modified(request: web.Request, tag: str) -> Optional[web.Response]:
+    """Returns a `304 Not Modified` response if `request` already has `tag`'s content.
+
+    Only needs the tag, not the content itself, so callers can check before doing any
+    work to produce the content.
+
+    Args:
+        request: The request, possibly carrying `If-None-Match`.
+        tag: Identifies the content that would be served (without content coding).
+
+    Returns:
+        The `304` response, or `None` if the content needs to be served in full.
+    """
+
+    if (header := request.headers.get("If-None-Match")) is None:
+        return None
+
+    current = etag(tag, negotiate(request.headers.get("Accept-Encoding", "")))
+
+    # `If-None-Match` uses weak comparison:
+    # https://www.rfc-editor.org/rfc/rfc9110#section-13.1.2
+    candidates = {
+        candidate.strip().removeprefix("W/") for candidate in header.split(",")
+    }
+    if "*" not in candidates and current not in candidates:
+        return None
+
+    return web.Response(
+        status=HTTPStatus.NOT_MODIFIED,
+        headers={"ETag": current, "Vary": "Accept-Encoding"},
+    )
+
+
+@dataclass(frozen=True)
+class Variants:
+    """A rendered resume, along with precompressed variants of it.
+
+    Compressing once when rendering (or at startup, for static content) means serving a
+    compressed response costs no CPU per request. Rendered resumes are highly
+    repetitive ANSI text, so they compress very well.
+
+    The `tag` identifies the content for `ETag`s; by default, it's a hash of it.
+    """
+
+    text: str
+    tag: str
+    identity: bytes = field(repr=False)
+    encoded: dict[str, bytes] = field(repr=False)
+
+    @classmethod
+    def of(cls, text: str, tag: Optional[str] = None) -> "Variants":
+        """Encodes `text` and compresses it with all available encodings.
+
+        Args:
+            text: The content.
+            tag: Identifies the content, defaulting to a hash of it.
+
+        Returns:
+            The content in all its variants.
+        """
+
+        identity = text.encode("utf-8")
+        encoded = {"gzip": gzip.compress(identity, mtime=0)}
+        if tag is None:
+            tag = hashlib.sha256(identity).hexdigest()[:32]
+        return cls(text=text, tag=tag, identity=identity, encoded=encoded)
+
+    @property
+    def size(self) -> int:
+        """The total size of all variants, in bytes."""
+
+        return len(self.identity) + sum(len(body) for body in self.encoded.values())
+
+    def negotiate(self, accept_encoding: str) -> tuple[Optional[str], bytes]:
+        """Picks the variant best matching an `Accept-Encoding` header.
+
+        Returns:
+            The chosen content coding (`None` for identity) and the corresponding body.
+        """
+
+        encoding = negotiate(accept_encoding)
+        if encoding is None:
+            return None, self.identity
+        return encoding, self.encoded[encoding]
+
+    def respond(self, request: web.Request) -> web.Response:
+        """Creates a response with the variant best suiting `request`.
+
+        If the request already has that variant (as per `If-None-Match`), the response
+        is a bodiless `304 Not Modified` instead.
+
+        Args:
+            request: The request to respond to.
+
+        Returns:
+            The response, with `Content-Encoding`, `ETag` and `Vary` headers set
+            accordingly.
+        """
+
+        if (response := not_modified(request, self.tag)) is not None:
+            return response
+
+        encoding, body = self.negotiate(request.headers.get("Accept-Encoding", ""))
+
+        response = web.Response(body=body, content_type="text/plain", charset="utf-8")
+        response.headers["ETag"] = etag(self.tag, encoding)
+        response.headers["Vary"] = "Accept-Encoding"
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+        return response
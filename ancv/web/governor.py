@@ -0,0 +1,186 @@
+import asyncio
+import math
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from enum import StrEnum
+from typing import Any, NamedTuple, NoReturn, Optional
+
+from structlog import get_logger
+
+LOGGER = get_logger()
+
+
+class Quota(NamedTuple):
+    """A snapshot of the GitHub API rate limit budget."""
+
+    remaining: int
+    limit: int
+    reset: float  # Epoch seconds at which `remaining` goes back up
+
+
+class GovernorMode(StrEnum):
+    NORMAL = "normal"
+    QUEUEING = "queueing"  # Cold lookups are queued, warm ones proceed
+    CACHE_ONLY = "cache-only"  # No lookups at all, only cached renders are served
+
+
+class QuotaExhaustedError(RuntimeError):
+    """Raised when a lookup is refused to save what's left of the rate limit."""
+
+    def __init__(self, message: str, retry_after: int) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after  # Seconds
+
+
+@dataclass
+class GovernorStats:
+    """Counters of a `Governor`."""
+
+    admitted: int = 0
+    queued: int = 0  # Cold lookups that had to wait
+    rejected: int = 0
+
+
+class Governor:
+    """Rations the GitHub API rate limit as it runs low.
+
+    Lookups of *warm* users (those with a render already cached) are the cheapest to
+    serve and the most likely to be requested again, while *cold* ones (e.g. random or
+    mistyped usernames) can burn through the budget quickly. So depending on the share
+    of the budget remaining, the governor is in one of these modes:
+
+    - `NORMAL`: all lookups proceed.
+    - `QUEUEING`: warm lookups proceed, cold ones queue up for a few slots. Once the
+        queue is full too, they're refused.
+    - `CACHE_ONLY`: all lookups are refused; callers are expected to serve whatever they
+        have cached instead, regardless of its age.
+
+    Once the budget resets, the governor goes back to normal without waiting for the
+    next response to report it.
+    """
+
+    def __init__(
+        self,
+        queue_below: float = 0.2,
+        cache_only_below: float = 0.02,
+        max_concurrent_cold: int = 2,
+        max_queued: int = 32,
+    ) -> None:
+        """Initializes the governor.
+
+        Args:
+            queue_below: The share of the budget below which cold lookups are queued.
+            cache_only_below: The share of the budget below which no lookups are made.
+            max_concurrent_cold: How many cold lookups may run at once when queueing.
+            max_queued: How many cold lookups may wait when queueing, beyond which they
+                are refused.
+        """
+
+        if cache_only_below > queue_below:
+            raise ValueError(
+                f"Cache-only threshold ({cache_only_below}) must not be above"
+                + f" queueing threshold ({queue_below})."
+            )
+
+        self.queue_below = queue_below
+        self.cache_only_below = cache_only_below
+        self.max_queued = max_queued
+        self.quota: Callable[[], Optional[Quota]] = lambda: None
+        self.stats = GovernorStats()
+        self._cold = asyncio.Semaphore(max_concurrent_cold)
+        self._waiting = 0
+
+    @property
+    def mode(self) -> GovernorMode:
+        """The current mode, as per the current quota."""
+
+        quota = self.quota()
+        if quota is None or quota.limit <= 0 or quota.reset <= time.time():
+            return GovernorMode.NORMAL
+
+        share = quota.remaining / quota.limit
+        if share < self.cache_only_below:
+            return GovernorMode.CACHE_ONLY
+        if share < self.queue_below:
+            return GovernorMode.QUEUEING
+        return GovernorMode.NORMAL
+
+    def retry_after(self) -> int:
+        """Seconds until the budget resets, at least one."""
+
+        quota = self.quota()
+        if quota is None:
+            return 1
+        return max(1, math.ceil(quota.reset - time.time()))
+
+    @asynccontextmanager
+    async def admit(self, warm: bool) -> AsyncIterator[None]:
+        """Admits a lookup, possibly after queueing it.
+
+        Args:
+            warm: Whether the user looked up has a render cached already.
+
+        Raises:
+            QuotaExhaustedError: If the lookup is refused.
+        """
+
+        match self.mode:
+            case GovernorMode.NORMAL:
+                self.stats.admitted += 1
+                yield
+            case GovernorMode.QUEUEING if warm:
+                self.stats.admitted += 1
+                yield
+            case GovernorMode.QUEUEING:
+                if self._waiting >= self.max_queued:
+                    self._reject("Too many lookups queued")
+
+                self.stats.queued += 1
+                self._waiting += 1
+                try:
+                    await self._cold.acquire()
+                finally:
+                    self._waiting -= 1
+
+                try:
+                    self.stats.admitted += 1
+                    yield
+                finally:
+                    self._cold.release()
+            case GovernorMode.CACHE_ONLY:
+                self._reject("Serving cached resumes only")
+
+    def _reject(self, reason: str) -> NoReturn:
+        self.stats.rejected += 1
+        retry_after = self.retry_after()
+        LOGGER.warning("Refusing lookup.", reason=reason, retry_after=retry_after)
+        raise QuotaExhaustedError(
+            f"{reason}, the server is running low on its GitHub API rate limit."
+            + f" Please try again in {retry_after} seconds.",
+            retry_after=retry_after,
+        )
+
+    def status(self) -> dict[str, Any]:
+        """The current state, JSON-serializable."""
+
+        quota = self.quota()
+        return {
+            "mode": self.mode,
+            "quota": None
+            if quota is None
+            else {
+                "remaining": quota.remaining,
+                "limit": quota.limit,
+                "reset": datetime.fromtimestamp(quota.reset, timezone.utc).isoformat(),
+            },
+            "thresholds": {
+                "queue_below": self.queue_below,
+                "cache_only_below": self.cache_only_below,
+            },
+            "queued": self._waiting,
+            "admitted": self.stats.admitted,
+            "rejected": self.stats.rejected,
+        }
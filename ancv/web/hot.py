@@ -0,0 +1,211 @@
+"""Keeping the resumes of the most requested users warm."""
+
+import asyncio
+import heapq
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from datetime import timedelta
+from operator import itemgetter
+from typing import Generic, Optional, TypeVar
+
+from structlog import get_logger
+
+from ancv.web.governor import Quota
+
+LOGGER = get_logger()
+
+K = TypeVar("K", bound=Hashable)
+
+
+class SpaceSaving(Generic[K]):
+    """Approximately counts the most frequent items of a stream, in bounded memory.
+
+    At most `capacity` items are counted. A new item replaces the one with the lowest
+    count, inheriting (an overestimate of) its count. Items more frequent than
+    `1 / capacity` of the stream are guaranteed to be counted, and counts overestimate
+    by at most the inherited amount.
+
+    Counts can be decayed, such that items which used to be popular but no longer are
+    make room for those that are now.
+
+    See also: Metwally et al., "Efficient Computation of Frequent and Top-k Elements in
+    Data Streams" (2005).
+    """
+
+    def __init__(self, capacity: int = 1_000) -> None:
+        """Initializes an empty counter.
+
+        Args:
+            capacity: The maximum number of items to count.
+        """
+
+        if capacity < 1:
+            raise ValueError(f"Capacity must be positive, got {capacity}.")
+
+        self.capacity = capacity
+        self._counts: dict[K, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __contains__(self, item: K) -> bool:
+        return item in self._counts
+
+    def add(self, item: K) -> None:
+        """Counts one occurrence of `item`.
+
+        Replacing an item takes time linear in `capacity`, everything else is constant.
+        """
+
+        if item in self._counts:
+            self._counts[item] += 1
+            return
+
+        floor = 0.0
+        if len(self._counts) >= self.capacity:
+            victim = min(self._counts, key=self._counts.__getitem__)
+            floor = self._counts.pop(victim)
+        self._counts[item] = floor + 1
+
+    def top(self, k: int) -> list[tuple[K, float]]:
+        """The `k` items with the highest counts, highest first."""
+
+        return heapq.nlargest(k, self._counts.items(), key=itemgetter(1))
+
+    def decay(self, factor: float = 0.5) -> None:
+        """Multiplies all counts by `factor`, forgetting items whose count drops below
+        one."""
+
+        self._counts = {
+            item: count * factor
+            for item, count in self._counts.items()
+            if count * factor >= 1
+        }
+
+
+@dataclass
+class RefreshStats:
+    """Counters of a `RefreshScheduler`."""
+
+    scans: int = 0
+    refreshed: int = 0
+    failed: int = 0
+
+
+class RefreshScheduler(Generic[K]):
+    """Refreshes the most requested users before their cached renders go stale.
+
+    Requests are tracked in a `SpaceSaving` counter. Every `interval`, the top `top_k`
+    users are checked, refreshing those `due`. Refreshes are spaced out such that
+    together, they spend no more than `budget_share` of the remaining rate limit until
+    it resets, but are never closer than `min_spacing`.
+
+    Counts are halved every `half_life`, so the top users follow shifts in popularity.
+    """
+
+    def __init__(
+        self,
+        due: Callable[[K], bool],
+        refresh: Callable[[K], Awaitable[None]],
+        quota: Callable[[], Optional[Quota]] = lambda: None,
+        top_k: int = 50,
+        capacity: int = 1_000,
+        interval: timedelta = timedelta(seconds=10),
+        min_spacing: timedelta = timedelta(seconds=1),
+        budget_share: float = 0.1,
+        half_life: timedelta = timedelta(minutes=10),
+    ) -> None:
+        """Initializes the scheduler.
+
+        Args:
+            due: Returns whether a user needs refreshing now.
+            refresh: Refreshes a user. Failures are logged, and don't stop the scan.
+            quota: Returns the current rate limit budget, if known.
+            top_k: How many of the most requested users to keep warm.
+            capacity: How many users to track requests of, see `SpaceSaving`.
+            interval: How long to wait between checks of the top users.
+            min_spacing: The minimum time between two refreshes.
+            budget_share: The share of the remaining rate limit refreshes may spend.
+            half_life: How often to halve request counts.
+        """
+
+        self.due = due
+        self.refresh = refresh
+        self.quota = quota
+        self.top_k = top_k
+        self.interval = interval
+        self.min_spacing = min_spacing
+        self.budget_share = budget_share
+        self.half_life = half_life
+        self.requests: SpaceSaving[K] = SpaceSaving(capacity)
+        self.stats = RefreshStats()
+        self._next_refresh = 0.0  # As returned by `time.monotonic()`
+
+    def record(self, user: K) -> None:
+        """Records a request for `user`."""
+
+        self.requests.add(user)
+
+    def spacing(self) -> float:
+        """Seconds to wait after a refresh, as per the current budget."""
+
+        spacing = self.min_spacing.total_seconds()
+
+        quota = self.quota()
+        if quota is None:
+            return spacing
+
+        window = quota.reset - time.time()
+        if window <= 0:
+            return spacing
+
+        allowance = quota.remaining * self.budget_share
+        if allowance < 1:
+            return max(spacing, window)
+        return max(spacing, window / allowance)
+
+    async def scan(self) -> int:
+        """Refreshes those of the top users that are due, spacing refreshes out (also
+        across scans).
+
+        Returns:
+            The number of users refreshed.
+        """
+
+        self.stats.scans += 1
+        refreshed = 0
+        for user, _ in self.requests.top(self.top_k):
+            if not self.due(user):
+                continue
+            if (wait := self._next_refresh - time.monotonic()) > 0:
+                await asyncio.sleep(wait)
+                if not self.due(user):  # E.g. refreshed by a request meanwhile
+                    continue
+
+            LOGGER.debug("Refreshing hot user.", user=user)
+            try:
+                await self.refresh(user)
+            except Exception as e:
+                self.stats.failed += 1
+                LOGGER.warning("Failed to refresh hot user.", user=user, error=str(e))
+            else:
+                refreshed += 1
+                self.stats.refreshed += 1
+            # Failed refreshes may have spent the budget all the same:
+            self._next_refresh = time.monotonic() + self.spacing()
+
+        return refreshed
+
+    async def run(self) -> None:
+        """Scans every `interval` until cancelled."""
+
+        decayed = time.monotonic()
+        while True:
+            await self.scan()
+
+            if time.monotonic() - decayed >= self.half_life.total_seconds():
+                self.requests.decay()
+                decayed = time.monotonic()
+
+            await asyncio.sleep(self.interval.total_seconds())
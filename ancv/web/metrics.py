@@ -0,0 +1,239 @@
+"""Server metrics, exposed in the Prometheus text format.
+
+See also: https://prometheus.io/docs/instrumenting/exposition_formats/#text-based-format
+"""
+
+import bisect
+from collections import Counter
+from collections.abc import Awaitable, Callable, Iterator, Mapping, Sequence
+from datetime import timedelta
+from typing import Optional, Union
+
+from aiohttp import web
+
+# Seconds; spans cache hits (sub-millisecond) to slow GitHub lookups and big renders.
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Labels = Mapping[str, str]
+# A plain value, one per label value, or `None` if currently unknown:
+GaugeValue = Optional[Union[float, Mapping[str, float]]]
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+
+    def escape(value: str) -> str:
+        return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    """Counts observations into cumulative buckets, as Prometheus histograms do."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        """Initializes an empty histogram.
+
+        Args:
+            buckets: The (inclusive) upper bounds of the buckets, in ascending order. A
+                bucket for infinity is added implicitly.
+        """
+
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # Last one is `+Inf`
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Records a single observation."""
+
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name: str, labels: Labels) -> Iterator[str]:
+        """Yields the histogram's sample lines in the text format."""
+
+        cumulative = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            cumulative += count
+            bucket_labels = {**labels, "le": _format_value(bound)}
+            yield f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}"
+        yield f"{name}_sum{_format_labels(labels)} {_format_value(self.sum)}"
+        yield f"{name}_count{_format_labels(labels)} {self.count}"
+
+
+class Metrics:
+    """Collects the metrics of a server.
+
+    Request-scoped metrics (counts, in-flight requests, segment timings) are recorded
+    as they happen. Everything else is registered as a gauge or counter, a callback read
+    only when metrics are scraped, such that e.g. caches don't need to know about
+    metrics.
+    """
+
+    def __init__(self, prefix: str = "ancv") -> None:
+        """Initializes empty metrics.
+
+        Args:
+            prefix: Prepended to all metric names.
+        """
+
+        self.prefix = prefix
+        self.segments: dict[str, Histogram] = {}
+        self.requests: Counter[int] = Counter()  # By status code
+        self.in_flight = 0
+        # By name: kind, help, label and callback.
+        self._collected: dict[str, tuple[str, str, str, Callable[[], GaugeValue]]] = {}
+        self._histograms: dict[str, tuple[str, Histogram]] = {}  # By name: help
+
+    def observe(self, timings: Mapping[str, timedelta]) -> None:
+        """Records the durations of a request's segments, as timed by a `Stopwatch`."""
+
+        for segment, duration in timings.items():
+            histogram = self.segments.setdefault(segment, Histogram())
+            histogram.observe(duration.total_seconds())
+
+    def gauge(
+        self, name: str, help: str, value: Callable[[], GaugeValue], label: str = ""
+    ) -> None:
+        """Registers a gauge, read whenever metrics are exposed.
+
+        Args:
+            name: The name of the gauge, without prefix.
+            help: A description of the gauge.
+            value: Returns the current value. If it returns a mapping, there's one
+                sample per item, with `label` set to the item's key. If it returns
+                `None`, there's no sample.
+            label: The name of the label distinguishing samples, for mappings.
+        """
+
+        self._collected[name] = ("gauge", help, label, value)
+
+    def counter(
+        self, name: str, help: str, value: Callable[[], GaugeValue], label: str = ""
+    ) -> None:
+        """Registers a counter, read whenever metrics are exposed.
+
+        Like `gauge`, but `value` must only ever go up. By convention, `name` should
+        end in `_total`.
+        """
+
+        self._collected[name] = ("counter", help, label, value)
+
+    def histogram(
+        self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Registers a histogram, returning it to record observations with.
+
+        Args:
+            name: The name of the histogram, without prefix.
+            help: A description of the histogram.
+            buckets: See `Histogram`.
+        """
+
+        histogram = Histogram(buckets)
+        self._histograms[name] = (help, histogram)
+        return histogram
+
+    @web.middleware
+    async def middleware(
+        self,
+        request: web.Request,
+        handler: Callable[[web.Request], Awaitable[web.StreamResponse]],
+    ) -> web.StreamResponse:
+        """Counts requests by status, and those currently in flight."""
+
+        self.in_flight += 1
+        try:
+            response = await handler(request)
+        except web.HTTPException as e:
+            self.requests[e.status] += 1
+            raise
+        except Exception:
+            self.requests[500] += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        self.requests[response.status] += 1
+        return response
+
+    def expose(self) -> str:
+        """Renders all metrics in the Prometheus text format."""
+
+        lines: list[str] = []
+
+        def header(name: str, kind: str, help: str) -> str:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            return name
+
+        name = header(
+            f"{self.prefix}_requests_total", "counter", "Requests handled, by status."
+        )
+        for status, count in sorted(self.requests.items()):
+            lines.append(f"{name}{_format_labels({'status': str(status)})} {count}")
+
+        name = header(
+            f"{self.prefix}_requests_in_flight", "gauge", "Requests being handled."
+        )
+        lines.append(f"{name} {self.in_flight}")
+
+        name = header(
+            f"{self.prefix}_segment_duration_seconds",
+            "histogram",
+            "Time spent in each segment of handling a request.",
+        )
+        for segment, histogram in self.segments.items():
+            lines.extend(histogram.samples(name, {"segment": segment}))
+
+        for metric, (kind, help, label, value) in self._collected.items():
+            name = header(f"{self.prefix}_{metric}", kind, help)
+            match value():
+                case None:
+                    pass
+                case Mapping() as values:
+                    for key, v in values.items():
+                        labels = _format_labels({label: key})
+                        lines.append(f"{name}{labels} {_format_value(v)}")
+                case v:
+                    lines.append(f"{name} {_format_value(v)}")
+
+        for metric, (help, histogram) in self._histograms.items():
+            name = header(f"{self.prefix}_{metric}", "histogram", help)
+            lines.extend(histogram.samples(name, {}))
+
+        return "\n".join(lines) + "\n"
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """An endpoint serving the metrics, e.g. at `/-/metrics`."""
+
+        return web.Response(
+            body=self.expose().encode("utf-8"),
+            headers={
+                "Content-Type": "text/plain; version=0.0.4; charset=utf-8",
+                "Cache-Control": "no-store",
+            },
+        )
@@ -0,0 +1,203 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+from enum import StrEnum
+from typing import Optional
+
+from structlog import get_logger
+
+from ancv.data.models.resume import ResumeSchema
+from ancv.visualization.templates import Template
+
+LOGGER = get_logger()
+
+
+class PoolKind(StrEnum):
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+class RenderPoolFullError(RuntimeError):
+    """Raised when a render is submitted to a pool whose queue is full."""
+
+    pass
+
+
+@dataclass
+class RenderPoolStats:
+    """Counters of a `RenderPool`."""
+
+    pending: int = 0  # Submitted, but not yet finished
+    completed: int = 0
+    rejected: int = 0
+    wait: timedelta = field(default_factory=timedelta)  # Total time spent queued
+
+    @property
+    def mean_wait(self) -> timedelta:
+        """The mean time completed renders spent queued before starting."""
+
+        return self.wait / self.completed if self.completed else timedelta()
+
+
+def render_resume(resume: ResumeSchema) -> tuple[float, str]:
+    """Renders a resume, returning when rendering started along with the result.
+
+    Module-level such that process pools can pickle it. The start time is taken from
+    `time.monotonic`, which is system-wide and hence comparable across processes.
+    """
+
+    started = time.monotonic()
+    return started, Template.from_model_config(resume).render()
+
+
+class RenderPool:
+    """Runs `Template.render` off the event loop, in a pool of threads or processes.
+
+    Rendering a large resume takes long enough to stall every other connection if done
+    on the event loop. In the pool, slow renders only delay their own request.
+
+    The number of renders submitted but not yet finished is bounded: beyond
+    `max_pending`, submissions fail fast with `RenderPoolFullError` instead of queueing
+    up without limit.
+    """
+
+    def __init__(
+        self,
+        kind: PoolKind = PoolKind.THREAD,
+        max_workers: Optional[int] = None,
+        max_pending: int = 64,
+    ) -> None:
+        """Initializes the pool. Workers are only started once first needed.
+
+        Args:
+            kind: Whether to render in threads or processes. Processes sidestep the GIL,
+                but need to pickle resumes and results back and forth.
+            max_workers: The number of workers, `None` for the executor's default.
+            max_pending: The maximum number of renders submitted but not yet finished.
+        """
+
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.stats = RenderPoolStats()
+        # Called with the time each completed render spent queued, e.g. to record it in
+        # a histogram:
+        self.on_wait: Callable[[timedelta], None] = lambda wait: None
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        """The underlying executor, created on first access."""
+
+        if self._executor is None:
+            LOGGER.debug("Starting render pool.", kind=self.kind)
+            match self.kind:
+                case PoolKind.THREAD:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="render"
+                    )
+                case PoolKind.PROCESS:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def render(self, resume: ResumeSchema) -> str:
+        """Renders `resume` in the pool.
+
+        Args:
+            resume: The resume to render, using its own template config.
+
+        Returns:
+            The rendered resume.
+
+        Raises:
+            RenderPoolFullError: If `max_pending` renders are already pending.
+            ResumeConfigError: If the resume's template config is invalid.
+        """
+
+        self._check_capacity()
+
+        submitted = time.monotonic()
+        self.stats.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            started, rendered = await loop.run_in_executor(
+                self.executor, render_resume, resume
+            )
+        finally:
+            self.stats.pending -= 1
+
+        self._completed(wait=started - submitted)
+        return rendered
+
+    async def render_sections(self, resume: ResumeSchema) -> AsyncIterator[str]:
+        """Renders `resume` in the pool, yielding sections as soon as each is done.
+
+        See `Template.render_sections`. Process pools can't hand back sections one by
+        one, so they yield the entire render as a single section.
+
+        Args:
+            resume: The resume to render, using its own template config.
+
+        Yields:
+            The rendered sections, in order.
+
+        Raises:
+            RenderPoolFullError: If `max_pending` renders are already pending.
+            ResumeConfigError: If the resume's template config is invalid.
+        """
+
+        if self.kind is not PoolKind.THREAD:
+            yield await self.render(resume)
+            return
+
+        self._check_capacity()
+
+        submitted = time.monotonic()
+        started: Optional[float] = None
+        self.stats.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            sections: Iterator[str] = iter(())
+
+            def step() -> Optional[str]:
+                nonlocal started, sections
+                if started is None:
+                    started = time.monotonic()
+                    sections = Template.from_model_config(resume).render_sections()
+                return next(sections, None)
+
+            while (
+                section := await loop.run_in_executor(self.executor, step)
+            ) is not None:
+                yield section
+        finally:
+            self.stats.pending -= 1
+
+        self._completed(wait=(started or submitted) - submitted)
+
+    def _completed(self, wait: float) -> None:
+        waited = timedelta(seconds=max(0.0, wait))
+        self.stats.completed += 1
+        self.stats.wait += waited
+        self.on_wait(waited)
+
+    def _check_capacity(self) -> None:
+        if self.stats.pending >= self.max_pending:
+            self.stats.rejected += 1
+            raise RenderPoolFullError(
+                f"Too many pending renders ({self.stats.pending}), try again later."
+            )
+
+    def shutdown(self) -> None:
+        """Shuts the workers down, cancelling queued renders.
+
+        The pool can be used again afterwards, starting new workers.
+        """
+
+        if self._executor is not None:
+            LOGGER.debug("Shutting down render pool.", kind=self.kind)
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
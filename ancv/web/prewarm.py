@@ -0,0 +1,104 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from structlog import get_logger
+
+from ancv.data.validation import is_valid_github_username
+
+LOGGER = get_logger()
+
+
+def parse_usernames(lines: Iterable[str]) -> list[str]:
+    """Parses usernames, one per line (or comma-separated), ignoring `#` comments.
+
+    Invalid usernames are skipped with a warning, duplicates are dropped.
+    """
+
+    users: dict[str, None] = {}
+    for line in lines:
+        for user in line.partition("#")[0].split(","):
+            if not (user := user.strip()):
+                continue
+            if not is_valid_github_username(user):
+                LOGGER.warning("Skipping invalid username to prewarm.", user=user)
+                continue
+            users[user] = None
+    return list(users)
+
+
+def read_usernames(path: Path) -> list[str]:
+    """Reads usernames from a file, see `parse_usernames`."""
+
+    with open(path, encoding="utf8") as f:
+        return parse_usernames(f)
+
+
+@dataclass
+class PrewarmStats:
+    """Counters of a `Prewarmer`."""
+
+    warmed: int = 0
+    failed: int = 0
+
+
+class Prewarmer:
+    """Warms the caches for a list of users, e.g. the most popular ones, at startup.
+
+    Otherwise, the first requests for them after every deploy pay for a cold lookup and
+    render. Users are warmed concurrently, but only so many at once, to neither hog the
+    GitHub rate limit nor the render pool.
+    """
+
+    def __init__(self, users: Iterable[str], max_concurrency: int = 4) -> None:
+        """Initializes the prewarmer.
+
+        Args:
+            users: The users to warm, in order of priority. Duplicates are ignored.
+            max_concurrency: How many users to warm at once.
+        """
+
+        self.users = list(dict.fromkeys(users))
+        self.max_concurrency = max_concurrency
+        self.stats = PrewarmStats()
+        self.done = asyncio.Event()
+        if not self.users:
+            self.done.set()
+
+    async def run(self, warm: Callable[[str], Awaitable[Any]]) -> None:
+        """Warms all users, logging instead of raising failures.
+
+        Args:
+            warm: Looks up and renders a user.
+        """
+
+        slots = asyncio.Semaphore(self.max_concurrency)
+
+        async def one(user: str) -> None:
+            async with slots:
+                try:
+                    await warm(user)
+                except Exception as e:
+                    self.stats.failed += 1
+                    LOGGER.warning("Failed to prewarm user.", user=user, error=str(e))
+                else:
+                    self.stats.warmed += 1
+
+        LOGGER.info("Prewarming.", users=len(self.users))
+        try:
+            await asyncio.gather(*(one(user) for user in self.users))
+        finally:
+            self.done.set()
+        LOGGER.info("Prewarming done.", warmed=self.stats.warmed)
+
+    def status(self) -> dict[str, Any]:
+        """The current state, JSON-serializable."""
+
+        return {
+            "done": self.done.is_set(),
+            "users": len(self.users),
+            "warmed": self.stats.warmed,
+            "failed": self.stats.failed,
+        }
@@ -0,0 +1,167 @@
+import math
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Optional
+
+from aiohttp import web
+from cachetools import TTLCache
+from structlog import get_logger
+
+LOGGER = get_logger()
+
+
+@dataclass
+class Bucket:
+    """A client's token bucket."""
+
+    tokens: float
+    updated: float  # As returned by `time.monotonic()`
+
+
+@dataclass
+class RateLimiterStats:
+    """Counters of a `RateLimiter`."""
+
+    allowed: int = 0
+    limited: int = 0
+    exempt: int = 0
+
+
+def client_address(request: web.Request, trusted_proxies: int = 0) -> Optional[str]:
+    """Determines the address of the client that sent `request`.
+
+    Each proxy appends the address it received a request from to `X-Forwarded-For`, so
+    counting `trusted_proxies` entries from the right gives the address the outermost
+    trusted proxy saw. Entries further left are up to the client and hence can't be
+    trusted.
+
+    Args:
+        request: The request to determine the client of.
+        trusted_proxies: How many proxies are in front of the server. With none,
+            `X-Forwarded-For` is ignored.
+
+    Returns:
+        The client's address, `None` if unknown.
+    """
+
+    if trusted_proxies <= 0:
+        return request.remote
+
+    forwarded = [
+        address.strip()
+        for header in request.headers.getall("X-Forwarded-For", [])
+        for address in header.split(",")
+        if address.strip()
+    ]
+    if not forwarded:
+        return request.remote
+
+    # With fewer entries than proxies, the outermost one is the best guess.
+    return forwarded[-min(trusted_proxies, len(forwarded))]
+
+
+class RateLimiter:
+    """Limits the rate of requests per client, as a token bucket each.
+
+    Every client may make `burst` requests right away, after which it gets `rate` more
+    per second. Requests beyond that are refused with `429 Too Many Requests`, before
+    any work is done for them.
+
+    Buckets of clients idle long enough to have refilled completely are dropped, as
+    they'd be recreated in the same state. Beyond that, at most `max_clients` buckets
+    are kept, dropping the least recently used first.
+
+    Requests for which `exempt` returns `True` (e.g. cheap ones) neither need nor take a
+    token.
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        burst: int = 20,
+        max_clients: int = 100_000,
+        trusted_proxies: int = 0,
+        exempt: Callable[[web.Request], bool] = lambda request: False,
+    ) -> None:
+        """Initializes the rate limiter.
+
+        Args:
+            rate: The number of requests per second a client gets back.
+            burst: The number of requests a client may make at once.
+            max_clients: The maximum number of clients to keep buckets for.
+            trusted_proxies: How many proxies are in front of the server, see
+                `client_address`.
+            exempt: Returns whether a request is exempt from rate limiting.
+        """
+
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"Rate ({rate}) and burst ({burst}) must be positive.")
+
+        self.rate = rate
+        self.burst = burst
+        self.trusted_proxies = trusted_proxies
+        self.exempt = exempt
+        self.stats = RateLimiterStats()
+        self._buckets: TTLCache[str, Bucket] = TTLCache(
+            maxsize=max_clients,
+            ttl=burst / rate,  # Refilled completely by then
+            timer=time.monotonic,
+        )
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, client: str) -> float:
+        """Takes a token from the bucket of `client`, if there's one.
+
+        Returns:
+            `0` if a token was taken, otherwise the number of seconds until there's one.
+        """
+
+        now = time.monotonic()
+        bucket = self._buckets.get(client) or Bucket(tokens=self.burst, updated=now)
+
+        bucket.tokens = min(
+            self.burst, bucket.tokens + (now - bucket.updated) * self.rate
+        )
+        bucket.updated = now
+
+        wait = 0.0
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+        else:
+            wait = (1 - bucket.tokens) / self.rate
+
+        self._buckets[client] = bucket  # (Re)starts the idle timer
+        return wait
+
+    @web.middleware
+    async def middleware(
+        self,
+        request: web.Request,
+        handler: Callable[[web.Request], Awaitable[web.StreamResponse]],
+    ) -> web.StreamResponse:
+        """Refuses requests of clients that ran out of tokens."""
+
+        if self.exempt(request):
+            self.stats.exempt += 1
+            return await handler(request)
+
+        client = client_address(request, self.trusted_proxies)
+        if client is None:  # E.g. UNIX sockets without a proxy, nothing to go by
+            self.stats.allowed += 1
+            return await handler(request)
+
+        if (wait := self.acquire(client)) > 0:
+            self.stats.limited += 1
+            LOGGER.warning("Rate limiting client.", client=client, path=request.path)
+            return web.Response(
+                text="Too many requests, please slow down.\n",
+                status=HTTPStatus.TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+
+        self.stats.allowed += 1
+        return await handler(request)
@@ -1,3 +1,5 @@
+import asyncio
+import hashlib
 import json
 import time
 from abc import ABC, abstractmethod
@@ -6,20 +8,46 @@ from datetime import timedelta
 from http import HTTPStatus
 from pathlib import Path
 from pydantic import ValidationError
-from typing import AsyncGenerator, Optional
+from typing import AsyncGenerator, Awaitable, Callable, Optional, Sequence, Union
 
 from aiohttp import ClientSession, ClientError, web
-from cachetools import TTLCache
+from cachetools import LRUCache
 from gidgethub.aiohttp import GitHubAPI
 from structlog import get_logger
 
-from ancv import PROJECT_ROOT
+from ancv import PROJECT_ROOT, SIPrefix
+from ancv.data.models.github import File
 from ancv.data.models.resume import ResumeSchema
-from ancv.data.validation import is_valid_github_username
-from ancv.exceptions import ResumeConfigError, ResumeLookupError
+from ancv.data.validation import (
+    is_malformed_json,
+    is_valid_github_username,
+    parse_resume,
+)
+from ancv.exceptions import RateLimitError, ResumeConfigError, ResumeLookupError
 from ancv.timing import Stopwatch
 from ancv.visualization.templates import Template
-from ancv.web.client import get_resume
+from ancv.web.admission import Admission
+from ancv.web.backends import BackendError, CacheBackend
+from ancv.web.cache import (
+    ContentCache,
+    GistIndex,
+    NegativeCache,
+    RenderCache,
+    RenderKey,
+    Snapshot,
+    ValidatorCache,
+)
+from ancv.web.client import GitHubClient, check_size, fetch_resume, find_resume_file
+from ancv.web.compression import Variants, negotiate, not_modified
+from ancv.web.governor import Governor, GovernorMode, Quota, QuotaExhaustedError
+from ancv.web.hot import RefreshScheduler
+from ancv.web.metrics import Metrics
+from ancv.web.pool import RenderPool, RenderPoolFullError
+from ancv.web.prewarm import Prewarmer
+from ancv.web.ratelimit import RateLimiter
+from ancv.web.singleflight import SingleFlight
+from ancv.web.streaming import Rendering, stream
+from ancv.web.tokens import TokenPool
 
 LOGGER = get_logger()
 
@@ -27,8 +55,16 @@ SHOWCASE_RESUME = Template.from_file(
     PROJECT_ROOT / "data" / "showcase.resume.json"
 ).render()
 
+SHOWCASE_VARIANTS = Variants.of(SHOWCASE_RESUME)
+
 SHOWCASE_USERNAME = "heyho"
 
+# Share of the soft TTL after which hot users are refreshed ahead of time:
+REFRESH_AHEAD = 0.8
+
+# Renders are pinned to a revision, so this only bounds how long unused ones linger:
+SHARED_RENDER_TTL = timedelta(days=7)
+
 
 def is_terminal_client(user_agent: str) -> bool:
     """Determines if a user agent string indicates a terminal client."""
@@ -75,6 +111,24 @@ class APIHandler(Runnable):
         token: Optional[str],
         terminal_landing_page: str,
         browser_landing_page: str,
+        render_cache_size: int = 32 * SIPrefix.MEGA,
+        validator_cache_size: int = 16 * SIPrefix.MEGA,
+        content_cache_size: int = 32 * SIPrefix.MEGA,
+        content_spill: Optional[Path] = None,
+        soft_ttl: Optional[timedelta] = None,
+        hard_ttl: timedelta = timedelta(days=1),
+        gist_index: Optional[Path] = None,
+        render_pool: Optional[RenderPool] = None,
+        tokens: Sequence[str] = (),
+        governor: Optional[Governor] = None,
+        negative_ttl: timedelta = timedelta(minutes=1),
+        admission: Optional[Admission] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        stream: bool = False,
+        prewarm: Sequence[str] = (),
+        prewarm_concurrency: int = 4,
+        hot_users: int = 50,
+        shared_cache: Optional[CacheBackend] = None,
     ) -> None:
         """Initializes the handler.
 
@@ -85,15 +139,213 @@ class APIHandler(Runnable):
                 *terminal* client.
             browser_landing_page: URL to redirect to for requests to the root from a
                 *browser* client.
+            render_cache_size: The maximum total size of cached renders, in bytes.
+            validator_cache_size: The maximum total size of cached GitHub responses
+                (revalidated using their ETags on every use), in bytes.
+            content_cache_size: The maximum total size of cached, validated resume
+                files, in bytes.
+            content_spill: If given, the directory to spill resume files evicted from
+                the content cache to.
+            soft_ttl: If given, enables stale-while-revalidate: a user's last good
+                render is served without consulting GitHub for this long. After that,
+                it is still served immediately, but refreshed in the background.
+            hard_ttl: Once a user's last good render is older than this, requests block
+                on a fresh lookup again. Only relevant if `soft_ttl` is given.
+            gist_index: If given, the file to load the index of which gist holds each
+                user's resume from at startup, and save it to at shutdown.
+            render_pool: The pool to render resumes in, off the event loop. Defaults to
+                a thread pool.
+            tokens: Further tokens to use for the GitHub API requests besides `token`.
+                Requests are spread across all of them, each going to the token with
+                the most requests remaining.
+            governor: Rations the GitHub API rate limit as it runs low, see `Governor`.
+                Defaults to one with default thresholds.
+            negative_ttl: How long to remember failed lookups (no such user, no resume,
+                or an unusable one) for.
+            admission: Limits the number of resumes looked up at once, see `Admission`.
+                Requests served from cache bypass it. Defaults to one with default
+                limits.
+            rate_limiter: Limits the rate of resume lookups per client, see
+                `RateLimiter`. Requests served from cache are exempt. Off if not given:
+                clients are told apart by address, which takes knowing the proxies in
+                front of the server.
+            stream: Whether to stream fresh renders section by section to clients not
+                asking for compression (e.g. `curl` by default), instead of only once
+                done. Already rendered resumes are served as usual.
+            prewarm: Users to look up and render right after startup, in order of
+                priority, such that their first requests are served from cache.
+                `/-/ready` reports whether that's done.
+            prewarm_concurrency: How many users to prewarm at once.
+            hot_users: How many of the most requested users to keep warm in the
+                background, see `RefreshScheduler`: they're refreshed before going
+                stale, or once evicted from the render cache. `0` to disable.
+            shared_cache: If given, a second tier behind the render cache, shared with
+                other replicas pointed at the same backend: renders missing from the
+                render cache are looked up there before rendering, and fresh ones are
+                written there in the background.
         """
 
+        if soft_ttl is not None and hard_ttl < soft_ttl:
+            raise ValueError(
+                f"Hard TTL ({hard_ttl}) must not be shorter than soft TTL ({soft_ttl})."
+            )
+
         self.requester = requester
         self.token = token
+        self.tokens = TokenPool([t for t in (token, *tokens) if t])
+        self.governor = governor or Governor()
+        self.admission = admission or Admission()
+        self.admission.bypass = self.is_cheap
+        self.rate_limiter = rate_limiter
+        if self.rate_limiter is not None:
+            self.rate_limiter.exempt = self.is_cheap
         self.terminal_landing_page = terminal_landing_page
         self.browser_landing_page = browser_landing_page
+        self.render_cache = RenderCache(maxsize=render_cache_size)
+        self.shared_cache = shared_cache
+        self.validator_cache = ValidatorCache(maxsize=validator_cache_size)
+        self.content_cache = ContentCache(
+            maxsize=content_cache_size, spill=content_spill
+        )
+        self.negative_cache = NegativeCache(ttl=negative_ttl)
+        self.gist_index_path = gist_index
+        self.gist_index = GistIndex()
+        self.render_pool = render_pool or RenderPool()
+        # Bursts for the same user (e.g. a freshly shared link) share a single lookup
+        # and render:
+        self.locating: SingleFlight[str, File] = SingleFlight()
+        # Renders are coalesced by revision, such that a request finding a newer one
+        # never joins (and gets served) the render of an older one. Files without a
+        # revision are coalesced by user.
+        self.inflight: SingleFlight[
+            Union[str, RenderKey], Union[Variants, Rendering]
+        ] = SingleFlight()
+        self.stream = stream
+        self.renderings: dict[RenderKey, Rendering] = {}  # Streamed, not done yet
+        self.prewarmer = Prewarmer(prewarm, max_concurrency=prewarm_concurrency)
+        self.hot: RefreshScheduler[str] = RefreshScheduler(
+            due=self._due_for_refresh,
+            refresh=lambda user: self._refresh(user, self.app["github"]),
+            quota=lambda: self.governor.quota(),
+            top_k=hot_users,
+        )
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.snapshots: LRUCache[str, Snapshot] = LRUCache(maxsize=10_000)
+        self._refreshes: set[asyncio.Task[None]] = set()
+        self._shares: set[asyncio.Task[None]] = set()
+
+        self.metrics = Metrics()
+        self.metrics.gauge(
+            "cache_hit_ratio",
+            "Share of lookups that were cache hits, by cache.",
+            lambda: {
+                "render": self.render_cache.stats.ratio,
+                "content": self.content_cache.stats.ratio,
+                "validator": self.validator_cache.stats.ratio,
+                "negative": self.negative_cache.stats.ratio,
+                **(
+                    {}
+                    if self.shared_cache is None
+                    else {"shared": self.shared_cache.stats.ratio}
+                ),
+            },
+            label="cache",
+        )
+        if shared_cache is not None:
+            self.metrics.counter(
+                "shared_cache_errors_total",
+                "Failed reads from and writes to the shared cache.",
+                lambda: shared_cache.stats.errors,
+            )
+        self.metrics.gauge(
+            "governor_mode",
+            "The mode the rate limit governor is in (1 for the current one).",
+            lambda: {mode: float(mode is self.governor.mode) for mode in GovernorMode},
+            label="mode",
+        )
+        self.metrics.gauge(
+            "renders_pending",
+            "Renders submitted to the render pool, but not yet finished.",
+            lambda: self.render_pool.stats.pending,
+        )
+        self.metrics.counter(
+            "renders_total",
+            "Renders submitted to the render pool, by outcome.",
+            lambda: {
+                "completed": self.render_pool.stats.completed,
+                "rejected": self.render_pool.stats.rejected,
+            },
+            label="outcome",
+        )
+        render_wait = self.metrics.histogram(
+            "render_wait_seconds",
+            "Time renders spent queued in the render pool before starting.",
+        )
+        self.render_pool.on_wait = lambda wait: render_wait.observe(
+            wait.total_seconds()
+        )
+        self.metrics.gauge(
+            "ready",
+            "Whether prewarming is done (1) or not (0), see `/-/ready`.",
+            lambda: float(self.prewarmer.done.is_set()),
+        )
+        self.metrics.counter(
+            "hot_refreshes_total",
+            "Renders of hot users refreshed ahead of time.",
+            lambda: self.hot.stats.refreshed,
+        )
+        self.metrics.gauge(
+            "hot_users_tracked",
+            "Users whose requests are counted to determine the hot ones.",
+            lambda: len(self.hot.requests),
+        )
+        self.metrics.counter(
+            "admission_requests_total",
+            "Requests by admission control outcome (queued ones are also admitted or"
+            + " rejected).",
+            lambda: {
+                "admitted": self.admission.stats.admitted,
+                "queued": self.admission.stats.queued,
+                "rejected": self.admission.stats.rejected,
+                "bypassed": self.admission.stats.bypassed,
+            },
+            label="outcome",
+        )
+        self.metrics.gauge(
+            "admission_active",
+            "Admitted requests currently being handled.",
+            lambda: self.admission.active,
+        )
+        self.metrics.gauge(
+            "admission_waiting",
+            "Requests currently waiting to be admitted.",
+            lambda: self.admission.waiting,
+        )
+
+        if (rate_limiter := self.rate_limiter) is not None:
+            self.metrics.counter(
+                "rate_limit_requests_total",
+                "Requests by per-client rate limiting outcome.",
+                lambda: {
+                    "allowed": rate_limiter.stats.allowed,
+                    "limited": rate_limiter.stats.limited,
+                    "exempt": rate_limiter.stats.exempt,
+                },
+                label="outcome",
+            )
+            self.metrics.gauge(
+                "rate_limit_clients",
+                "Clients with a rate limiting bucket.",
+                lambda: len(rate_limiter),
+            )
 
         LOGGER.debug("Instantiating web application.")
-        self.app = web.Application()
+        middlewares = [self.metrics.middleware, self.admission.middleware]
+        if self.rate_limiter is not None:
+            # Abusive clients are turned away before taking up a slot:
+            middlewares.insert(1, self.rate_limiter.middleware)
+        self.app = web.Application(middlewares=middlewares)
 
         LOGGER.debug("Adding routes.")
         self.app.add_routes(
@@ -101,6 +353,11 @@ class APIHandler(Runnable):
                 # Order matters, see also https://www.grandmetric.com/2020/07/08/routing-order-in-aiohttp-library-in-python/
                 web.get("/", self.root),
                 web.get(f"/{SHOWCASE_USERNAME}", self.showcase),
+                # Operational endpoints live under `/-/`, as no GitHub username can
+                # start with a dash, such that they can't shadow anyone's resume.
+                web.get("/-/metrics", self.metrics.handle),
+                web.get("/-/status", self.status),
+                web.get("/-/ready", self.ready),
                 web.get("/{username}", self.username),
             ]
         )
@@ -125,34 +382,86 @@ class APIHandler(Runnable):
         log = LOGGER.bind(app=app)
         log.debug("App context initialization starting.")
 
+        if self.gist_index_path is not None:
+            self.gist_index = GistIndex.load(self.gist_index_path)
+
         log.debug("Starting client session.")
         session = ClientSession()
         log = log.bind(session=session)
         log.debug("Started client session.")
 
         log.debug("Creating GitHub API instance.")
-        github = GitHubAPI(
+        github = GitHubClient(
             session,
             requester=self.requester,
             oauth_token=self.token,
-            cache=TTLCache(maxsize=1e2, ttl=60),
+            cache=self.validator_cache,
+            tokens=self.tokens,
         )
         log = log.bind(github=github)
         log.debug("Created GitHub API instance.")
 
+        def quota() -> Optional[Quota]:
+            if self.tokens:
+                return self.tokens.quota()
+            if (limit := github.rate_limit) is None:
+                return None
+            return Quota(
+                remaining=limit.remaining,
+                limit=limit.limit,
+                reset=limit.reset_datetime.timestamp(),
+            )
+
+        self.governor.quota = quota
+
+        self.metrics.gauge(
+            "github_rate_limit_remaining",
+            "Requests left in the current GitHub API rate limit window(s).",
+            lambda: None if (q := quota()) is None else q.remaining,
+        )
+        self.metrics.gauge(
+            "github_tokens_available",
+            "GitHub tokens not currently considered exhausted.",
+            self.tokens.available,
+        )
+
         app["client_session"] = session
         app["github"] = github
 
+        # In the background, as not to delay startup: requests for other users can be
+        # served meanwhile.
+        background = [asyncio.create_task(self.prewarmer.run(self._warm(github)))]
+        if self.hot.top_k > 0:
+            background.append(asyncio.create_task(self.hot.run()))
+
         log.debug("App context initialization done, yielding.")
 
         yield
 
         log.debug("App context teardown starting.")
 
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+
+        # Refreshes still underway would otherwise run into the closed session:
+        for task in self._refreshes:
+            task.cancel()
+        await asyncio.gather(*self._refreshes, return_exceptions=True)
+
         log.debug("Closing client session.")
         await app["client_session"].close()
         log.debug("Closed client session.")
 
+        if self.gist_index_path is not None:
+            self.gist_index.save(self.gist_index_path)
+
+        if self.shared_cache is not None:
+            await asyncio.gather(*self._shares, return_exceptions=True)
+            await self.shared_cache.close()
+
+        self.render_pool.shutdown()
+
         log.info("App context teardown done.")
 
     async def root(self, request: web.Request) -> web.Response:
@@ -170,9 +479,28 @@ class APIHandler(Runnable):
     async def showcase(self, request: web.Request) -> web.Response:
         """The showcase endpoint, returning a static resume."""
 
-        return web.Response(text=SHOWCASE_RESUME)
+        return SHOWCASE_VARIANTS.respond(request)
+
+    async def status(self, request: web.Request) -> web.Response:
+        """The status endpoint, reporting the state of the rate limit governor."""
 
-    async def username(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"governor": self.governor.status(), "prewarm": self.prewarmer.status()},
+            headers={"Cache-Control": "no-store"},
+        )
+
+    async def ready(self, request: web.Request) -> web.Response:
+        """The readiness endpoint, succeeding once prewarming is done."""
+
+        if not self.prewarmer.done.is_set():
+            return web.Response(
+                text="Prewarming.\n",
+                status=HTTPStatus.SERVICE_UNAVAILABLE,
+                headers={"Cache-Control": "no-store", "Retry-After": "1"},
+            )
+        return web.Response(text="Ready.\n", headers={"Cache-Control": "no-store"})
+
+    async def username(self, request: web.Request) -> web.StreamResponse:
         """The username endpoint, returning a dynamic resume from a user's gists."""
 
         stopwatch = Stopwatch()
@@ -192,30 +520,430 @@ class APIHandler(Runnable):
         github: GitHubAPI = request.app["github"]
 
         log = log.bind(user=user)
+        self.hot.record(user)
 
         stopwatch.stop()
         try:
-            resume = await get_resume(user=user, github=github, stopwatch=stopwatch)
+            rendered = await self.lookup(
+                user=user,
+                github=github,
+                stopwatch=stopwatch,
+                not_modified=lambda tag: not_modified(request, tag),
+            )
+            if isinstance(rendered, Rendering):
+                if negotiate(request.headers.get("Accept-Encoding", "")) is None:
+                    log.debug("Streaming render.")
+                    streamed = await stream(request, rendered)
+                    stopwatch.stop()
+                    self.metrics.observe(stopwatch.timings)
+                    return streamed
+                rendered = await rendered.variants()
         except ResumeLookupError as e:
             stopwatch.stop()
+            self.metrics.observe(stopwatch.timings)
             log.warning(str(e))
             return web.Response(text=str(e), status=HTTPStatus.NOT_FOUND)
+        except ResumeConfigError as e:
+            log.warning(str(e))
+            return web.Response(text=str(e))
+        except RenderPoolFullError as e:
+            log.warning(str(e))
+            return web.Response(
+                text=str(e),
+                status=HTTPStatus.SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            )
+        except QuotaExhaustedError as e:
+            log.warning(str(e))
+            return web.Response(
+                text=str(e),
+                status=HTTPStatus.SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(e.retry_after)},
+            )
+
+        if isinstance(rendered, web.Response):
+            log.debug("Client has current render.")
+            resp = rendered
         else:
-            stopwatch(segment="Templating")
-            try:
-                template = Template.from_model_config(resume)
-            except ResumeConfigError as e:
-                log.warning(str(e))
-                return web.Response(text=str(e))
+            log.debug("Serving rendered template.")
+            resp = rendered.respond(request)
+        stopwatch.stop()
 
-            stopwatch(segment="Rendering")
-            resp = web.Response(text=template.render())
-            stopwatch.stop()
+        resp.headers["Server-Timing"] = server_timing_header(stopwatch.timings)
+        self.metrics.observe(stopwatch.timings)
+        return resp
 
-            resp.headers["Server-Timing"] = server_timing_header(stopwatch.timings)
+    async def lookup(
+        self,
+        user: str,
+        github: GitHubAPI,
+        stopwatch: Stopwatch,
+        not_modified: Callable[[str], Optional[web.Response]] = lambda tag: None,
+    ) -> Union[Variants, Rendering, web.Response]:
+        """Returns the rendered resume of `user`, possibly a stale one.
 
-            log.debug("Serving rendered template.")
-            return resp
+        Without a soft TTL, this always looks up the resume's file (coalesced with
+        concurrent lookups) and renders it unless cached. With one, the user's last good
+        render is served as long as it's younger than the hard TTL, refreshing it in the
+        background once it's older than the soft TTL.
+
+        As soon as the render's tag is known, `not_modified` gets to answer instead,
+        sparing the render (or even the lookup, for a snapshot) if the client has it.
+
+        Lookups are subject to the `governor`. While it's in cache-only mode, the user's
+        last good render is served regardless of its age.
+
+        Args:
+            user: The GitHub username to render the resume of.
+            github: The API object to use for the lookup.
+            stopwatch: The `Stopwatch` to use for timing.
+            not_modified: Given the render's tag, returns a response if the client
+                already has the render, `None` otherwise.
+
+        Returns:
+            The rendered resume along with its compressed variants, or the response
+            given by `not_modified`.
+
+        Raises:
+            QuotaExhaustedError: If the governor refuses the lookup.
+        """
+
+        snapshot = self.snapshots.get(user)
+        if snapshot is not None and self._servable(snapshot):
+            response = not_modified(snapshot.key.tag)
+            rendered = None if response else self.render_cache.get(snapshot.key)
+
+            age = timedelta(seconds=time.monotonic() - snapshot.timestamp)
+            stale = self.soft_ttl is not None and age > self.soft_ttl
+            cache_only = self.governor.mode is GovernorMode.CACHE_ONLY
+            if (response or rendered) and stale and not cache_only:
+                self._refresh_in_background(user, github, age)
+
+            if response is not None:
+                return response
+            if rendered is not None:
+                return rendered
+
+        # Known failures don't need to go through the governor, as they're free.
+        if (message := self.negative_cache.get(user)) is not None:
+            raise ResumeLookupError(message)
+
+        async with self.governor.admit(warm=snapshot is not None):
+            return await self.lookup_current(
+                user=user, github=github, stopwatch=stopwatch, not_modified=not_modified
+            )
+
+    def _servable(self, snapshot: Snapshot) -> bool:
+        """Whether `snapshot` may be served without looking up the current revision."""
+
+        if self.governor.mode is GovernorMode.CACHE_ONLY:
+            return True
+
+        age = timedelta(seconds=time.monotonic() - snapshot.timestamp)
+        return self.soft_ttl is not None and age <= self.hard_ttl
+
+    def is_cheap(self, request: web.Request) -> bool:
+        """Whether `request` can be served without a lookup, i.e. isn't for a resume or
+        for one served from the render cache."""
+
+        if (user := request.match_info.get("username")) is None:
+            return True
+
+        snapshot = self.snapshots.get(user)
+        return (
+            snapshot is not None
+            and self._servable(snapshot)
+            and snapshot.key in self.render_cache
+        )
+
+    async def lookup_current(
+        self,
+        user: str,
+        github: GitHubAPI,
+        stopwatch: Stopwatch,
+        not_modified: Callable[[str], Optional[web.Response]] = lambda tag: None,
+    ) -> Union[Variants, Rendering, web.Response]:
+        """Like `lookup`, but always looks up the current revision of the resume.
+
+        Failures are remembered in the negative cache. One for the current revision of
+        the resume file is raised again right away.
+
+        Args:
+            user: The GitHub username to render the resume of.
+            github: The API object to use for the lookup.
+            stopwatch: The `Stopwatch` to use for timing.
+            not_modified: Given the render's tag, returns a response if the client
+                already has the render, `None` otherwise.
+
+        Returns:
+            The rendered resume along with its compressed variants, or the response
+            given by `not_modified`.
+        """
+
+        try:
+            file = await self.locating(
+                user,
+                lambda: find_resume_file(
+                    user=user, github=github, stopwatch=stopwatch, index=self.gist_index
+                ),
+            )
+        except RateLimitError:
+            raise
+        except ResumeLookupError as e:
+            self.negative_cache.put(user, revision=None, message=str(e))
+            raise
+
+        located = time.monotonic()
+        if (message := self.negative_cache.get(user, file.revision)) is not None:
+            raise ResumeLookupError(message)
+
+        try:
+            check_size(file)
+
+            key = None if file.revision is None else RenderKey(user, file.revision)
+            if key is not None and (response := not_modified(key.tag)) is not None:
+                self._snapshot(user, key, located)
+                return response
+
+            rendered = await self.inflight(
+                user if key is None else key,
+                lambda: self.render(
+                    user=user,
+                    file=file,
+                    github=github,
+                    stopwatch=stopwatch,
+                    located=located,
+                ),
+            )
+        except RateLimitError:
+            raise
+        except ResumeLookupError as e:
+            if file.revision is not None:
+                self.negative_cache.put(user, revision=file.revision, message=str(e))
+            raise
+
+        self.negative_cache.discard(user)
+        return rendered
+
+    def _warm(self, github: GitHubAPI) -> Callable[[str], Awaitable[None]]:
+        """Returns a function warming the caches for a user, for the `Prewarmer`."""
+
+        async def warm(user: str) -> None:
+            rendered = await self.lookup(
+                user=user, github=github, stopwatch=Stopwatch()
+            )
+            if isinstance(rendered, Rendering):
+                await rendered.variants()
+
+        return warm
+
+    def _due_for_refresh(self, user: str) -> bool:
+        """Whether the render of `user`, a hot user, should be refreshed ahead of time."""
+
+        # Spare what's left of the budget for actual requests:
+        if self.governor.mode is not GovernorMode.NORMAL:
+            return False
+        if self._busy(user):
+            return False
+
+        snapshot = self.snapshots.get(user)
+        if snapshot is None:  # Never served successfully, so nothing to keep warm
+            return False
+        if snapshot.key not in self.render_cache:
+            return snapshot.key not in self.renderings
+
+        if self.soft_ttl is None:
+            return False
+        age = timedelta(seconds=time.monotonic() - snapshot.timestamp)
+        return age >= REFRESH_AHEAD * self.soft_ttl
+
+    def _busy(self, user: str) -> bool:
+        """Whether a lookup or render of `user` is underway."""
+
+        return (
+            user in self.locating
+            or user in self.inflight
+            or any(
+                isinstance(key, RenderKey) and key.user == user for key in self.inflight
+            )
+        )
+
+    def _snapshot(self, user: str, key: RenderKey, located: float) -> None:
+        """Records `key` as the current render of `user`, as found to be at `located`
+        (as per `time.monotonic()`), unless a later lookup found another already."""
+
+        current = self.snapshots.get(user)
+        if current is not None and current.timestamp > located:
+            if current.key != key:
+                return
+            located = current.timestamp
+        self.snapshots[user] = Snapshot(key, located)
+
+    def _refresh_in_background(
+        self, user: str, github: GitHubAPI, age: timedelta
+    ) -> None:
+        """Refreshes the render of `user`, unless that's already underway."""
+
+        if self._busy(user):
+            return
+
+        LOGGER.debug("Serving stale render, refreshing.", user=user, age=age)
+        task = asyncio.create_task(self._refresh(user, github))
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
+
+    async def _refresh(self, user: str, github: GitHubAPI) -> None:
+        """Looks up and renders `user` afresh, logging instead of raising any errors."""
+
+        try:
+            async with self.governor.admit(warm=True):
+                rendered = await self.lookup_current(
+                    user=user, github=github, stopwatch=Stopwatch()
+                )
+            if isinstance(rendered, Rendering):
+                await rendered.variants()
+        except (
+            ResumeLookupError,
+            ResumeConfigError,
+            RenderPoolFullError,
+            QuotaExhaustedError,
+        ) as e:
+            LOGGER.warning("Background refresh failed.", user=user, error=str(e))
+
+    async def render(
+        self,
+        user: str,
+        file: File,
+        github: GitHubAPI,
+        stopwatch: Stopwatch,
+        located: Optional[float] = None,
+    ) -> Union[Variants, Rendering]:
+        """Renders the resume of `user` held in `file`, going through the render cache.
+
+        On a cache hit, neither the resume's contents are fetched nor is it validated or
+        rendered again.
+
+        On a miss, the shared cache is consulted next, if any: a hit there spares the
+        render, but not the lookup.
+
+        When streaming, the render is returned while still in progress instead, to be
+        cached once done. Until then, it's shared with everyone asking for it.
+
+        Args:
+            user: The GitHub username to render the resume of.
+            file: The gist file holding the resume, as found by `get_resume_file`.
+            github: The API object to use for the lookup.
+            stopwatch: The `Stopwatch` to use for timing.
+            located: When `file` was found to be current, as per `time.monotonic()`.
+                Defaults to now.
+
+        Returns:
+            The rendered resume along with its compressed variants, or the render in
+            progress.
+
+        Raises:
+            ResumeLookupError: If the resume cannot be found or is invalid.
+            ResumeConfigError: If the resume's template config is invalid.
+        """
+
+        log = LOGGER.bind(user=user)
+        located = time.monotonic() if located is None else located
+
+        key = None if file.revision is None else RenderKey(user, file.revision)
+        if key is not None and (rendered := self.render_cache.get(key)) is not None:
+            log.debug("Render cache hit.", revision=key.revision)
+            self._snapshot(user, key, located)
+            return rendered
+        if key is not None and (rendering := self.renderings.get(key)) is not None:
+            log.debug("Joining render in progress.", revision=key.revision)
+            return rendering
+        if key is not None and (rendered := await self._shared_get(key)) is not None:
+            log.debug("Shared cache hit.", revision=key.revision)
+            self.render_cache.put(key, rendered)
+            self._snapshot(user, key, located)
+            return rendered
+
+        resume = await fetch_resume(
+            file=file,
+            session=self.app["client_session"],
+            stopwatch=stopwatch,
+            cache=self.content_cache,
+        )
+
+        # Fails fast on bad configs, before taking up a slot in the render pool (which
+        # will set up its own template, as that's cheap and spares pickling it).
+        stopwatch(segment="Templating")
+        Template.from_model_config(resume)
+
+        stopwatch(segment="Rendering")
+        if self.stream and key is not None:
+            rendering = Rendering(self.render_pool.render_sections(resume), tag=key.tag)
+            self.renderings[key] = rendering
+            rendering.task.add_done_callback(
+                lambda task: self._rendered(user, key, located, task)
+            )
+            return rendering
+
+        text = await self.render_pool.render(resume)
+
+        if key is None:
+            return Variants.of(text)
+
+        rendered = Variants.of(text, tag=key.tag)
+        self.render_cache.put(key, rendered)
+        self._share(key, rendered)
+        self._snapshot(user, key, located)
+        return rendered
+
+    def _rendered(
+        self, user: str, key: RenderKey, located: float, task: asyncio.Task[Variants]
+    ) -> None:
+        """Caches a streamed render once it's done."""
+
+        self.renderings.pop(key, None)
+        if task.cancelled():
+            return
+        if (e := task.exception()) is not None:
+            LOGGER.warning("Streamed render failed.", user=user, error=str(e))
+            return
+
+        self.render_cache.put(key, task.result())
+        self._share(key, task.result())
+        self._snapshot(user, key, located)
+
+    async def _shared_get(self, key: RenderKey) -> Optional[Variants]:
+        """Looks up a render in the shared cache, treating failures as misses."""
+
+        if self.shared_cache is None:
+            return None
+
+        try:
+            text = await self.shared_cache.get(f"ancv:render:{key.tag}")
+        except BackendError as e:
+            LOGGER.warning("Shared cache lookup failed.", error=str(e))
+            return None
+
+        return None if text is None else Variants.of(text.decode("utf-8"), tag=key.tag)
+
+    def _share(self, key: RenderKey, rendered: Variants) -> None:
+        """Writes a render to the shared cache in the background, if there is one."""
+
+        if (shared_cache := self.shared_cache) is None:
+            return
+
+        async def write() -> None:
+            try:
+                await shared_cache.set(
+                    f"ancv:render:{key.tag}",
+                    rendered.text.encode("utf-8"),
+                    ttl=SHARED_RENDER_TTL,
+                )
+            except BackendError as e:
+                LOGGER.warning("Shared cache write failed.", error=str(e))
+
+        task = asyncio.create_task(write())
+        self._shares.add(task)
+        task.add_done_callback(self._shares.discard)
 
 
 class FileHandler(Runnable):
@@ -230,6 +958,7 @@ class FileHandler(Runnable):
 
         self.template = Template.from_file(file)
         self.rendered = self.template.render()
+        self.variants = Variants.of(self.rendered)
 
         LOGGER.debug("Instantiating web application.")
         self.app = web.Application()
@@ -245,7 +974,7 @@ class FileHandler(Runnable):
         """The root and *only* endpoint, returning the rendered template."""
 
         LOGGER.debug("Serving rendered template.", request=request)
-        return web.Response(text=self.rendered)
+        return self.variants.respond(request)
 
 
 def server_timing_header(timings: dict[str, timedelta]) -> str:
@@ -286,19 +1015,31 @@ class WebHandler(Runnable):
     """A handler serving a rendered template loaded from a URL with periodic refresh."""
 
     def __init__(
-        self, destination: str, refresh_interval: timedelta = timedelta(seconds=300)
+        self,
+        destination: str,
+        refresh_interval: timedelta = timedelta(seconds=300),
+        render_pool: Optional[RenderPool] = None,
+        shared_cache: Optional[CacheBackend] = None,
     ) -> None:
         """Initializes the handler.
 
         Args:
             destination: The URL to load the JSON Resume from.
             refresh_interval: How often to refresh the resume.
+            render_pool: The pool to render the resume in, off the event loop. Defaults
+                to a thread pool.
+            shared_cache: If given, renders are shared through it with other replicas
+                serving the same destination, for up to `refresh_interval`: only one of
+                them needs to fetch and render per interval.
         """
         self.destination = destination
         self.refresh_interval = refresh_interval
+        self.render_pool = render_pool or RenderPool()
+        self.shared_cache = shared_cache
         self.cache: str = ""
         self.last_fetch: float = 0
         self._last_valid_render: str = ""
+        self._variants: Optional[Variants] = None  # Of `cache`, compressed and tagged
 
         LOGGER.debug("Instantiating web application.")
         self.app = web.Application()
@@ -326,6 +1067,9 @@ class WebHandler(Runnable):
         yield
         log.debug("App context teardown starting.")
         await session.close()
+        if self.shared_cache is not None:
+            await self.shared_cache.close()
+        self.render_pool.shutdown()
         log.debug("App context teardown done.")
 
     async def fetch(self, session: ClientSession) -> ResumeSchema:
@@ -344,15 +1088,16 @@ class WebHandler(Runnable):
         async with session.get(self.destination) as response:
             if response.status != HTTPStatus.OK:
                 raise RenderError(f"Failed to fetch resume from {self.destination}")
-            content = await response.text()
+            content = await response.read()
             try:
-                resume_data = json.loads(content)
-                return ResumeSchema(**resume_data)
-            except json.JSONDecodeError:
-                raise InvalidResumeDataError("Invalid JSON format in resume data")
+                return parse_resume(content)
+            except ValidationError as e:
+                if is_malformed_json(e):
+                    raise InvalidResumeDataError("Invalid JSON format in resume data")
+                raise
 
-    def render(self, resume_data: ResumeSchema) -> str:
-        """Renders resume data into a formatted template string.
+    async def render(self, resume_data: ResumeSchema) -> str:
+        """Renders resume data into a formatted template string, in the render pool.
 
         Args:
             resume_data: The resume data dictionary to render
@@ -364,13 +1109,14 @@ class WebHandler(Runnable):
                 - Template rendering fails
         """
         try:
-            template = Template.from_model_config(resume_data)
-            rendered = template.render()
+            rendered = await self.render_pool.render(resume_data)
             if not rendered:
                 raise TemplateRenderError("Template rendering failed")
             return rendered
         except ResumeConfigError:
             raise InvalidResumeDataError("Resume configuration error")
+        except RenderPoolFullError as e:
+            raise TemplateRenderError(str(e)) from e
 
     async def root(self, request: web.Request) -> web.Response:
         """The root endpoint, returning the rendered template with periodic refresh.
@@ -397,19 +1143,30 @@ class WebHandler(Runnable):
         session: ClientSession = request.app["client_session"]
 
         current_time = time.monotonic()
+        now = time.time()  # Unlike monotonic time, comparable across replicas
         should_refresh = (
             not self.cache
             or (current_time - self.last_fetch) > self.refresh_interval.total_seconds()
         )
 
+        if should_refresh and (shared := await self._shared_get(now)) is not None:
+            log.debug("Using render shared by another replica.")
+            rendered, age = shared
+            self._last_valid_render = rendered
+            self.cache = rendered
+            # As of its fetch, not now, so replicas can't keep handing it on:
+            self.last_fetch = current_time - age
+            should_refresh = False
+
         if should_refresh:
             log.debug("Fetching fresh resume data.")
             try:
                 resume_data = await self.fetch(session)
-                rendered = self.render(resume_data)
+                rendered = await self.render(resume_data)
                 self._last_valid_render = rendered
                 self.cache = rendered
                 self.last_fetch = current_time
+                await self._share(rendered, fetched=now)
             except (ClientError, ValidationError) as exc:
                 log.error("Network or validation error", error=str(exc))
                 if self._last_valid_render:
@@ -430,5 +1187,66 @@ class WebHandler(Runnable):
                         status=HTTPStatus.INTERNAL_SERVER_ERROR,
                     )
 
+        if self._variants is None or self._variants.text is not self.cache:
+            self._variants = Variants.of(self.cache)
+
         log.debug("Serving rendered template.")
-        return web.Response(text=self.cache)
+        return self._variants.respond(request)
+
+    @property
+    def _shared_key(self) -> str:
+        return f"ancv:web:{hashlib.sha256(self.destination.encode()).hexdigest()}"
+
+    async def _shared_get(self, now: float) -> Optional[tuple[str, float]]:
+        """Looks up a render in the shared cache, treating failures as misses.
+
+        Args:
+            now: The current time, as returned by `time.time()`.
+
+        Returns:
+            The render and how many seconds ago it was fetched, if shared and not older
+            than `refresh_interval`.
+        """
+
+        if self.shared_cache is None:
+            return None
+
+        try:
+            value = await self.shared_cache.get(self._shared_key)
+        except BackendError as e:
+            LOGGER.warning("Shared cache lookup failed.", error=str(e))
+            return None
+
+        if value is None:
+            return None
+
+        try:
+            shared = json.loads(value)
+            rendered, fetched = str(shared["text"]), float(shared["fetched"])
+        except (ValueError, KeyError, TypeError) as e:
+            LOGGER.warning("Ignoring malformed shared render.", error=str(e))
+            return None
+
+        age = max(now - fetched, 0.0)
+        if age > self.refresh_interval.total_seconds():  # E.g. clocks out of sync
+            return None
+        return rendered, age
+
+    async def _share(self, rendered: str, fetched: float) -> None:
+        """Writes a render to the shared cache, if there is one, logging failures.
+
+        Args:
+            rendered: The render to share.
+            fetched: When the resume was fetched, as returned by `time.time()`.
+        """
+
+        if self.shared_cache is None:
+            return
+
+        value = json.dumps({"fetched": fetched, "text": rendered})
+        try:
+            await self.shared_cache.set(
+                self._shared_key, value.encode("utf-8"), ttl=self.refresh_interval
+            )
+        except BackendError as e:
+            LOGGER.warning("Shared cache write failed.", error=str(e))
@@ -0,0 +1,64 @@
+import asyncio
+import typing as t
+
+from structlog import get_logger
+
+LOGGER = get_logger()
+
+K = t.TypeVar("K", bound=t.Hashable)
+V = t.TypeVar("V")
+
+
+class SingleFlight(t.Generic[K, V]):
+    """Coalesces concurrent calls for the same key into a single, shared call.
+
+    The first caller for a key starts the work as a task; every caller arriving while it
+    is still in flight awaits that same task, receiving the same result or exception.
+    Once the task is done, the next call for that key starts over.
+
+    Waiters are shielded from the shared task: a waiter being cancelled (e.g. because
+    its client disconnected) does not cancel the work for everyone else.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[K, asyncio.Task[V]] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._inflight
+
+    def __iter__(self) -> t.Iterator[K]:
+        return iter(list(self._inflight))  # A copy, as keys come and go while iterating
+
+    async def __call__(self, key: K, fn: t.Callable[[], t.Awaitable[V]]) -> V:
+        """Returns the result of `fn()`, sharing it with concurrent calls for `key`.
+
+        Args:
+            key: Identifies the work; concurrent calls with equal keys are coalesced.
+            fn: Produces the awaitable doing the actual work. Only called if no work for
+                `key` is in flight yet.
+
+        Returns:
+            The result of the (possibly shared) work.
+        """
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda task: self._done(key, task))
+        else:
+            LOGGER.debug("Joining in-flight call.", key=key)
+
+        return await asyncio.shield(task)
+
+    def _done(self, key: K, task: asyncio.Task[V]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+        # If all waiters went away, nobody retrieves the exception, which `asyncio`
+        # would complain loudly about.
+        if not task.cancelled():
+            task.exception()
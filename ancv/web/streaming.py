@@ -0,0 +1,108 @@
+import asyncio
+from collections.abc import AsyncIterator
+from http import HTTPStatus
+
+from aiohttp import web
+
+from ancv.web.compression import Variants, etag
+
+
+class Rendering:
+    """A render in progress, whose sections can be streamed as soon as each is done.
+
+    The render runs as a task of its own, independent of any one reader: any number of
+    readers can stream it (replaying sections done before they started reading), and it
+    runs to completion even if they all go away, e.g. to be cached.
+    """
+
+    def __init__(self, sections: AsyncIterator[str], tag: str) -> None:
+        """Starts the render.
+
+        Args:
+            sections: Yields the rendered sections, see `RenderPool.render_sections`.
+            tag: Identifies the render once done, see `Variants`.
+        """
+
+        self.tag = tag
+        self._sections: list[str] = []
+        self._changed = asyncio.Event()
+        self.task = asyncio.create_task(self._run(sections))
+
+    async def _run(self, sections: AsyncIterator[str]) -> Variants:
+        try:
+            async for section in sections:
+                self._sections.append(section)
+                self._notify()
+        finally:
+            self._notify()
+
+        return Variants.of("".join(self._sections), tag=self.tag)
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def sections(self) -> AsyncIterator[str]:
+        """Yields all sections, waiting for those not done yet.
+
+        Raises:
+            Exception: Whatever the render failed with, once all sections done before
+                have been yielded.
+        """
+
+        yielded = 0
+        while True:
+            changed = self._changed  # Before yielding, so no notification is missed
+            while yielded < len(self._sections):
+                yield self._sections[yielded]
+                yielded += 1
+
+            if self.task.done():
+                if yielded == len(self._sections):
+                    self.task.result()  # Raises if failed
+                    return
+                continue
+
+            await changed.wait()
+
+    async def variants(self) -> Variants:
+        """Waits for the render to finish, returning it with its compressed variants."""
+
+        return await asyncio.shield(self.task)
+
+
+async def stream(request: web.Request, rendering: Rendering) -> web.StreamResponse:
+    """Streams `rendering` to the client, section by section.
+
+    Waits for the first section before sending anything, such that early failures (e.g.
+    a full render pool, or a bad template config) can still be answered properly. The
+    response isn't compressed, so only suits clients that don't ask for compression.
+
+    Args:
+        request: The request to respond to.
+        rendering: The render to stream.
+
+    Returns:
+        The response, already sent.
+
+    Raises:
+        Exception: Whatever the render failed with before its first section.
+    """
+
+    sections = aiter(rendering.sections())
+    first = await anext(sections, "")
+
+    response = web.StreamResponse(
+        status=HTTPStatus.OK,
+        headers={"ETag": etag(rendering.tag, None), "Vary": "Accept-Encoding"},
+    )
+    response.content_type = "text/plain"
+    response.charset = "utf-8"
+    response.enable_chunked_encoding()
+
+    await response.prepare(request)
+    await response.write(first.encode("utf-8"))
+    async for section in sections:
+        await response.write(section.encode("utf-8"))
+    await response.write_eof()
+    return response
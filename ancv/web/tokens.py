@@ -0,0 +1,139 @@
+import time
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import Optional
+
+from gidgethub.sansio import RateLimit
+from structlog import get_logger
+
+from ancv.web.governor import Quota
+
+LOGGER = get_logger()
+
+
+@dataclass
+class TokenState:
+    """What is known about the rate limit of a single token."""
+
+    token: str = field(repr=False)
+    remaining: Optional[int] = None  # `None` until the first response
+    limit: Optional[int] = None
+    reset: float = 0.0  # Epoch seconds at which `remaining` resets
+
+    def available(self, now: float) -> float:
+        """The number of requests left at `now`, infinite if unknown or reset since."""
+
+        if self.remaining is None or self.reset <= now:
+            return float("inf")
+        return self.remaining
+
+
+class TokenPool:
+    """A pool of GitHub tokens, spreading requests across their rate limits.
+
+    Each request goes to the token with the most requests remaining, as last reported by
+    GitHub's `X-RateLimit-*` response headers. Tokens down to `reserve` remaining
+    requests are skipped until their reset time, unless all of them are.
+    """
+
+    def __init__(self, tokens: Sequence[str], reserve: int = 10) -> None:
+        """Initializes the pool.
+
+        Args:
+            tokens: The tokens to use. Duplicates are ignored.
+            reserve: Tokens with this many or fewer remaining requests are considered
+                exhausted.
+        """
+
+        self._states = {token: TokenState(token) for token in dict.fromkeys(tokens)}
+        self.reserve = reserve
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    @property
+    def states(self) -> list[TokenState]:
+        """The state of each token, in the order they were given."""
+
+        return list(self._states.values())
+
+    def available(self) -> int:
+        """The number of tokens not currently considered exhausted."""
+
+        now = time.time()
+        return sum(state.available(now) > self.reserve for state in self.states)
+
+    def remaining(self) -> Optional[int]:
+        """The total number of requests known to remain across tokens, if any."""
+
+        known = [
+            state.remaining for state in self.states if state.remaining is not None
+        ]
+        return sum(known) if known else None
+
+    def quota(self) -> Optional[Quota]:
+        """The combined budget of all tokens with known limits, if any.
+
+        Tokens past their reset time count with their full limit again. The budget
+        resets (at least partially) with the earliest token to reset.
+        """
+
+        now = time.time()
+        remaining = limit = 0
+        resets = []
+        for state in self.states:
+            if state.limit is None or state.remaining is None:
+                continue
+            remaining += state.remaining if state.reset > now else state.limit
+            limit += state.limit
+            resets.append(state.reset)
+
+        if not resets:
+            return None
+        return Quota(remaining=remaining, limit=limit, reset=min(resets))
+
+    def pick(self) -> Optional[str]:
+        """Returns the token to use for the next request, `None` if the pool is empty.
+
+        The pick counts against the token's remaining requests right away, such that
+        concurrent requests spread across tokens before any responses are in.
+        """
+
+        if not self._states:
+            return None
+
+        now = time.time()
+        state = max(self.states, key=lambda state: state.available(now))
+
+        if state.available(now) <= self.reserve:
+            # All exhausted: use whichever recovers first, GitHub will tell us off.
+            state = min(self.states, key=lambda state: state.reset)
+            LOGGER.warning("All GitHub tokens exhausted.", tokens=len(self))
+
+        if state.remaining is not None and state.reset > now:
+            state.remaining = max(0, state.remaining - 1)
+        return state.token
+
+    def update(self, token: str, headers: Mapping[str, str]) -> None:
+        """Records the rate limit reported in the response to a request using `token`.
+
+        Args:
+            token: The token the request was made with.
+            headers: The response headers, with lowercase keys.
+        """
+
+        if (state := self._states.get(token)) is None:
+            return
+        if (limit := RateLimit.from_http(headers)) is None:
+            return
+
+        # Responses to concurrent requests can arrive out of order.
+        reset = limit.reset_datetime.timestamp()
+        if reset < state.reset:
+            return
+        if reset == state.reset and state.remaining is not None:
+            state.remaining = min(state.remaining, limit.remaining)
+        else:
+            state.remaining = limit.remaining
+        state.limit = limit.limit
+        state.reset = reset
@@ -0,0 +1,48 @@
+"""Compares the CPU cost of the ways to parse a JSON resume.
+
+Run with `python -m benchmarks.parse_resume [RESUME]`, defaulting to the showcase.
+"""
+
+import json
+import sys
+import timeit
+from pathlib import Path
+
+from ancv import PROJECT_ROOT
+from ancv.data.models.resume import ResumeSchema
+from ancv.data.validation import parse_resume
+
+NUMBER = 1_000
+REPEAT = 5
+
+
+def main() -> None:
+    path = (
+        Path(sys.argv[1])
+        if len(sys.argv) > 1
+        else PROJECT_ROOT / "data" / "showcase.resume.json"
+    )
+    raw = path.read_bytes()
+    assert parse_resume(raw) == ResumeSchema(**json.loads(raw.decode("utf8")))
+
+    candidates = {
+        "json.loads + ResumeSchema(**)": lambda: ResumeSchema(
+            **json.loads(raw.decode("utf8"))
+        ),
+        "parse_resume (bytes)": lambda: parse_resume(raw),
+    }
+
+    print(f"{path.name}: {len(raw)} bytes, best of {REPEAT} x {NUMBER} parses")
+    results = {}
+    for name, candidate in candidates.items():
+        best = min(timeit.repeat(candidate, number=NUMBER, repeat=REPEAT)) / NUMBER
+        results[name] = best
+        print(f"{name:>32}: {best * 1e6:8.1f} µs")
+
+    baseline, *_, ours = results.values()
+    print(f"{'saved per parse':>32}: {(baseline - ours) * 1e6:8.1f} µs", end=" ")
+    print(f"({1 - ours / baseline:.0%})")
+
+
+if __name__ == "__main__":
+    main()
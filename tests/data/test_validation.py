@@ -1,6 +1,16 @@
+import json
+from pathlib import Path
+
 import pytest
+from pydantic import ValidationError
 
-from ancv.data.validation import is_valid_github_username
+from ancv.data.models.resume import ResumeSchema
+from ancv.data.validation import (
+    is_malformed_json,
+    is_valid_github_username,
+    parse_resume,
+)
+from tests import RESUMES
 
 
 @pytest.mark.parametrize(
@@ -40,3 +50,33 @@ from ancv.data.validation import is_valid_github_username
 )
 def test_is_valid_github_name(name: str, valid: bool) -> None:
     assert is_valid_github_username(name) == valid
+
+
+@pytest.mark.parametrize("path", RESUMES.values())
+def test_parse_resume_matches_python_validation(path: Path) -> None:
+    raw = path.read_bytes()
+
+    assert parse_resume(raw) == ResumeSchema(**json.loads(raw))
+    assert parse_resume(raw.decode("utf8")) == parse_resume(raw)
+
+
+@pytest.mark.parametrize(
+    ["raw", "malformed"],
+    [
+        (b"", True),
+        (b"{", True),
+        (b"{'basics': {}}", True),
+        (b'{"basics": {}} trailing', True),
+        (b"\xff", True),
+        #
+        (b"[]", False),
+        (b'"resume"', False),
+        (b'{"unknown": 1}', False),
+        (b'{"basics": {"name": 1}}', False),
+    ],
+)
+def test_parse_resume_errors(raw: bytes, malformed: bool) -> None:
+    with pytest.raises(ValidationError) as e:
+        parse_resume(raw)
+
+    assert is_malformed_json(e.value) == malformed
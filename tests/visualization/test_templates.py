@@ -1,4 +1,6 @@
 import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 from pathlib import Path
 from typing import Optional
@@ -410,3 +412,34 @@ def test_expected_outputs(path: Path) -> None:
         f.write(rendered_resume)
 
     assert is_equal
+
+
+@pytest.mark.parametrize(
+    ["path"], [(file,) for file in sorted(Path(RESUMES_DIR).glob("*.resume.json"))]
+)
+def test_render_sections(path: Path) -> None:
+    template = Template.from_file(path)
+
+    sections = list(template.render_sections())
+
+    assert "".join(sections) == template.render()
+    assert template.model.basics is not None
+    assert template.model.basics.name is not None
+    assert template.model.basics.name in sections[0]
+    if template.model.work:
+        assert len(sections) > 1
+
+
+def test_concurrent_renders_in_threads() -> None:
+    """Rendering touches no interpreter globals, so threads cannot interfere."""
+
+    paths = sorted(Path(RESUMES_DIR).glob("*.resume.json"))
+    templates = [Template.from_file(path) for path in paths]
+    expected = [template.render() for template in templates]
+
+    stdout = sys.stdout
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        rendered = list(executor.map(lambda t: t.render(), templates * 10))
+
+    assert rendered == expected * 10
+    assert sys.stdout is stdout
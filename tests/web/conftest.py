@@ -1,7 +1,17 @@
+import copy
+import hashlib
+import math
+import time
+from collections.abc import AsyncIterator
+from http import HTTPStatus
+from typing import Any, Optional
+
 import pytest
+from aiohttp import ClientSession, web
 from aiohttp.web import Application
 
 from ancv.reflection import METADATA
+from ancv.web.client import GitHubClient
 from ancv.web.server import APIHandler, FileHandler
 from tests import EXPECTED_OUTPUTS_DIR, GH_TOKEN, RESUMES
 
@@ -29,3 +39,203 @@ def showcase_output() -> str:
         EXPECTED_OUTPUTS_DIR / "showcase.resume.output.txt", encoding="utf8"
     ) as f:
         return f.read()
+
+
+class FakeGitHub:
+    """A minimal, in-memory stand-in for the parts of the GitHub API we use.
+
+    Serves users' gist listings (paginated like the real thing), single gists and raw
+    gist files. All requested paths are recorded in `requests`, the tokens they were
+    made with in `tokens`. Each token has its own rate limit, reported in the response
+    headers.
+    """
+
+    def __init__(self) -> None:
+        self.base_url = ""
+        self.gists: dict[str, list[dict[str, Any]]] = {}
+        self.raw: dict[str, bytes] = {}
+        self.requests: list[str] = []
+        self.tokens: list[Optional[str]] = []
+        self.rate_limit = 5000
+        self.remaining: dict[Optional[str], int] = {}
+        self.reset = int(time.time()) + 3600
+        # Like GitHub, the single gist endpoint inlines file contents up to a limit:
+        self.truncate_above = 1_000_000
+        # Whether gist listings carry ETags, answering matching requests with a `304`:
+        self.etags = False
+
+        self.app = web.Application()
+        self.app.router.add_get("/users/{user}/gists", self.list_gists)
+        self.app.router.add_get("/gists/{id}", self.get_gist)
+        self.app.router.add_get("/raw/{path:.*}", self.get_raw)
+        self.app.on_response_prepare.append(self.add_rate_limit_headers)
+
+    async def add_rate_limit_headers(
+        self, request: web.Request, response: web.StreamResponse
+    ) -> None:
+        authorization = request.headers.get("Authorization")
+        token = None if authorization is None else authorization.removeprefix("token ")
+        self.tokens.append(token)
+
+        remaining = max(0, self.remaining.get(token, self.rate_limit) - 1)
+        self.remaining[token] = remaining
+        response.headers["X-RateLimit-Limit"] = str(self.rate_limit)
+        response.headers["X-RateLimit-Remaining"] = str(remaining)
+        response.headers["X-RateLimit-Reset"] = str(self.reset)
+
+    def add_user(self, user: str) -> None:
+        self.gists.setdefault(user, [])
+
+    def add_gist(self, user: str, files: dict[str, bytes]) -> dict[str, Any]:
+        """Adds a gist with the given files to `user`, returning its raw data."""
+
+        self.add_user(user)
+        gist_id = hashlib.sha1(f"{user}{len(self.gists[user])}".encode()).hexdigest()
+        url = f"{self.base_url}/gists/{gist_id}"
+        owner = {
+            "login": user,
+            "id": 1,
+            "node_id": "MDQ6VXNlcjE=",
+            "avatar_url": f"{self.base_url}/avatar",
+            "gravatar_id": "",
+            "url": f"{self.base_url}/users/{user}",
+            "html_url": f"{self.base_url}/{user}",
+            "followers_url": f"{self.base_url}/users/{user}/followers",
+            "following_url": f"{self.base_url}/users/{user}/following{{/other_user}}",
+            "gists_url": f"{self.base_url}/users/{user}/gists{{/gist_id}}",
+            "starred_url": f"{self.base_url}/users/{user}/starred{{/owner}}{{/repo}}",
+            "subscriptions_url": f"{self.base_url}/users/{user}/subscriptions",
+            "organizations_url": f"{self.base_url}/users/{user}/orgs",
+            "repos_url": f"{self.base_url}/users/{user}/repos",
+            "events_url": f"{self.base_url}/users/{user}/events{{/privacy}}",
+            "received_events_url": f"{self.base_url}/users/{user}/received_events",
+            "type": "User",
+            "site_admin": False,
+        }
+        gist: dict[str, Any] = {
+            "url": url,
+            "forks_url": f"{url}/forks",
+            "commits_url": f"{url}/commits",
+            "id": gist_id,
+            "node_id": gist_id,
+            "git_pull_url": f"{url}.git",
+            "git_push_url": f"{url}.git",
+            "html_url": url,
+            "files": {},
+            "public": True,
+            "created_at": "2022-01-01T00:00:00Z",
+            "updated_at": "2022-01-01T00:00:00Z",
+            "description": None,
+            "comments": 0,
+            "user": None,
+            "comments_url": f"{url}/comments",
+            "owner": owner,
+            "truncated": False,
+        }
+        for filename, content in files.items():
+            revision = hashlib.sha1(content).hexdigest()
+            path = f"{user}/{gist_id}/raw/{revision}/{filename}"
+            self.raw[path] = content
+            gist["files"][filename] = {
+                "filename": filename,
+                "type": "application/json",
+                "language": "JSON",
+                "raw_url": f"{self.base_url}/raw/{path}",
+                "size": len(content),
+            }
+
+        self.gists[user].insert(0, gist)  # Most recent first, like GitHub
+        return gist
+
+    def update_file(
+        self, user: str, gist_id: str, filename: str, content: bytes
+    ) -> None:
+        """Updates a file in one of `user`'s gists, giving it a new revision."""
+
+        gist = next(gist for gist in self.gists[user] if gist["id"] == gist_id)
+        revision = hashlib.sha1(content).hexdigest()
+        path = f"{user}/{gist_id}/raw/{revision}/{filename}"
+        self.raw[path] = content
+        gist["files"][filename]["raw_url"] = f"{self.base_url}/raw/{path}"
+        gist["files"][filename]["size"] = len(content)
+
+    async def list_gists(self, request: web.Request) -> web.Response:
+        self.requests.append(request.path_qs)
+
+        user = request.match_info["user"]
+        if user not in self.gists:
+            return web.json_response(
+                {"message": "Not Found"}, status=HTTPStatus.NOT_FOUND
+            )
+
+        per_page = int(request.query.get("per_page", 30))
+        page = int(request.query.get("page", 1))
+        gists = self.gists[user]
+        last = max(1, math.ceil(len(gists) / per_page))
+
+        links = []
+        url = f"{self.base_url}{request.path}?per_page={per_page}"
+        if page < last:
+            links.append(f'<{url}&page={page + 1}>; rel="next"')
+            links.append(f'<{url}&page={last}>; rel="last"')
+
+        response = web.json_response(
+            gists[(page - 1) * per_page : page * per_page],
+            headers={"Link": ", ".join(links)} if links else None,
+        )
+        if self.etags:
+            assert isinstance(response.body, bytes)
+            etag = f'"{hashlib.sha1(response.body).hexdigest()}"'
+            if request.headers.get("If-None-Match") == etag:
+                # Without a `Link` header, so only the cached response tells it:
+                return web.Response(status=HTTPStatus.NOT_MODIFIED)
+            response.headers["ETag"] = etag
+        return response
+
+    async def get_gist(self, request: web.Request) -> web.Response:
+        self.requests.append(request.path_qs)
+
+        for gists in self.gists.values():
+            for gist in gists:
+                if gist["id"] == request.match_info["id"]:
+                    gist = copy.deepcopy(gist)
+                    for file in gist["files"].values():
+                        content = self.raw[file["raw_url"].split("/raw/", 1)[1]]
+                        file["truncated"] = len(content) > self.truncate_above
+                        file["content"] = content[: self.truncate_above].decode()
+                    return web.json_response(gist)
+        return web.json_response({"message": "Not Found"}, status=HTTPStatus.NOT_FOUND)
+
+    async def get_raw(self, request: web.Request) -> web.Response:
+        self.requests.append(request.path_qs)
+
+        try:
+            content = self.raw[request.match_info["path"]]
+        except KeyError:
+            return web.Response(status=HTTPStatus.NOT_FOUND)
+        return web.Response(body=content, content_type="text/plain", charset="utf-8")
+
+
+@pytest.fixture(scope="function")
+async def fake_github(aiohttp_server: Any) -> FakeGitHub:
+    fake = FakeGitHub()
+    server = await aiohttp_server(fake.app)
+    fake.base_url = str(server.make_url("")).rstrip("/")
+    return fake
+
+
+@pytest.fixture(scope="function")
+async def session() -> AsyncIterator[ClientSession]:
+    async with ClientSession() as session:
+        yield session
+
+
+@pytest.fixture(scope="function")
+async def fake_github_api(
+    fake_github: FakeGitHub, session: ClientSession
+) -> GitHubClient:
+    return GitHubClient(
+        session,
+        requester=f"{METADATA.name}-PYTEST-REQUESTER",
+        base_url=fake_github.base_url,
+    )
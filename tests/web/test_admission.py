@@ -0,0 +1,97 @@
+import asyncio
+from datetime import timedelta
+from http import HTTPStatus
+from typing import Any
+
+import pytest
+from aiohttp import web
+
+from ancv.web.admission import Admission
+
+
+def app(admission: Admission, release: asyncio.Event) -> web.Application:
+    async def slow(request: web.Request) -> web.Response:
+        await release.wait()
+        return web.Response(text="slow")
+
+    async def fast(request: web.Request) -> web.Response:
+        return web.Response(text="fast")
+
+    admission.bypass = lambda request: request.path == "/fast"
+    app = web.Application(middlewares=[admission.middleware])
+    app.add_routes([web.get("/slow", slow), web.get("/fast", fast)])
+    return app
+
+
+async def wait_until(condition: Any) -> None:
+    for _ in range(100):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("Condition never met.")
+
+
+def test_limit_positive() -> None:
+    with pytest.raises(ValueError):
+        Admission(max_concurrent=0)
+
+
+async def test_queue_full(aiohttp_client: Any) -> None:
+    admission = Admission(max_concurrent=1, max_queued=1)
+    release = asyncio.Event()
+    client = await aiohttp_client(app(admission, release))
+
+    first = asyncio.create_task(client.get("/slow"))
+    await wait_until(lambda: admission.active == 1)
+    second = asyncio.create_task(client.get("/slow"))
+    await wait_until(lambda: admission.waiting == 1)
+
+    rejected = await client.get("/slow")
+    assert rejected.status == HTTPStatus.SERVICE_UNAVAILABLE
+    assert rejected.headers["Retry-After"] == "5"
+
+    bypassed = await client.get("/fast")
+    assert bypassed.status == HTTPStatus.OK
+
+    release.set()
+    for response in await asyncio.gather(first, second):
+        assert response.status == HTTPStatus.OK
+
+    assert admission.stats.admitted == 2
+    assert admission.stats.queued == 1
+    assert admission.stats.rejected == 1
+    assert admission.stats.bypassed == 1
+    assert admission.active == admission.waiting == 0
+
+
+async def test_queue_timeout(aiohttp_client: Any) -> None:
+    admission = Admission(max_concurrent=1, queue_timeout=timedelta(seconds=0.05))
+    release = asyncio.Event()
+    client = await aiohttp_client(app(admission, release))
+
+    first = asyncio.create_task(client.get("/slow"))
+    await wait_until(lambda: admission.active == 1)
+
+    timed_out = await client.get("/slow")
+    assert timed_out.status == HTTPStatus.SERVICE_UNAVAILABLE
+    assert timed_out.headers["Retry-After"] == "1"
+
+    release.set()
+    assert (await first).status == HTTPStatus.OK
+    assert admission.stats.queued == admission.stats.rejected == 1
+
+
+async def test_slot_freed_on_error(aiohttp_client: Any) -> None:
+    admission = Admission(max_concurrent=1)
+
+    async def failing(request: web.Request) -> web.Response:
+        raise web.HTTPBadRequest()
+
+    application = web.Application(middlewares=[admission.middleware])
+    application.add_routes([web.get("/", failing)])
+    client = await aiohttp_client(application)
+
+    for _ in range(3):
+        assert (await client.get("/")).status == HTTPStatus.BAD_REQUEST
+    assert admission.active == 0
+    assert admission.stats.admitted == 3
@@ -0,0 +1,241 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator, Callable
+from datetime import timedelta
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+from ancv.web.backends import (
+    BackendError,
+    CacheBackend,
+    DiskBackend,
+    MemoryBackend,
+    RedisBackend,
+    RedisError,
+    backend_from_url,
+    encode_command,
+    read_reply,
+)
+
+
+class FakeRedis:
+    """A local stand-in for a Redis server, speaking just enough of the protocol."""
+
+    def __init__(self, password: Optional[str] = None) -> None:
+        self.password = password
+        self.data: dict[bytes, tuple[bytes, float]] = {}
+        self.commands: list[bytes] = []
+        self.connections = 0
+        self.server: Optional[asyncio.Server] = None
+
+    @property
+    def port(self) -> int:
+        assert self.server is not None
+        port: int = self.server.sockets[0].getsockname()[1]
+        return port
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self.serve, "127.0.0.1", 0)
+
+    async def stop(self) -> None:
+        assert self.server is not None
+        self.server.close()
+        self.server.close_clients()
+        await self.server.wait_closed()
+
+    async def serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.connections += 1
+        authenticated = self.password is None
+        try:
+            while True:
+                command = await read_reply(reader)
+                assert isinstance(command, list)
+                name, *args = command
+                assert isinstance(name, bytes)
+                self.commands.append(name)
+
+                if name == b"AUTH":
+                    authenticated = args[-1] == (self.password or "").encode()
+                    writer.write(b"+OK\r\n" if authenticated else b"-WRONGPASS\r\n")
+                elif not authenticated:
+                    writer.write(b"-NOAUTH Authentication required.\r\n")
+                elif name == b"GET":
+                    assert isinstance(args[0], bytes)
+                    value, expiry = self.data.get(args[0], (None, 0.0))
+                    if value is None or (expiry and expiry <= time.time()):
+                        writer.write(b"$-1\r\n")
+                    else:
+                        writer.write(b"$%d\r\n%s\r\n" % (len(value), value))
+                elif name == b"SET":
+                    key, value, *options = args
+                    assert isinstance(key, bytes) and isinstance(value, bytes)
+                    expiry = 0.0
+                    if options:
+                        assert options[0] == b"PX" and isinstance(options[1], bytes)
+                        expiry = time.time() + int(options[1]) / 1000
+                    self.data[key] = (value, expiry)
+                    writer.write(b"+OK\r\n")
+                elif name == b"DEL":
+                    assert isinstance(args[0], bytes)
+                    deleted = self.data.pop(args[0], None) is not None
+                    writer.write(b":%d\r\n" % deleted)
+                elif name == b"SELECT":
+                    writer.write(b"+OK\r\n")
+                else:
+                    writer.write(b"-ERR unknown command\r\n")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+@pytest.fixture
+async def redis() -> AsyncIterator[FakeRedis]:
+    server = FakeRedis()
+    await server.start()
+    yield server
+    await server.stop()
+
+
+@pytest.fixture(params=["memory", "disk", "redis"])
+async def backend(
+    request: pytest.FixtureRequest, tmp_path: Path, redis: FakeRedis
+) -> AsyncIterator[CacheBackend]:
+    factories: dict[str, Callable[[], CacheBackend]] = {
+        "memory": MemoryBackend,
+        "disk": lambda: DiskBackend(tmp_path),
+        "redis": lambda: RedisBackend(port=redis.port),
+    }
+    backend = factories[request.param]()
+    yield backend
+    await backend.close()
+
+
+async def test_roundtrip(backend: CacheBackend) -> None:
+    assert await backend.get("key") is None
+
+    await backend.set("key", b"value")
+    assert await backend.get("key") == b"value"
+
+    await backend.set("key", b"\r\nother\x00")
+    assert await backend.get("key") == b"\r\nother\x00"
+
+    await backend.delete("key")
+    assert await backend.get("key") is None
+
+    assert backend.stats.hits == 2
+    assert backend.stats.misses == 2
+
+
+async def test_expiry(backend: CacheBackend) -> None:
+    await backend.set("key", b"value", ttl=timedelta(seconds=0.05))
+    assert await backend.get("key") == b"value"
+
+    await asyncio.sleep(0.1)
+    assert await backend.get("key") is None
+
+
+async def test_memory_evicts_least_recently_used() -> None:
+    backend = MemoryBackend(maxsize=10)
+    await backend.set("a", b"12345")
+    await backend.set("b", b"12345")
+    await backend.get("a")
+    await backend.set("c", b"12345")
+
+    assert await backend.get("a") == b"12345"
+    assert await backend.get("b") is None
+    assert len(backend) == 2
+
+
+async def test_disk_survives_restart_and_evicts(tmp_path: Path) -> None:
+    backend = DiskBackend(tmp_path, maxsize=100)
+    await backend.set("a", b"x" * 40)
+    await backend.set("b", b"x" * 40)
+
+    restarted = DiskBackend(tmp_path, maxsize=100)
+    assert len(restarted) == 2
+    assert await restarted.get("a") == b"x" * 40
+
+    await restarted.set("c", b"x" * 40)  # Evicts "b", used least recently
+    assert await restarted.get("b") is None
+    assert not restarted.path("b").exists()
+    assert await restarted.get("c") == b"x" * 40
+
+
+async def test_redis_reuses_connections(redis: FakeRedis) -> None:
+    backend = RedisBackend(port=redis.port)
+    for _ in range(3):
+        await backend.set("key", b"value")
+        assert await backend.get("key") == b"value"
+    await backend.close()
+
+    assert redis.connections == 1
+
+
+async def test_redis_auth_and_select(redis: FakeRedis) -> None:
+    redis.password = "secret"
+
+    backend = RedisBackend.from_url(f"redis://:wrong@127.0.0.1:{redis.port}/2")
+    with pytest.raises(RedisError):
+        await backend.get("key")
+
+    backend = RedisBackend.from_url(f"redis://:secret@127.0.0.1:{redis.port}/2")
+    await backend.set("key", b"value")
+    assert await backend.get("key") == b"value"
+    assert redis.commands[-4:] == [b"AUTH", b"SELECT", b"SET", b"GET"]
+    await backend.close()
+
+
+async def test_redis_unreachable(redis: FakeRedis) -> None:
+    port = redis.port
+    await redis.stop()
+
+    backend = RedisBackend(port=port)
+    with pytest.raises(BackendError):
+        await backend.get("key")
+    assert backend.stats.errors == 1
+
+
+async def test_redis_timeout() -> None:
+    async def stall(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await reader.read()  # Never replies
+
+    server = await asyncio.start_server(stall, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    backend = RedisBackend(port=port, timeout=timedelta(seconds=0.05))
+    with pytest.raises(BackendError):
+        await backend.get("key")
+
+    server.close()
+    server.close_clients()
+    await server.wait_closed()
+
+
+def test_encode_command() -> None:
+    assert encode_command("GET", b"key") == b"*2\r\n$3\r\nGET\r\n$3\r\nkey\r\n"
+
+
+@pytest.mark.parametrize(
+    ["url", "expected"],
+    [
+        ("memory://", MemoryBackend),
+        ("file://{tmp_path}/cache", DiskBackend),
+        ("redis://localhost:6379/0", RedisBackend),
+    ],
+)
+def test_backend_from_url(
+    url: str, expected: type[CacheBackend], tmp_path: Path
+) -> None:
+    assert isinstance(backend_from_url(url.format(tmp_path=tmp_path)), expected)
+
+
+@pytest.mark.parametrize("url", ["http://localhost", "file://", "/tmp/cache"])
+def test_backend_from_url_unsupported(url: str) -> None:
+    with pytest.raises(ValueError):
+        backend_from_url(url)
@@ -0,0 +1,179 @@
+import json
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+from ancv import SIPrefix
+from ancv.data.models.github import File
+from ancv.data.models.resume import ResumeSchema
+from ancv.web.cache import (
+    CacheStats,
+    ContentCache,
+    GistIndex,
+    NegativeCache,
+    RenderCache,
+    RenderKey,
+)
+from ancv.web.compression import Variants
+
+
+@pytest.mark.parametrize(
+    ["raw_url", "expected"],
+    [
+        (
+            "https://gist.githubusercontent.com/alexpovel/e5e2fc4ae1b1ba8b9ae6a6d1dfbab8a5/raw/0b6a1d2e0a1c4f1bde3fd4b7a4e5f0f42f5c2c1d/resume.json",
+            "0b6a1d2e0a1c4f1bde3fd4b7a4e5f0f42f5c2c1d",
+        ),
+        ("https://gist.githubusercontent.com/alexpovel/e5e2fc4a/raw/resume.json", None),
+        ("https://example.com/", None),
+        (None, None),
+    ],
+)
+def test_file_revision(raw_url: Optional[str], expected: Optional[str]) -> None:
+    assert File(raw_url=raw_url).revision == expected
+
+
+class TestRenderCache:
+    def test_hits_and_misses(self) -> None:
+        cache = RenderCache(maxsize=10_000)
+        key = RenderKey(user="johndoe", revision="abc")
+
+        assert cache.get(key) is None
+        cache.put(key, Variants.of("rendered"))
+        assert cache.get(key) == Variants.of("rendered")
+        assert cache.get(RenderKey(user="johndoe", revision="def")) is None
+
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 2
+        assert cache.stats.ratio == pytest.approx(1 / 3)
+
+    def test_bounded_by_bytes(self) -> None:
+        rendered = Variants.of("x" * 1_000)
+        cache = RenderCache(maxsize=3_500)
+
+        for revision in "abcd":
+            cache.put(RenderKey(user="johndoe", revision=revision), rendered)
+
+        assert len(cache) == 3
+        assert cache.currsize <= 3_500
+        assert cache.get(RenderKey(user="johndoe", revision="a")) is None  # Evicted
+        assert cache.get(RenderKey(user="johndoe", revision="d")) == rendered
+
+    def test_too_large_is_skipped(self) -> None:
+        cache = RenderCache(maxsize=10)
+        key = RenderKey(user="johndoe", revision="abc")
+
+        cache.put(key, Variants.of("x" * 1_000))
+        assert cache.get(key) is None
+
+
+class TestNegativeCache:
+    def test_keyed_by_revision(self) -> None:
+        cache = NegativeCache()
+
+        cache.put("johndoe", revision=None, message="User johndoe not found.")
+        assert cache.get("johndoe") == "User johndoe not found."
+        assert cache.get("johndoe", revision="abc") is None
+
+        cache.put("johndoe", revision="abc", message="Got malformed JSON.")
+        assert cache.get("johndoe", revision="abc") == "Got malformed JSON."
+        assert cache.get("johndoe", revision="def") is None  # Changed revision
+        assert cache.get("johndoe") is None
+
+        cache.discard("johndoe")
+        assert cache.get("johndoe", revision="abc") is None
+        assert cache.stats == CacheStats(hits=2, misses=4)
+
+    def test_expires(self) -> None:
+        cache = NegativeCache(ttl=timedelta(seconds=0.05))
+
+        cache.put("johndoe", revision=None, message="User johndoe not found.")
+        time.sleep(0.1)
+        assert cache.get("johndoe") is None
+
+    def test_bounded(self) -> None:
+        cache = NegativeCache(maxsize=2)
+
+        for user in ["a", "b", "c"]:
+            cache.put(user, revision=None, message="Not found.")
+
+        assert len(cache) == 2
+        assert cache.get("a") is None
+
+
+class TestGistIndex:
+    def test_roundtrip(self, tmp_path: Path) -> None:
+        path = tmp_path / "index.json"
+
+        index = GistIndex()
+        index["johndoe"] = "abc"
+        index["janedoe"] = "def"
+        index.save(path)
+
+        assert dict(GistIndex.load(path)) == {"johndoe": "abc", "janedoe": "def"}
+
+    def test_missing_file(self, tmp_path: Path) -> None:
+        assert len(GistIndex.load(tmp_path / "missing.json")) == 0
+
+    @pytest.mark.parametrize("content", ["not json", "[]", "null"])
+    def test_unreadable_file(self, content: str, tmp_path: Path) -> None:
+        path = tmp_path / "index.json"
+        path.write_text(content, encoding="utf8")
+
+        assert len(GistIndex.load(path)) == 0
+
+    def test_bounded(self) -> None:
+        index = GistIndex(maxsize=2)
+        for user in ["a", "b", "c"]:
+            index[user] = user
+
+        assert list(index) == ["b", "c"]
+
+
+class TestContentCache:
+    @staticmethod
+    def entry(name: str) -> tuple[bytes, ResumeSchema]:
+        raw = json.dumps({"basics": {"name": name}}).encode()
+        return raw, ResumeSchema(**json.loads(raw))
+
+    async def test_hits_and_misses(self) -> None:
+        cache = ContentCache(maxsize=1 * SIPrefix.MEGA)
+
+        assert await cache.get("https://example.com/a") is None
+        await cache.put("https://example.com/a", *self.entry("A"))
+        resume = await cache.get("https://example.com/a")
+
+        assert resume is not None and resume.basics is not None
+        assert resume.basics.name == "A"
+        assert cache.stats == CacheStats(hits=1, misses=1)
+
+    async def test_evicted_without_spill(self) -> None:
+        cache = ContentCache(maxsize=200)
+        for name in "ABCDEFGHIJ":
+            await cache.put(f"https://example.com/{name}", *self.entry(name))
+
+        assert await cache.get("https://example.com/A") is None
+        assert await cache.get("https://example.com/J") is not None
+
+    async def test_spills_to_disk(self, tmp_path: Path) -> None:
+        cache = ContentCache(maxsize=200, spill=tmp_path)
+        for name in "ABCDEFGHIJ":
+            await cache.put(f"https://example.com/{name}", *self.entry(name))
+
+        assert len(cache) < 10
+        assert any(tmp_path.iterdir())
+
+        resume = await cache.get("https://example.com/A")
+        assert resume is not None and resume.basics is not None
+        assert resume.basics.name == "A"
+
+    async def test_spill_is_bounded(self, tmp_path: Path) -> None:
+        cache = ContentCache(maxsize=200, spill=tmp_path, spill_maxsize=100)
+        for name in "ABCDEFGHIJ":
+            await cache.put(f"https://example.com/{name}", *self.entry(name))
+
+        assert sum(p.stat().st_size for p in tmp_path.iterdir()) <= 100
+        assert await cache.get("https://example.com/A") is None
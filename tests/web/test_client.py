@@ -1,17 +1,37 @@
 import asyncio
+import json
 from contextlib import AbstractContextManager
 from contextlib import nullcontext as does_not_raise
+from http import HTTPStatus
+from typing import Any, Optional
 
 import aiohttp
 import pytest
+from aiohttp import web
 from gidgethub.aiohttp import GitHubAPI
 
 from ancv import SIPrefix
 from ancv.exceptions import ResumeLookupError
 from ancv.reflection import METADATA
 from ancv.timing import Stopwatch
-from ancv.web.client import get_resume
+from ancv.web.cache import (
+    CacheStats,
+    ContentCache,
+    GistIndex,
+    ValidatorCache,
+    ValidatorStats,
+)
+from ancv.web.client import (
+    GitHubClient,
+    download,
+    fetch_resume,
+    get_resume,
+    get_resume_file,
+    parse_link_header,
+    scan_gists,
+)
 from tests import GH_TOKEN, gh_rate_limited
+from tests.web.conftest import FakeGitHub
 
 
 @pytest.fixture(scope="function")
@@ -96,3 +116,319 @@ async def test_get_resume_validations(
             filename=filename,
             size_limit=size_limit,
         )
+
+
+async def test_github_client_revalidates_cached_responses(
+    aiohttp_server: Any,
+) -> None:
+    etag = '"v1"'
+    hitcount = 0
+
+    async def handler(request: web.Request) -> web.Response:
+        nonlocal hitcount
+        hitcount += 1
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=HTTPStatus.NOT_MODIFIED)
+        return web.json_response({"etag": etag}, headers={"ETag": etag})
+
+    app = web.Application()
+    app.router.add_get("/item", handler)
+    server = await aiohttp_server(app)
+
+    cache = ValidatorCache(maxsize=1 * SIPrefix.MEGA)
+    async with aiohttp.ClientSession() as session:
+        github = GitHubClient(
+            session,
+            requester=f"{METADATA.name}-PYTEST-REQUESTER",
+            cache=cache,
+            base_url=str(server.make_url("")),
+        )
+
+        assert await github.getitem("/item") == {"etag": '"v1"'}
+        assert cache.stats == ValidatorStats(hits=0, misses=1, revalidations=0)
+
+        assert await github.getitem("/item") == {"etag": '"v1"'}
+        assert cache.stats == ValidatorStats(hits=1, misses=1, revalidations=1)
+
+        etag = '"v2"'
+        assert await github.getitem("/item") == {"etag": '"v2"'}
+        assert cache.stats == ValidatorStats(hits=1, misses=1, revalidations=2)
+
+    assert hitcount == 3
+    assert 0 < cache.currsize < 1 * SIPrefix.MEGA
+
+
+async def test_get_resume_file_uses_index(
+    fake_github: FakeGitHub, fake_github_api: GitHubClient
+) -> None:
+    resume = fake_github.add_gist("johndoe", {"resume.json": b"{}"})
+    for i in range(100):  # Pushes the resume onto the second page
+        fake_github.add_gist("johndoe", {f"other-{i}.txt": b""})
+
+    index = GistIndex()
+
+    file = await get_resume_file(
+        user="johndoe", github=fake_github_api, stopwatch=Stopwatch(), index=index
+    )
+    assert file.filename == "resume.json"
+    assert index["johndoe"] == resume["id"]
+    assert len(fake_github.requests) == 2  # Two pages of gists
+
+    fake_github.requests.clear()
+    indexed = await get_resume_file(
+        user="johndoe", github=fake_github_api, stopwatch=Stopwatch(), index=index
+    )
+    assert indexed.raw_url == file.raw_url
+    assert fake_github.requests == [f"/gists/{resume['id']}"]
+
+
+async def test_get_resume_file_falls_back_to_scan(
+    fake_github: FakeGitHub, fake_github_api: GitHubClient
+) -> None:
+    stale = fake_github.add_gist("johndoe", {"notes.txt": b""})
+    resume = fake_github.add_gist("johndoe", {"resume.json": b"{}"})
+
+    index = GistIndex()
+    index["johndoe"] = stale["id"]  # E.g. `resume.json` was moved to another gist
+
+    file = await get_resume_file(
+        user="johndoe", github=fake_github_api, stopwatch=Stopwatch(), index=index
+    )
+    assert file.filename == "resume.json"
+    assert index["johndoe"] == resume["id"]
+    assert fake_github.requests == [
+        f"/gists/{stale['id']}",
+        "/users/johndoe/gists?per_page=100",
+    ]
+
+
+async def test_get_resume_file_concurrent_fallbacks(
+    fake_github: FakeGitHub, fake_github_api: GitHubClient
+) -> None:
+    stale = fake_github.add_gist("johndoe", {"notes.txt": b""})
+    resume = fake_github.add_gist("johndoe", {"resume.json": b"{}"})
+
+    index = GistIndex()
+    index["johndoe"] = stale["id"]
+
+    # The first to find the entry stale drops it, which mustn't trip up the second:
+    files = await asyncio.gather(
+        *(
+            get_resume_file(
+                user="johndoe",
+                github=fake_github_api,
+                stopwatch=Stopwatch(),
+                index=index,
+            )
+            for _ in range(2)
+        )
+    )
+    assert [file.filename for file in files] == ["resume.json"] * 2
+    assert index["johndoe"] == resume["id"]
+
+
+@pytest.mark.parametrize(
+    ["truncate_above", "expected_raw_requests"],
+    [
+        (1_000_000, 0),  # Inline content is used
+        (1, 1),  # Truncated inline content needs the raw file
+    ],
+)
+async def test_fetch_resume_uses_inline_content(
+    truncate_above: int,
+    expected_raw_requests: int,
+    fake_github: FakeGitHub,
+    fake_github_api: GitHubClient,
+    session: aiohttp.ClientSession,
+) -> None:
+    resume = fake_github.add_gist(
+        "johndoe", {"resume.json": b'{"basics": {"name": "John Doe"}}'}
+    )
+    fake_github.truncate_above = truncate_above
+
+    index = GistIndex()
+    index["johndoe"] = resume["id"]
+
+    file = await get_resume_file(
+        user="johndoe", github=fake_github_api, stopwatch=Stopwatch(), index=index
+    )
+    parsed = await fetch_resume(file=file, session=session, stopwatch=Stopwatch())
+
+    assert parsed.basics is not None and parsed.basics.name == "John Doe"
+    raw_requests = [r for r in fake_github.requests if r.startswith("/raw/")]
+    assert len(raw_requests) == expected_raw_requests
+
+
+async def test_fetch_resume_uses_content_cache(
+    fake_github: FakeGitHub,
+    fake_github_api: GitHubClient,
+    session: aiohttp.ClientSession,
+) -> None:
+    fake_github.add_gist("johndoe", {"resume.json": b'{"basics": {"name": "John"}}'})
+    cache = ContentCache(maxsize=1 * SIPrefix.MEGA)
+
+    file = await get_resume_file(
+        user="johndoe", github=fake_github_api, stopwatch=Stopwatch()
+    )
+    for _ in range(3):
+        resume = await fetch_resume(
+            file=file, session=session, stopwatch=Stopwatch(), cache=cache
+        )
+        assert resume.basics is not None and resume.basics.name == "John"
+
+    assert len([r for r in fake_github.requests if r.startswith("/raw/")]) == 1
+    assert cache.stats == CacheStats(hits=2, misses=1)
+
+
+@pytest.mark.parametrize(
+    ["header", "expected"],
+    [
+        (None, {}),
+        ("", {}),
+        (
+            '<https://api.github.com/user/1/gists?page=2>; rel="next",'
+            + ' <https://api.github.com/user/1/gists?page=5>; rel="last"',
+            {
+                "next": "https://api.github.com/user/1/gists?page=2",
+                "last": "https://api.github.com/user/1/gists?page=5",
+            },
+        ),
+    ],
+)
+def test_parse_link_header(header: Optional[str], expected: dict[str, str]) -> None:
+    assert parse_link_header(header) == expected
+
+
+async def test_scan_gists_fetches_pages_concurrently(
+    fake_github: FakeGitHub, fake_github_api: GitHubClient
+) -> None:
+    resume = fake_github.add_gist("johndoe", {"resume.json": b"{}"})
+    for i in range(450):  # Puts the resume onto the fifth and last page
+        fake_github.add_gist("johndoe", {f"other-{i}.txt": b""})
+
+    gist, _ = await scan_gists(
+        "johndoe", github=fake_github_api, filename="resume.json"
+    )
+
+    assert gist.id == resume["id"]
+    assert fake_github.requests[0] == "/users/johndoe/gists?per_page=100"
+    assert sorted(fake_github.requests[1:]) == [
+        f"/users/johndoe/gists?per_page=100&page={page}" for page in range(2, 6)
+    ]
+
+
+@pytest.mark.parametrize("forget_last_pages", [False, True])
+async def test_scan_gists_revalidated(
+    fake_github: FakeGitHub, forget_last_pages: bool
+) -> None:
+    fake_github.etags = True
+    resume = fake_github.add_gist("johndoe", {"resume.json": b"{}"})
+    for i in range(150):  # Puts the resume onto the second and last page
+        fake_github.add_gist("johndoe", {f"other-{i}.txt": b""})
+
+    cache = ValidatorCache(maxsize=16 * SIPrefix.MEGA)
+    async with aiohttp.ClientSession() as session:
+        github = GitHubClient(
+            session, requester="test", cache=cache, base_url=fake_github.base_url
+        )
+        for _ in range(2):
+            gist, _ = await scan_gists("johndoe", github=github, filename="resume.json")
+            assert gist.id == resume["id"]
+            if forget_last_pages:  # E.g. evicted by lots of other users' lookups
+                github._last_pages.clear()
+
+    assert cache.stats.hits == 2  # Both pages were revalidated the second time
+    assert fake_github.requests == 2 * [
+        "/users/johndoe/gists?per_page=100",
+        "/users/johndoe/gists?per_page=100&page=2",
+    ]
+
+
+async def test_scan_gists_stops_at_first_match(
+    fake_github: FakeGitHub, fake_github_api: GitHubClient
+) -> None:
+    fake_github.add_gist("johndoe", {"resume.json": b"{}"})
+    for i in range(800):
+        fake_github.add_gist("johndoe", {f"other-{i}.txt": b""})
+    newer = fake_github.add_gist("johndoe", {"resume.json": b"{}"})
+    for i in range(150):  # Pushes the newer resume onto the second page
+        fake_github.add_gist("johndoe", {f"newer-{i}.txt": b""})
+
+    gist, _ = await scan_gists(
+        "johndoe", github=fake_github_api, filename="resume.json"
+    )
+
+    # Of ten pages, only the first few are fetched (some concurrently, in vain).
+    assert gist.id == newer["id"]
+    assert len(fake_github.requests) < 10
+
+
+async def test_scan_gists_validates_only_match(
+    fake_github: FakeGitHub, fake_github_api: GitHubClient
+) -> None:
+    resume = fake_github.add_gist("johndoe", {"resume.json": b"{}"})
+    other = fake_github.add_gist("johndoe", {"other.txt": b""})
+    other["owner"]["avatar_url"] = "not a URL"  # Would fail validation
+
+    gist, file = await scan_gists(
+        "johndoe", github=fake_github_api, filename="resume.json"
+    )
+
+    assert gist.id == resume["id"]
+    assert file.filename == "resume.json"
+
+
+async def test_fetch_resume_caps_download(
+    fake_github: FakeGitHub,
+    fake_github_api: GitHubClient,
+    session: aiohttp.ClientSession,
+) -> None:
+    content = json.dumps({"basics": {"summary": "x" * 10_000}}).encode()
+    gist = fake_github.add_gist("johndoe", {"resume.json": content})
+    gist["files"]["resume.json"]["size"] = 10  # Lies
+
+    file = await get_resume_file(
+        user="johndoe", github=fake_github_api, stopwatch=Stopwatch()
+    )
+
+    with pytest.raises(ResumeLookupError, match="too large"):
+        await fetch_resume(
+            file=file,
+            session=session,
+            stopwatch=Stopwatch(),
+            size_limit=1_000,
+        )
+
+    resume = await fetch_resume(file=file, session=session, stopwatch=Stopwatch())
+    assert resume.basics is not None and resume.basics.summary == "x" * 10_000
+
+
+@pytest.mark.parametrize(
+    ["size_limit", "expectation"],
+    [
+        (100_000, does_not_raise()),
+        (50_000, pytest.raises(ResumeLookupError, match="too large")),
+    ],
+)
+async def test_download_streams_without_content_length(
+    size_limit: int, expectation: AbstractContextManager[Any], aiohttp_server: Any
+) -> None:
+    async def handler(request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse()
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        for _ in range(10):
+            await response.write(b"x" * 10_000)
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/raw", handler)
+    server = await aiohttp_server(app)
+
+    async with aiohttp.ClientSession() as session:
+        with expectation:
+            body = await download(
+                session, str(server.make_url("/raw")), size_limit=size_limit
+            )
+            assert body == b"x" * 100_000
@@ -0,0 +1,108 @@
+import gzip
+from http import HTTPStatus
+from typing import Optional
+
+import pytest
+from aiohttp.test_utils import make_mocked_request
+
+from ancv.web.compression import (
+    Variants,
+    etag,
+    negotiate,
+    not_modified,
+    parse_accept_encoding,
+)
+
+
+@pytest.mark.parametrize(
+    ["header", "expected"],
+    [
+        ("", {}),
+        ("gzip", {"gzip": 1.0}),
+        ("gzip, deflate, br", {"gzip": 1.0, "deflate": 1.0, "br": 1.0}),
+        ("GZIP;q=0.5, identity;q=0", {"gzip": 0.5, "identity": 0.0}),
+        ("deflate;q=0.5, gzip;q=1.0, *;q=0.1", {"deflate": 0.5, "gzip": 1.0, "*": 0.1}),
+        ("gzip;q=invalid", {"gzip": 0.0}),
+    ],
+)
+def test_parse_accept_encoding(header: str, expected: dict[str, float]) -> None:
+    assert parse_accept_encoding(header) == expected
+
+
+@pytest.mark.parametrize(
+    ["header", "expected"],
+    [
+        ("", None),
+        ("identity", None),
+        ("deflate, br", None),
+        ("gzip", "gzip"),
+        ("gzip, deflate, br", "gzip"),
+        ("gzip;q=0", None),
+        ("zstd, gzip;q=0.5", "gzip"),
+        ("*", "gzip"),
+        ("*, gzip;q=0", None),
+    ],
+)
+def test_negotiate(header: str, expected: Optional[str]) -> None:
+    variants = Variants.of("Hello, World! " * 100)
+
+    encoding, body = variants.negotiate(header)
+
+    assert encoding == expected
+    if encoding is None:
+        assert body == variants.identity
+    elif encoding == "gzip":
+        assert gzip.decompress(body) == variants.identity
+
+
+def test_variants_compress() -> None:
+    variants = Variants.of("\x1b[1mJohn Doe\x1b[0m\n" * 1_000)
+
+    assert variants.text.encode("utf-8") == variants.identity
+    assert all(len(body) < len(variants.identity) for body in variants.encoded.values())
+    assert variants.size > len(variants.identity)
+
+
+@pytest.mark.parametrize(
+    ["if_none_match", "accept_encoding", "expected"],
+    [
+        (None, "", False),
+        ('"abc"', "", True),
+        ('W/"abc"', "", True),
+        ('"other", "abc"', "", True),
+        ("*", "", True),
+        ('"other"', "", False),
+        ('"abc"', "gzip", False),
+        ('"abc-gzip"', "gzip", True),
+    ],
+)
+def test_not_modified(
+    if_none_match: Optional[str], accept_encoding: str, expected: bool
+) -> None:
+    headers = {"Accept-Encoding": accept_encoding}
+    if if_none_match is not None:
+        headers["If-None-Match"] = if_none_match
+    request = make_mocked_request("GET", "/", headers=headers)
+
+    response = not_modified(request, "abc")
+
+    if expected:
+        assert response is not None
+        assert response.status == HTTPStatus.NOT_MODIFIED
+        assert response.headers["ETag"] == etag("abc", negotiate(accept_encoding))
+    else:
+        assert response is None
+
+
+def test_respond_etag() -> None:
+    variants = Variants.of("Hello, World!")
+
+    response = variants.respond(make_mocked_request("GET", "/"))
+    assert response.headers["ETag"] == f'"{variants.tag}"'
+
+    request = make_mocked_request(
+        "GET", "/", headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert variants.respond(request).status == HTTPStatus.NOT_MODIFIED
+
+    assert Variants.of("Hello, World?").tag != variants.tag
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from typing import Optional
+
+import pytest
+
+from ancv.web.governor import Governor, GovernorMode, Quota, QuotaExhaustedError
+
+
+def governor(
+    remaining: Optional[int], reset_in: float = 3600, **kwargs: int
+) -> Governor:
+    governor = Governor(queue_below=0.2, cache_only_below=0.02, **kwargs)
+    if remaining is not None:
+        quota = Quota(remaining=remaining, limit=5000, reset=time.time() + reset_in)
+        governor.quota = lambda: quota
+    return governor
+
+
+@pytest.mark.parametrize(
+    ["remaining", "reset_in", "expected"],
+    [
+        (None, 3600, GovernorMode.NORMAL),
+        (5000, 3600, GovernorMode.NORMAL),
+        (1000, 3600, GovernorMode.NORMAL),
+        (999, 3600, GovernorMode.QUEUEING),
+        (100, 3600, GovernorMode.QUEUEING),
+        (99, 3600, GovernorMode.CACHE_ONLY),
+        (0, 3600, GovernorMode.CACHE_ONLY),
+        (0, -1, GovernorMode.NORMAL),  # Reset since
+    ],
+)
+def test_mode(
+    remaining: Optional[int], reset_in: float, expected: GovernorMode
+) -> None:
+    assert governor(remaining, reset_in).mode is expected
+
+
+def test_thresholds_in_order() -> None:
+    with pytest.raises(ValueError):
+        Governor(queue_below=0.1, cache_only_below=0.2)
+
+
+async def test_cache_only_refuses() -> None:
+    g = governor(remaining=0, reset_in=30)
+
+    for warm in [True, False]:
+        with pytest.raises(QuotaExhaustedError) as e:
+            async with g.admit(warm=warm):
+                pass
+        assert 29 <= e.value.retry_after <= 30
+
+    assert g.stats.rejected == 2
+
+
+async def test_queueing() -> None:
+    g = governor(remaining=500, max_concurrent_cold=1, max_queued=1)
+    running: list[str] = []
+    release = asyncio.Event()
+
+    async def lookup(name: str, warm: bool) -> None:
+        async with g.admit(warm=warm):
+            running.append(name)
+            await release.wait()
+
+    cold = asyncio.create_task(lookup("cold", warm=False))
+    queued = asyncio.create_task(lookup("queued", warm=False))
+    warm = asyncio.create_task(lookup("warm", warm=True))
+    await asyncio.sleep(0)
+
+    assert running == ["cold", "warm"]  # Warm ones don't queue
+    assert g.status()["queued"] == 1
+
+    with pytest.raises(QuotaExhaustedError):  # Queue is full
+        async with g.admit(warm=False):
+            pass
+
+    release.set()
+    await asyncio.gather(cold, queued, warm)
+
+    assert running == ["cold", "warm", "queued"]
+    assert g.stats.queued == 2
+    assert g.stats.admitted == 3
+    assert g.stats.rejected == 1
+
+
+def test_status() -> None:
+    status = governor(remaining=50).status()
+
+    assert status["mode"] == "cache-only"
+    assert status["quota"]["remaining"] == 50
+    assert status["quota"]["limit"] == 5000
+    assert governor(remaining=None).status()["quota"] is None
@@ -0,0 +1,120 @@
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+from typing import Optional
+
+import pytest
+
+from ancv.web.governor import Quota
+from ancv.web.hot import RefreshScheduler, SpaceSaving
+
+
+def test_space_saving_finds_heavy_hitters() -> None:
+    rng = random.Random(42)
+    stream = ["hot"] * 500 + ["warm"] * 200 + [f"cold{i}" for i in range(2_000)]
+    rng.shuffle(stream)
+
+    counter: SpaceSaving[str] = SpaceSaving(capacity=50)
+    for item in stream:
+        counter.add(item)
+
+    assert len(counter) == 50
+    (first, first_count), (second, second_count) = counter.top(2)
+    assert (first, second) == ("hot", "warm")
+    # Overestimates at most:
+    assert first_count >= Counter(stream)["hot"]
+    assert second_count >= Counter(stream)["warm"]
+
+
+def test_space_saving_decay() -> None:
+    counter: SpaceSaving[str] = SpaceSaving()
+    for _ in range(4):
+        counter.add("a")
+    counter.add("b")
+
+    counter.decay()
+
+    assert counter.top(2) == [("a", 2)]
+    assert "b" not in counter
+
+
+def test_space_saving_capacity() -> None:
+    with pytest.raises(ValueError):
+        SpaceSaving(capacity=0)
+
+
+def scheduler(
+    due: set[str],
+    refreshed: list[str],
+    quota: Optional[Quota] = None,
+    top_k: int = 50,
+) -> RefreshScheduler[str]:
+    async def refresh(user: str) -> None:
+        refreshed.append(user)
+        due.discard(user)
+
+    return RefreshScheduler(
+        due=lambda user: user in due,
+        refresh=refresh,
+        quota=lambda: quota,
+        top_k=top_k,
+        min_spacing=timedelta(0),
+    )
+
+
+async def test_scan_refreshes_due_top_users() -> None:
+    refreshed: list[str] = []
+    s = scheduler(due={"a", "c", "d"}, refreshed=refreshed, top_k=3)
+    for user, requests in [("a", 5), ("b", 4), ("c", 3), ("d", 1)]:
+        for _ in range(requests):
+            s.record(user)
+
+    assert await s.scan() == 2
+    assert refreshed == ["a", "c"]  # Not "d", which isn't among the top 3
+    assert await s.scan() == 0
+    assert s.stats.refreshed == 2
+
+
+async def test_scan_survives_failed_refresh() -> None:
+    refreshed: list[str] = []
+    s = scheduler(due={"a", "b"}, refreshed=refreshed)
+    inner = s.refresh
+
+    async def refresh(user: str) -> None:
+        if user == "a":
+            raise RuntimeError("GitHub is down")
+        await inner(user)
+
+    s.refresh = refresh
+    s.record("a")
+    s.record("a")
+    s.record("b")
+
+    assert await s.scan() == 1
+    assert refreshed == ["b"]
+    assert s.stats.failed == 1
+    assert s.stats.refreshed == 1
+
+
+@pytest.mark.parametrize(
+    ["remaining", "reset_in", "expected"],
+    [
+        (None, 0, 1),  # Unknown: minimum
+        (1000, 3600, 36),  # 100 refreshes allowed over the hour
+        (100_000, 3600, 1),  # Never below minimum
+        (5, 3600, 3600),  # Less than one refresh allowed: wait for reset
+        (0, -1, 1),  # Reset already
+    ],
+)
+def test_spacing(remaining: Optional[int], reset_in: float, expected: float) -> None:
+    quota = (
+        None
+        if remaining is None
+        else Quota(remaining=remaining, limit=5000, reset=time.time() + reset_in)
+    )
+    s = scheduler(due=set(), refreshed=[], quota=quota)
+    s.min_spacing = timedelta(seconds=1)
+    s.budget_share = 0.1
+
+    assert s.spacing() == pytest.approx(expected, rel=0.01)
@@ -0,0 +1,84 @@
+from datetime import timedelta
+from http import HTTPStatus
+from typing import Any
+
+import pytest
+from aiohttp import web
+
+from ancv.web.metrics import Histogram, Metrics
+
+
+def test_histogram() -> None:
+    histogram = Histogram(buckets=[0.1, 1.0])
+
+    for value in [0.05, 0.1, 0.5, 5.0]:
+        histogram.observe(value)
+
+    assert list(histogram.samples("h", {"segment": "x"})) == [
+        'h_bucket{segment="x",le="0.1"} 2',
+        'h_bucket{segment="x",le="1"} 3',
+        'h_bucket{segment="x",le="+Inf"} 4',
+        'h_sum{segment="x"} 5.65',
+        'h_count{segment="x"} 4',
+    ]
+
+
+def test_expose() -> None:
+    metrics = Metrics()
+    metrics.observe({"Fetching Gists": timedelta(milliseconds=30)})
+    metrics.requests[200] += 2
+    metrics.gauge("ratio", "A ratio.", lambda: {"a": 0.5, "b": 1}, label="cache")
+    metrics.gauge("unknown", "Not known yet.", lambda: None)
+    metrics.counter("things_total", "Things done.", lambda: 3)
+    metrics.histogram("wait_seconds", "Waits.", buckets=[1.0]).observe(0.5)
+
+    exposed = metrics.expose().splitlines()
+
+    assert "# TYPE ancv_requests_total counter" in exposed
+    assert 'ancv_requests_total{status="200"} 2' in exposed
+    assert "ancv_requests_in_flight 0" in exposed
+    assert (
+        'ancv_segment_duration_seconds_bucket{segment="Fetching Gists",le="0.05"} 1'
+        in exposed
+    )
+    assert 'ancv_ratio{cache="a"} 0.5' in exposed
+    assert 'ancv_ratio{cache="b"} 1' in exposed
+    assert "# TYPE ancv_unknown gauge" in exposed
+    assert not any(line.startswith("ancv_unknown") for line in exposed)
+    assert "# TYPE ancv_things_total counter" in exposed
+    assert "ancv_things_total 3" in exposed
+    assert "# TYPE ancv_wait_seconds histogram" in exposed
+    assert 'ancv_wait_seconds_bucket{le="1"} 1' in exposed
+    assert "ancv_wait_seconds_count 1" in exposed
+
+
+@pytest.mark.filterwarnings("ignore:Exception ignored in")
+async def test_middleware(aiohttp_client: Any) -> None:
+    metrics = Metrics()
+
+    async def ok(request: web.Request) -> web.Response:
+        assert metrics.in_flight == 1
+        return web.Response()
+
+    async def missing(request: web.Request) -> web.Response:
+        raise web.HTTPNotFound()
+
+    app = web.Application(middlewares=[metrics.middleware])
+    app.add_routes(
+        [
+            web.get("/ok", ok),
+            web.get("/missing", missing),
+            web.get("/-/metrics", metrics.handle),
+        ]
+    )
+    client = await aiohttp_client(app)
+
+    await client.get("/ok")
+    await client.get("/missing")
+    resp = await client.get("/-/metrics")
+
+    assert resp.status == HTTPStatus.OK
+    assert resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert metrics.requests == {200: 2, 404: 1}  # Including `/-/metrics` itself
+    assert metrics.in_flight == 0
+    assert 'ancv_requests_total{status="404"} 1' in await resp.text()
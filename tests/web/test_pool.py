@@ -0,0 +1,82 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from ancv.data.models.resume import ResumeSchema
+from ancv.visualization.templates import Template
+from ancv.web.pool import PoolKind, RenderPool, RenderPoolFullError
+from tests import RESUMES
+
+
+@pytest.fixture(scope="module")
+def resume() -> ResumeSchema:
+    return Template.from_file(RESUMES["full.resume.json"]).model
+
+
+@pytest.mark.parametrize("kind", list(PoolKind))
+async def test_renders_like_template(kind: PoolKind, resume: ResumeSchema) -> None:
+    pool = RenderPool(kind=kind)
+    try:
+        rendered = await pool.render(resume)
+    finally:
+        pool.shutdown()
+
+    assert rendered == Template.from_model_config(resume).render()
+    assert pool.stats.completed == 1
+    assert pool.stats.pending == 0
+
+
+@pytest.mark.parametrize("kind", list(PoolKind))
+async def test_render_sections(kind: PoolKind, resume: ResumeSchema) -> None:
+    pool = RenderPool(kind=kind)
+    try:
+        sections = [section async for section in pool.render_sections(resume)]
+    finally:
+        pool.shutdown()
+
+    template = Template.from_model_config(resume)
+    assert "".join(sections) == template.render()
+    if kind is PoolKind.THREAD:
+        assert sections == list(template.render_sections())
+    assert pool.stats.completed == 1
+    assert pool.stats.pending == 0
+
+
+async def test_rejects_when_full(resume: ResumeSchema) -> None:
+    pool = RenderPool(max_workers=1, max_pending=2)
+    waits: list[timedelta] = []
+    pool.on_wait = waits.append
+    try:
+        results = await asyncio.gather(
+            *(pool.render(resume) for _ in range(5)), return_exceptions=True
+        )
+    finally:
+        pool.shutdown()
+
+    assert sum(isinstance(r, str) for r in results) == 2
+    assert sum(isinstance(r, RenderPoolFullError) for r in results) == 3
+    assert pool.stats.rejected == 3
+    assert pool.stats.completed == 2
+    assert len(waits) == 2
+    assert sum(waits, timedelta()) == pool.stats.wait
+
+
+async def test_does_not_block_event_loop(resume: ResumeSchema) -> None:
+    pool = RenderPool()
+    ticks = 0
+
+    async def tick() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    ticker = asyncio.create_task(tick())
+    try:
+        await pool.render(resume)
+    finally:
+        ticker.cancel()
+        pool.shutdown()
+
+    assert ticks > 1
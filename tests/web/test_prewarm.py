@@ -0,0 +1,60 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from ancv.web.prewarm import Prewarmer, parse_usernames, read_usernames
+
+
+@pytest.mark.parametrize(
+    ["lines", "expected"],
+    [
+        ([], []),
+        ([""], []),
+        (["johndoe"], ["johndoe"]),
+        (["johndoe\n", "janedoe\n"], ["johndoe", "janedoe"]),
+        (["johndoe, janedoe"], ["johndoe", "janedoe"]),
+        (["# Most popular first\n", "johndoe  # The author\n"], ["johndoe"]),
+        (["johndoe", "johndoe"], ["johndoe"]),
+        (["-invalid-", "johndoe"], ["johndoe"]),
+    ],
+)
+def test_parse_usernames(lines: list[str], expected: list[str]) -> None:
+    assert parse_usernames(lines) == expected
+
+
+def test_read_usernames(tmp_path: Path) -> None:
+    path = tmp_path / "users.txt"
+    path.write_text("johndoe\n\njanedoe\n", encoding="utf8")
+
+    assert read_usernames(path) == ["johndoe", "janedoe"]
+
+
+def test_nothing_to_do_is_done() -> None:
+    assert Prewarmer([]).done.is_set()
+    assert not Prewarmer(["johndoe"]).done.is_set()
+
+
+async def test_run() -> None:
+    users = [f"user{i}" for i in range(10)]
+    prewarmer = Prewarmer(users, max_concurrency=3)
+    running = 0
+    most_running = 0
+    warmed: list[str] = []
+
+    async def warm(user: str) -> None:
+        nonlocal running, most_running
+        running += 1
+        most_running = max(most_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if user == "user3":
+            raise RuntimeError("Boom.")
+        warmed.append(user)
+
+    await prewarmer.run(warm)
+
+    assert prewarmer.done.is_set()
+    assert most_running == 3
+    assert sorted(warmed) == sorted(set(users) - {"user3"})
+    assert prewarmer.status() == {"done": True, "users": 10, "warmed": 9, "failed": 1}
@@ -0,0 +1,103 @@
+from http import HTTPStatus
+from typing import Any, Optional
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import make_mocked_request
+
+from ancv.web.ratelimit import RateLimiter, client_address
+
+
+class Transport:
+    """Just enough of a transport for `Request.remote`."""
+
+    def __init__(self, peer: str) -> None:
+        self.peer = peer
+
+    def get_extra_info(self, name: str, default: Any = None) -> Any:
+        return (self.peer, 12345) if name == "peername" else default
+
+
+@pytest.mark.parametrize(
+    ["forwarded", "trusted_proxies", "expected"],
+    [
+        (None, 0, "192.0.2.1"),
+        (None, 1, "192.0.2.1"),
+        ("198.51.100.7", 0, "192.0.2.1"),  # Not trusted
+        ("198.51.100.7", 1, "198.51.100.7"),  # As set by Caddy
+        ("203.0.113.9, 198.51.100.7", 1, "198.51.100.7"),  # First one is spoofed
+        ("203.0.113.9, 198.51.100.7", 2, "203.0.113.9"),
+        ("198.51.100.7", 2, "198.51.100.7"),
+        (" , ", 1, "192.0.2.1"),
+    ],
+)
+def test_client_address(
+    forwarded: Optional[str], trusted_proxies: int, expected: str
+) -> None:
+    headers = {} if forwarded is None else {"X-Forwarded-For": forwarded}
+    request = make_mocked_request(
+        "GET", "/", headers=headers, transport=Transport("192.0.2.1")
+    )
+
+    assert client_address(request, trusted_proxies) == expected
+
+
+def test_invalid() -> None:
+    with pytest.raises(ValueError):
+        RateLimiter(rate=0)
+    with pytest.raises(ValueError):
+        RateLimiter(burst=0)
+
+
+def test_burst_then_rate(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 1000.0
+    monkeypatch.setattr("ancv.web.ratelimit.time.monotonic", lambda: now)
+    limiter = RateLimiter(rate=2, burst=3)
+
+    assert [limiter.acquire("a") for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire("a") == pytest.approx(0.5)
+    assert limiter.acquire("b") == 0  # Separate bucket
+
+    now += 0.5
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") > 0
+
+    now += 60
+    assert [limiter.acquire("a") for _ in range(3)] == [0, 0, 0]
+
+
+def test_bounded() -> None:
+    limiter = RateLimiter(max_clients=2)
+
+    for client in ["a", "b", "c"]:
+        limiter.acquire(client)
+
+    assert len(limiter) == 2
+
+
+async def test_middleware(aiohttp_client: Any) -> None:
+    limiter = RateLimiter(rate=0.001, burst=2, trusted_proxies=1)
+    limiter.exempt = lambda request: request.path == "/"
+
+    async def ok(request: web.Request) -> web.Response:
+        return web.Response()
+
+    app = web.Application(middlewares=[limiter.middleware])
+    app.add_routes([web.get("/", ok), web.get("/{username}", ok)])
+    client = await aiohttp_client(app)
+
+    def get(path: str, forwarded: str) -> Any:
+        return client.get(path, headers={"X-Forwarded-For": forwarded})
+
+    statuses = [(await get("/johndoe", "198.51.100.7")).status for _ in range(3)]
+    assert statuses == [HTTPStatus.OK, HTTPStatus.OK, HTTPStatus.TOO_MANY_REQUESTS]
+
+    limited = await get("/johndoe", "198.51.100.7")
+    assert int(limited.headers["Retry-After"]) > 900
+
+    assert (await get("/", "198.51.100.7")).status == HTTPStatus.OK
+    assert (await get("/johndoe", "198.51.100.8")).status == HTTPStatus.OK
+
+    assert limiter.stats.allowed == 3
+    assert limiter.stats.limited == 2
+    assert limiter.stats.exempt == 1
@@ -1,4 +1,5 @@
 import asyncio
+import time
 from contextlib import AbstractContextManager
 from contextlib import nullcontext as does_not_raise
 from datetime import timedelta
@@ -9,16 +10,29 @@ import aiohttp
 import aiohttp.web
 import pytest
 from aiohttp.client import ClientResponse
+from aiohttp.test_utils import make_mocked_request
 from aiohttp.web import Application, Response, json_response
 
+import ancv.web.server
+from ancv.data.models.github import File
+from ancv.data.models.resume import ResumeSchema
+from ancv.exceptions import ResumeLookupError
+from ancv.timing import Stopwatch
+from ancv.web.backends import BackendError, MemoryBackend
+from ancv.web.client import GitHubClient
+from ancv.web.compression import Variants
+from ancv.web.governor import Quota, QuotaExhaustedError
+from ancv.web.ratelimit import RateLimiter
 from ancv.web.server import (
     SHOWCASE_RESUME,
     SHOWCASE_USERNAME,
+    APIHandler,
     WebHandler,
     is_terminal_client,
     server_timing_header,
 )
 from tests import gh_rate_limited
+from tests.web.conftest import FakeGitHub
 
 
 @pytest.mark.parametrize(
@@ -378,3 +392,542 @@ class TestWebHandler:
         # Test error response
         resp = await client.get("/")
         assert resp.status == HTTPStatus.INTERNAL_SERVER_ERROR
+
+    async def test_web_handler_shared_cache(
+        self,
+        aiohttp_client: Any,
+        aiohttp_server: Any,
+    ) -> None:
+        hitcount = 0
+
+        async def mock_resume_handler(request: aiohttp.web.Request) -> Response:
+            nonlocal hitcount
+            hitcount += 1
+            return json_response({"basics": {"name": "Test User"}})
+
+        mock_app = Application()
+        mock_app.router.add_get("/resume.json", mock_resume_handler)
+        mock_server = await aiohttp_server(mock_app)
+
+        destination = f"http://localhost:{mock_server.port}/resume.json"
+        shared = MemoryBackend()
+        replicas = [
+            await aiohttp_client(WebHandler(destination, shared_cache=shared).app)
+            for _ in range(2)
+        ]
+
+        texts = [await (await client.get("/")).text() for client in replicas]
+        assert "Test User" in texts[0]
+        assert texts[1] == texts[0]
+        assert hitcount == 1  # Only the first replica fetched
+
+        # Shared renders age from when they were fetched, not adopted:
+        interval = timedelta(seconds=0.3)
+        shared = MemoryBackend()
+        first, second = [
+            await aiohttp_client(
+                WebHandler(
+                    destination, refresh_interval=interval, shared_cache=shared
+                ).app
+            )
+            for _ in range(2)
+        ]
+        await first.get("/")
+        await asyncio.sleep(0.2)
+        await second.get("/")
+        assert hitcount == 2
+        await asyncio.sleep(0.15)
+        await second.get("/")
+        assert hitcount == 3
+
+
+class TestStaleWhileRevalidate:
+    @pytest.fixture
+    def lookups(self, monkeypatch: pytest.MonkeyPatch) -> list[str]:
+        """Replaces GitHub lookups with a fake, recording each looked up user."""
+
+        lookups: list[str] = []
+
+        async def find_resume_file(user: str, **kwargs: Any) -> File:
+            lookups.append(user)
+            return File(
+                raw_url=f"https://gist.githubusercontent.com/{user}/1/raw/{len(lookups)}/resume.json",
+                size=1,
+            )
+
+        async def fetch_resume(**kwargs: Any) -> ResumeSchema:
+            return ResumeSchema(basics={"name": f"Lookup {len(lookups)}"})
+
+        monkeypatch.setattr(ancv.web.server, "find_resume_file", find_resume_file)
+        monkeypatch.setattr(ancv.web.server, "fetch_resume", fetch_resume)
+        return lookups
+
+    @staticmethod
+    def handler(
+        soft_ttl: Optional[timedelta],
+        hard_ttl: timedelta = timedelta(days=1),
+        **kwargs: Any,
+    ) -> APIHandler:
+        handler = APIHandler(
+            requester="",
+            token=None,
+            terminal_landing_page="",
+            browser_landing_page="",
+            soft_ttl=soft_ttl,
+            hard_ttl=hard_ttl,
+            **kwargs,
+        )
+        # Set up by the app context, which these tests mostly go without:
+        handler.app["client_session"] = None
+        return handler
+
+    async def test_disabled_by_default(self, lookups: list[str]) -> None:
+        handler = self.handler(soft_ttl=None)
+
+        for _ in range(3):
+            await handler.lookup("johndoe", github=None, stopwatch=Stopwatch())
+
+        assert len(lookups) == 3
+
+    async def test_serves_stale_and_refreshes(self, lookups: list[str]) -> None:
+        handler = self.handler(soft_ttl=timedelta(seconds=0.1))
+
+        first = await handler.lookup("johndoe", github=None, stopwatch=Stopwatch())
+        assert "Lookup 1" in first.text
+
+        # Fresh: served without a lookup.
+        assert (
+            await handler.lookup("johndoe", github=None, stopwatch=Stopwatch()) == first
+        )
+        assert len(lookups) == 1
+
+        # Stale: still served immediately, but refreshed in the background.
+        await asyncio.sleep(0.15)
+        assert (
+            await handler.lookup("johndoe", github=None, stopwatch=Stopwatch()) == first
+        )
+        await asyncio.sleep(0.01)
+        assert len(lookups) == 2
+
+        refreshed = await handler.lookup("johndoe", github=None, stopwatch=Stopwatch())
+        assert "Lookup 2" in refreshed.text
+
+    async def test_blocks_after_hard_ttl(self, lookups: list[str]) -> None:
+        handler = self.handler(
+            soft_ttl=timedelta(seconds=0.05), hard_ttl=timedelta(seconds=0.1)
+        )
+
+        await handler.lookup("johndoe", github=None, stopwatch=Stopwatch())
+        await asyncio.sleep(0.15)
+
+        rendered = await handler.lookup("johndoe", github=None, stopwatch=Stopwatch())
+        assert "Lookup 2" in rendered.text
+
+    @pytest.mark.parametrize("soft_ttl", [None, timedelta(seconds=60)])
+    async def test_not_modified_skips_render(
+        self,
+        soft_ttl: Optional[timedelta],
+        lookups: list[str],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        async def find_resume_file(user: str, **kwargs: Any) -> File:
+            lookups.append(user)
+            return File(
+                raw_url="https://gist.githubusercontent.com/x/1/raw/1/r.json", size=1
+            )
+
+        monkeypatch.setattr(ancv.web.server, "find_resume_file", find_resume_file)
+        handler = self.handler(soft_ttl=soft_ttl)
+        first = await handler.lookup("johndoe", github=None, stopwatch=Stopwatch())
+        assert isinstance(first, ancv.web.server.Variants)
+
+        def not_modified(tag: str) -> Optional[Response]:
+            return (
+                Response(status=HTTPStatus.NOT_MODIFIED) if tag == first.tag else None
+            )
+
+        result = await handler.lookup(
+            "johndoe", github=None, stopwatch=Stopwatch(), not_modified=not_modified
+        )
+
+        assert isinstance(result, Response)
+        assert result.status == HTTPStatus.NOT_MODIFIED
+        assert handler.render_pool.stats.completed == 1
+        # With a fresh snapshot, not even GitHub is asked.
+        assert len(lookups) == (2 if soft_ttl is None else 1)
+
+    @pytest.mark.parametrize("soft_ttl", [None, timedelta(seconds=60)])
+    async def test_cached_is_cheap(
+        self, soft_ttl: Optional[timedelta], lookups: list[str]
+    ) -> None:
+        handler = self.handler(soft_ttl=soft_ttl)
+
+        def request(**match_info: str) -> aiohttp.web.Request:
+            return make_mocked_request("GET", "/", match_info=match_info)
+
+        assert handler.is_cheap(request())
+        assert not handler.is_cheap(request(username="johndoe"))
+
+        await handler.lookup("johndoe", github=None, stopwatch=Stopwatch())
+
+        # Without a soft TTL, every request looks up the current revision.
+        assert handler.is_cheap(request(username="johndoe")) == (soft_ttl is not None)
+        assert not handler.is_cheap(request(username="janedoe"))
+
+    @pytest.mark.filterwarnings("ignore:Request.message is deprecated")
+    @pytest.mark.filterwarnings("ignore:Exception ignored in")
+    async def test_streams_fresh_renders(
+        self, lookups: list[str], aiohttp_client: Any
+    ) -> None:
+        handler = self.handler(soft_ttl=timedelta(seconds=60), stream=True)
+        client = await aiohttp_client(handler.app)
+
+        resp = await client.get("/johndoe", headers={"Accept-Encoding": "identity"})
+        assert resp.status == HTTPStatus.OK
+        assert resp.headers.get("Transfer-Encoding") == "chunked"
+        assert "Content-Encoding" not in resp.headers
+        streamed = await resp.text()
+        assert "Lookup 1" in streamed
+
+        # Cached once done, and served from there as usual:
+        resp = await client.get("/johndoe", headers={"Accept-Encoding": "gzip"})
+        assert resp.status == HTTPStatus.OK
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert await resp.text() == streamed
+        assert handler.render_pool.stats.completed == 1
+        assert lookups == ["johndoe"]
+
+    @pytest.mark.filterwarnings("ignore:Request.message is deprecated")
+    @pytest.mark.filterwarnings("ignore:Exception ignored in")
+    async def test_no_stream_when_compressed(
+        self, lookups: list[str], aiohttp_client: Any
+    ) -> None:
+        handler = self.handler(soft_ttl=timedelta(seconds=60), stream=True)
+        client = await aiohttp_client(handler.app)
+
+        resp = await client.get("/johndoe", headers={"Accept-Encoding": "gzip"})
+
+        assert resp.status == HTTPStatus.OK
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert "Lookup 1" in await resp.text()
+
+    @pytest.mark.filterwarnings("ignore:Request.message is deprecated")
+    @pytest.mark.filterwarnings("ignore:Exception ignored in")
+    async def test_refreshes_cancelled_on_teardown(self) -> None:
+        handler = self.handler(soft_ttl=timedelta(seconds=60), hot_users=0)
+        started = asyncio.Event()
+        cancelled = False
+
+        async def refresh(user: str, github: Any) -> None:
+            nonlocal cancelled
+            started.set()
+            try:
+                await asyncio.Event().wait()  # Never done
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+
+        handler._refresh = refresh  # type: ignore[method-assign]
+
+        context = handler.app_context(handler.app)
+        await anext(context)
+        handler._refresh_in_background("johndoe", github=None, age=timedelta(0))
+        await started.wait()
+
+        with pytest.raises(StopAsyncIteration):
+            await anext(context)
+        assert cancelled
+        assert not handler._refreshes
+
+    async def test_prewarm(self, lookups: list[str], aiohttp_client: Any) -> None:
+        handler = self.handler(
+            soft_ttl=timedelta(seconds=60), prewarm=["johndoe", "janedoe"]
+        )
+        not_ready = await handler.ready(make_mocked_request("GET", "/-/ready"))
+        assert not_ready.status == HTTPStatus.SERVICE_UNAVAILABLE
+
+        client = await aiohttp_client(handler.app)
+
+        await asyncio.wait_for(handler.prewarmer.done.wait(), timeout=5)
+        resp = await client.get("/-/ready")
+        assert resp.status == HTTPStatus.OK
+        assert sorted(lookups) == ["janedoe", "johndoe"]
+
+        resp = await client.get("/johndoe")
+        assert resp.status == HTTPStatus.OK
+        assert len(lookups) == 2  # Served from cache
+
+        status = await (await client.get("/-/status")).json()
+        assert status["prewarm"]["warmed"] == 2
+
+    async def test_hot_users_refreshed_ahead(self, lookups: list[str]) -> None:
+        handler = self.handler(soft_ttl=timedelta(seconds=0.1))
+        handler.app["github"] = None
+
+        await handler.lookup("johndoe", github=None, stopwatch=Stopwatch())
+        handler.hot.record("johndoe")
+        handler.hot.record("janedoe")  # Never found, so nothing to refresh
+
+        assert not handler._due_for_refresh("johndoe")
+        await asyncio.sleep(0.09)
+        assert handler._due_for_refresh("johndoe")
+        assert not handler._due_for_refresh("janedoe")
+
+        assert await handler.hot.scan() == 1
+        assert lookups == ["johndoe", "johndoe"]
+        assert not handler._due_for_refresh("johndoe")
+
+        # Still fresh, so served without a lookup:
+        rendered = await handler.lookup("johndoe", github=None, stopwatch=Stopwatch())
+        assert "Lookup 2" in rendered.text
+        assert len(lookups) == 2
+
+    async def test_renders_coalesced_by_revision(
+        self, lookups: list[str], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        handler = self.handler(soft_ttl=None)
+        release = asyncio.Event()
+        render = handler.render_pool.render
+
+        async def slow_render(resume: ResumeSchema) -> str:
+            assert resume.basics is not None
+            if resume.basics.name == "Lookup 1":
+                await release.wait()
+            return await render(resume)
+
+        monkeypatch.setattr(handler.render_pool, "render", slow_render)
+
+        old = asyncio.create_task(
+            handler.lookup("johndoe", github=None, stopwatch=Stopwatch())
+        )
+        await asyncio.sleep(0.01)
+        assert handler._busy("johndoe")
+
+        # A newer revision doesn't join the render of the older one still underway:
+        new = await asyncio.wait_for(
+            handler.lookup("johndoe", github=None, stopwatch=Stopwatch()), timeout=5
+        )
+        assert isinstance(new, Variants)
+        assert "Lookup 2" in new.text
+
+        release.set()
+        assert "Lookup 1" in (await old).text
+        # The older render finishing last doesn't make it current again:
+        assert handler.snapshots["johndoe"].key.tag == new.tag
+
+    async def test_shared_cache(
+        self, lookups: list[str], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        fetches: list[str] = []
+
+        async def fetch_resume(file: File, **kwargs: Any) -> ResumeSchema:
+            fetches.append(file.raw_url)
+            return ResumeSchema(basics={"name": "Shared"})
+
+        monkeypatch.setattr(ancv.web.server, "fetch_resume", fetch_resume)
+
+        shared = MemoryBackend()
+        replicas = [self.handler(soft_ttl=None, shared_cache=shared) for _ in range(2)]
+
+        first = await replicas[0].lookup("johndoe", github=None, stopwatch=Stopwatch())
+        await asyncio.gather(*replicas[0]._shares)
+        assert len(shared) == 1
+
+        # Same revision as the first replica's (the fake numbers them per lookup):
+        lookups.clear()
+        second = await replicas[1].lookup("johndoe", github=None, stopwatch=Stopwatch())
+        assert isinstance(first, Variants) and isinstance(second, Variants)
+        assert second.text == first.text
+        assert second.tag == first.tag
+        assert len(fetches) == 1  # Neither fetched nor rendered again
+        assert shared.stats.hits == 1
+
+    async def test_shared_cache_failure(self, lookups: list[str]) -> None:
+        class Broken(MemoryBackend):
+            async def _get(self, key: str) -> Optional[bytes]:
+                raise BackendError("Down.")
+
+        handler = self.handler(soft_ttl=None, shared_cache=Broken())
+
+        rendered = await handler.lookup("johndoe", github=None, stopwatch=Stopwatch())
+        assert "Lookup 1" in rendered.text
+        assert handler.shared_cache is not None
+        assert handler.shared_cache.stats.errors == 1
+
+    async def test_cache_only(self, lookups: list[str]) -> None:
+        handler = self.handler(
+            soft_ttl=timedelta(seconds=0.05), hard_ttl=timedelta(seconds=0.1)
+        )
+        first = await handler.lookup("johndoe", github=None, stopwatch=Stopwatch())
+
+        quota = Quota(remaining=0, limit=5000, reset=time.time() + 60)
+        handler.governor.quota = lambda: quota
+        await asyncio.sleep(0.15)
+
+        # Past the hard TTL, but served anyway, without a refresh:
+        rendered = await handler.lookup("johndoe", github=None, stopwatch=Stopwatch())
+        assert rendered == first
+        await asyncio.sleep(0.01)
+        assert lookups == ["johndoe"]
+
+        with pytest.raises(QuotaExhaustedError):
+            await handler.lookup("janedoe", github=None, stopwatch=Stopwatch())
+
+    def test_hard_ttl_shorter_than_soft_ttl(self) -> None:
+        with pytest.raises(ValueError):
+            self.handler(soft_ttl=timedelta(seconds=2), hard_ttl=timedelta(seconds=1))
+
+
+@pytest.mark.filterwarnings("ignore:Request.message is deprecated")
+@pytest.mark.filterwarnings("ignore:Exception ignored in")
+@pytest.mark.parametrize(
+    ["accept_encoding", "expected_encoding"],
+    [
+        ("gzip", "gzip"),
+        ("identity", None),
+    ],
+)
+async def test_precompressed_responses(
+    accept_encoding: str,
+    expected_encoding: Optional[str],
+    aiohttp_client: Any,
+    api_client_app: Application,
+    file_handler_app: Application,
+) -> None:
+    for app, path, expected_content in [
+        (api_client_app, f"/{SHOWCASE_USERNAME}", SHOWCASE_RESUME),
+        (file_handler_app, "/", "John Doe"),
+    ]:
+        client = await aiohttp_client(app)
+
+        resp = await client.get(path, headers={"Accept-Encoding": accept_encoding})
+
+        assert resp.status == HTTPStatus.OK
+        assert resp.headers["Vary"] == "Accept-Encoding"
+        assert resp.headers.get("Content-Encoding") == expected_encoding
+        assert expected_content in await resp.text()
+
+
+@pytest.mark.filterwarnings("ignore:Request.message is deprecated")
+@pytest.mark.filterwarnings("ignore:Exception ignored in")
+async def test_conditional_requests(
+    aiohttp_client: Any,
+    api_client_app: Application,
+    file_handler_app: Application,
+) -> None:
+    for app, path in [
+        (api_client_app, f"/{SHOWCASE_USERNAME}"),
+        (file_handler_app, "/"),
+    ]:
+        client = await aiohttp_client(app)
+
+        resp = await client.get(path)
+        assert resp.status == HTTPStatus.OK
+        etag = resp.headers["ETag"]
+
+        resp = await client.get(path, headers={"If-None-Match": etag})
+        assert resp.status == HTTPStatus.NOT_MODIFIED
+        assert resp.headers["ETag"] == etag
+        assert await resp.read() == b""
+
+        resp = await client.get(path, headers={"If-None-Match": '"outdated"'})
+        assert resp.status == HTTPStatus.OK
+
+
+@pytest.mark.filterwarnings("ignore:Request.message is deprecated")
+@pytest.mark.filterwarnings("ignore:Exception ignored in")
+async def test_metrics_endpoint(
+    aiohttp_client: Any, api_client_app: Application
+) -> None:
+    client = await aiohttp_client(api_client_app)
+
+    await client.get(f"/{SHOWCASE_USERNAME}")
+    resp = await client.get("/-/metrics")
+
+    assert resp.status == HTTPStatus.OK
+    metrics = await resp.text()
+    assert f'ancv_requests_total{{status="{HTTPStatus.OK.value}"}} 1' in metrics
+    assert 'ancv_cache_hit_ratio{cache="render"}' in metrics
+    assert "ancv_requests_in_flight 1" in metrics  # The metrics request itself
+    assert "# TYPE ancv_admission_requests_total counter" in metrics
+    assert 'ancv_admission_requests_total{outcome="bypassed"} 2' in metrics
+    assert 'ancv_renders_total{outcome="rejected"} 0' in metrics
+    assert "# TYPE ancv_render_wait_seconds histogram" in metrics
+    assert "ancv_render_wait_seconds_count 0" in metrics
+
+
+@pytest.mark.parametrize("rate_limiter", [None, RateLimiter()])
+def test_rate_limiting_opt_in(rate_limiter: Optional[RateLimiter]) -> None:
+    handler = APIHandler(
+        requester="",
+        token=None,
+        terminal_landing_page="",
+        browser_landing_page="",
+        rate_limiter=rate_limiter,
+    )
+
+    enabled = rate_limiter is not None
+    assert ("ancv_rate_limit_requests_total" in handler.metrics.expose()) == enabled
+    if rate_limiter is not None:
+        assert rate_limiter.exempt == handler.is_cheap
+        assert rate_limiter.middleware in handler.app.middlewares
+
+
+@pytest.mark.filterwarnings("ignore:Exception ignored in")
+async def test_status_endpoint(
+    aiohttp_client: Any, api_client_app: Application
+) -> None:
+    client = await aiohttp_client(api_client_app)
+
+    resp = await client.get("/-/status")
+
+    assert resp.status == HTTPStatus.OK
+    status = await resp.json()
+    assert status["governor"]["mode"] == "normal"
+    assert status["prewarm"]["done"]
+
+    resp = await client.get("/-/ready")
+    assert resp.status == HTTPStatus.OK
+
+
+@pytest.mark.parametrize("username", ["status", "ready", "metrics"])
+async def test_operational_endpoints_leave_usernames_alone(
+    api_client_app: Application, username: str
+) -> None:
+    match = await api_client_app.router.resolve(
+        make_mocked_request("GET", f"/{username}")
+    )
+    assert match.get("username") == username
+
+
+@pytest.mark.filterwarnings("ignore:Exception ignored in")
+async def test_negative_cache(
+    fake_github: FakeGitHub,
+    fake_github_api: GitHubClient,
+    session: aiohttp.ClientSession,
+) -> None:
+    handler = APIHandler(
+        requester="", token=None, terminal_landing_page="", browser_landing_page=""
+    )
+    handler.app["client_session"] = session
+
+    async def lookup(user: str) -> None:
+        await handler.lookup(user, github=fake_github_api, stopwatch=Stopwatch())
+
+    for _ in range(2):
+        with pytest.raises(ResumeLookupError, match="not found"):
+            await lookup("nobody")
+    assert fake_github.requests == ["/users/nobody/gists?per_page=100"]
+
+    gist = fake_github.add_gist("johndoe", {"resume.json": b'{"basics": 1}'})
+    with pytest.raises(ResumeLookupError, match="wrong schema"):
+        await lookup("johndoe")
+    fake_github.requests.clear()
+    with pytest.raises(ResumeLookupError, match="wrong schema"):
+        await lookup("johndoe")
+    # The gist is looked up again, but not downloaded nor validated:
+    assert fake_github.requests == [f"/gists/{gist['id']}"]
+
+    fake_github.update_file("johndoe", gist["id"], "resume.json", b"{}")
+    await lookup("johndoe")
+    assert handler.negative_cache.get("johndoe", revision=None) is None
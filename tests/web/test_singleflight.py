@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from ancv.web.singleflight import SingleFlight
+
+
+async def test_concurrent_calls_are_coalesced() -> None:
+    calls = 0
+
+    async def work() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    singleflight: SingleFlight[str, str] = SingleFlight()
+    results = await asyncio.gather(*(singleflight("key", work) for _ in range(100)))
+
+    assert results == ["result"] * 100
+    assert calls == 1
+    assert len(singleflight) == 0
+
+    # Once done, the next call starts over.
+    assert await singleflight("key", work) == "result"
+    assert calls == 2
+
+
+async def test_different_keys_are_independent() -> None:
+    calls: list[str] = []
+
+    def work(key: str):
+        async def inner() -> str:
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key
+
+        return inner
+
+    singleflight: SingleFlight[str, str] = SingleFlight()
+    results = await asyncio.gather(
+        singleflight("a", work("a")),
+        singleflight("b", work("b")),
+        singleflight("a", work("a")),
+    )
+
+    assert results == ["a", "b", "a"]
+    assert sorted(calls) == ["a", "b"]
+
+
+async def test_errors_are_shared() -> None:
+    calls = 0
+
+    async def work() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise LookupError("not found")
+
+    singleflight: SingleFlight[str, str] = SingleFlight()
+    results = await asyncio.gather(
+        *(singleflight("key", work) for _ in range(10)), return_exceptions=True
+    )
+
+    assert calls == 1
+    assert all(isinstance(r, LookupError) for r in results)
+
+
+async def test_cancelled_waiter_does_not_cancel_others() -> None:
+    started = asyncio.Event()
+
+    async def work() -> str:
+        started.set()
+        await asyncio.sleep(0.05)
+        return "result"
+
+    singleflight: SingleFlight[str, str] = SingleFlight()
+    first = asyncio.create_task(singleflight("key", work))
+    await started.wait()
+    second = asyncio.create_task(singleflight("key", work))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    assert await second == "result"
@@ -0,0 +1,83 @@
+import asyncio
+from collections.abc import AsyncIterator
+from http import HTTPStatus
+from typing import Any
+
+import pytest
+from aiohttp import web
+
+from ancv.web.streaming import Rendering, stream
+
+
+class Sections:
+    """Yields sections as they're released, failing at the end if told to."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.queue: asyncio.Queue[str] = asyncio.Queue()
+        self.fail = fail
+
+    def release(self, *sections: str) -> None:
+        for section in sections:
+            self.queue.put_nowait(section)
+
+    async def __call__(self) -> AsyncIterator[str]:
+        while (section := await self.queue.get()) != "":
+            yield section
+        if self.fail:
+            raise RuntimeError("Render failed.")
+
+
+async def collect(rendering: Rendering) -> list[str]:
+    return [section async for section in rendering.sections()]
+
+
+async def test_readers_share_render() -> None:
+    sections = Sections()
+    rendering = Rendering(sections(), tag="tag")
+
+    early = asyncio.create_task(collect(rendering))
+    sections.release("a", "b")
+    await asyncio.sleep(0.01)
+    late = asyncio.create_task(collect(rendering))  # Replays what's done
+    sections.release("c", "")
+
+    assert await early == await late == ["a", "b", "c"]
+    variants = await rendering.variants()
+    assert variants.text == "abc"
+    assert variants.tag == "tag"
+
+
+async def test_failure_after_sections() -> None:
+    sections = Sections(fail=True)
+    rendering = Rendering(sections(), tag="tag")
+    sections.release("a", "")
+
+    received = []
+    with pytest.raises(RuntimeError):
+        async for section in rendering.sections():
+            received.append(section)
+
+    assert received == ["a"]
+    with pytest.raises(RuntimeError):
+        await rendering.variants()
+
+
+async def test_stream(aiohttp_client: Any) -> None:
+    sections = Sections()
+
+    async def handler(request: web.Request) -> web.StreamResponse:
+        return await stream(request, Rendering(sections(), tag="tag"))
+
+    app = web.Application()
+    app.add_routes([web.get("/", handler)])
+    client = await aiohttp_client(app)
+
+    sections.release("header")
+    async with client.get("/") as response:
+        assert response.status == HTTPStatus.OK
+        assert response.headers["ETag"] == '"tag"'
+        # Sent before the rest is even rendered:
+        assert await response.content.readany() == b"header"
+
+        sections.release("body", "")
+        assert await response.text() == "body"
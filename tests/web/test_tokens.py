@@ -0,0 +1,122 @@
+import time
+from typing import Optional
+
+import aiohttp
+import pytest
+
+from ancv.reflection import METADATA
+from ancv.web.client import GitHubClient
+from ancv.web.tokens import TokenPool
+from tests.web.conftest import FakeGitHub
+
+
+def headers(remaining: int, reset: float) -> dict[str, str]:
+    return {
+        "x-ratelimit-limit": "5000",
+        "x-ratelimit-remaining": str(remaining),
+        "x-ratelimit-reset": str(int(reset)),
+    }
+
+
+def test_empty_pool() -> None:
+    pool = TokenPool([])
+
+    assert not pool
+    assert pool.pick() is None
+    assert pool.remaining() is None
+
+
+def test_pick_most_remaining() -> None:
+    reset = time.time() + 3600
+    pool = TokenPool(["a", "b", "c"])
+
+    pool.update("a", headers(100, reset))
+    pool.update("b", headers(3000, reset))
+    assert pool.pick() == "c"  # Unknown, so presumably fresh
+
+    pool.update("c", headers(50, reset))
+    assert pool.pick() == "b"
+    assert pool.remaining() == 100 + 2999 + 50
+
+
+def test_pick_skips_exhausted_until_reset() -> None:
+    pool = TokenPool(["a", "b"], reserve=10)
+
+    pool.update("a", headers(5, time.time() + 3600))
+    pool.update("b", headers(12, time.time() + 3600))
+    assert pool.pick() == "b"
+    assert pool.available() == 1
+
+    pool.states[0].reset = time.time() - 1  # Time passes, and `a` resets
+    assert pool.available() == 2
+    assert pool.pick() == "a"
+
+
+def test_pick_all_exhausted() -> None:
+    pool = TokenPool(["a", "b"])
+
+    pool.update("a", headers(0, time.time() + 3600))
+    pool.update("b", headers(0, time.time() + 60))
+
+    assert pool.pick() == "b"  # Recovers first
+    assert pool.available() == 0
+
+
+def test_update_ignores_out_of_order_responses() -> None:
+    reset = time.time() + 3600
+    pool = TokenPool(["a"])
+
+    pool.update("a", headers(10, reset))
+    pool.update("a", headers(20, reset))  # Older response, same window
+    pool.update("a", headers(30, reset - 3600))  # Older window
+    pool.update("unknown", headers(30, reset))
+
+    assert pool.remaining() == 10
+
+
+@pytest.mark.parametrize(
+    ["remaining", "expected"],
+    [
+        ({"a": 1000, "b": 1000}, {"a", "b"}),
+        ({"a": 5, "b": 1000}, {"b"}),
+    ],
+)
+async def test_client_rotates_tokens(
+    remaining: dict[Optional[str], int], expected: set[str], fake_github: FakeGitHub
+) -> None:
+    fake_github.add_user("johndoe")
+    fake_github.remaining = dict(remaining)
+
+    pool = TokenPool(["a", "b"])
+    async with aiohttp.ClientSession() as session:
+        github = GitHubClient(
+            session,
+            requester=f"{METADATA.name}-PYTEST-REQUESTER",
+            oauth_token="unused",
+            tokens=pool,
+            base_url=fake_github.base_url,
+        )
+        for _ in range(10):
+            await github.getitem("/users/johndoe/gists")
+
+    assert set(fake_github.tokens[2:]) == expected  # After learning both limits
+    assert pool.remaining() == sum(remaining.values()) - 10
+
+
+def test_quota() -> None:
+    now = time.time()
+    pool = TokenPool(["a", "b", "c"])
+    assert pool.quota() is None
+
+    pool.update("a", headers(100, now + 3600))
+    pool.update("b", headers(200, now + 60))
+    quota = pool.quota()
+    assert quota is not None
+    assert quota.remaining == 300
+    assert quota.limit == 10_000  # Unknown `c` doesn't count
+    assert quota.reset == int(now + 60)
+
+    pool.states[1].reset = now - 1  # `b` resets
+    quota = pool.quota()
+    assert quota is not None
+    assert quota.remaining == 100 + 5000